@@ -0,0 +1,143 @@
+"""
+Воспроизводимый набор бенчмарков pysxf.
+
+Листы генерируются с фиксированным seed, для каждого сценария
+измеряются записи/с, МБ/с и пиковое потребление памяти.
+
+Пример:
+
+    python -m benchmarks.bench --records 20000 --repeat 3
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from pysxf import RSC, SXF
+from pysxf.sxf.sxf_object import ObjectType
+
+from .generate import generate_sxf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RSC = os.path.join(ROOT, '100t03g.rsc')
+
+
+class Result(NamedTuple):
+    name: str
+    records: int
+    size: int
+    seconds: float
+    peak_memory: int
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.size / self.seconds / 2 ** 20 if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f'{self.name:<16} {self.records:>9} rec '
+                f'{self.seconds * 1000:>10.1f} ms '
+                f'{self.records_per_second:>12.0f} rec/s '
+                f'{self.mb_per_second:>8.2f} MB/s '
+                f'{self.peak_memory / 2 ** 20:>8.2f} MB peak')
+
+
+def measure(name: str,
+            func: Callable[[], int],
+            size: int,
+            repeat: int = 3) -> Result:
+    """
+    Запуск сценария `repeat` раз: лучшее время без трассировки памяти
+    и пиковое потребление памяти по отдельному прогону.
+    """
+
+    best = float('inf')
+    records = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        records = func()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return Result(name, records, size, best, peak)
+
+
+def header_scan(path: str) -> int:
+    sxf = SXF(path)
+    return sum(1 for _ in sxf.iter_headers())
+
+
+def full_parse(path: str) -> int:
+    return len(SXF(path).parse())
+
+
+def filtered_parse(path: str) -> int:
+    return len(SXF(path).parse(lambda obj: obj.type == ObjectType.AREA))
+
+
+def preview(path: str) -> int:
+    return len(SXF(path).preview(every=10, stride=8))
+
+
+def rsc_load(path: str) -> int:
+    rsc = RSC(path).parse()
+    return sum(len(objects) for objects in rsc.objects.values())
+
+
+def run(records: int = 20000,
+        big_objects: int = 2,
+        repeat: int = 3,
+        rsc_path: Optional[str] = DEFAULT_RSC,
+        seed: int = 0) -> List[Result]:
+    """
+    Генерация тестового листа и запуск всех сценариев.
+    """
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sxf')
+        size = generate_sxf(path, records, seed, big_objects=big_objects)
+
+        scenarios: Dict[str, Callable[[], int]] = {
+            'header scan': lambda: header_scan(path),
+            'full parse': lambda: full_parse(path),
+            'filtered parse': lambda: filtered_parse(path),
+            'preview': lambda: preview(path)
+        }
+        for name, func in scenarios.items():
+            results.append(measure(name, func, size, repeat))
+
+    if rsc_path is not None and os.path.exists(rsc_path):
+        results.append(measure('rsc load', lambda: rsc_load(rsc_path), os.path.getsize(rsc_path), repeat))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарки pysxf.')
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--big', type=int, default=2, help='число больших объектов')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rsc', default=DEFAULT_RSC)
+    args = parser.parse_args()
+
+    for result in run(args.records, args.big, args.repeat, args.rsc, args.seed):
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Генератор синтетических листов SXF v4.
+
+Пример:
+
+    python -m benchmarks.generate sheet.sxf --records 100000 --big 2
+"""
+import argparse
+import os
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pysxf.sxf.sxf_object import ObjectType
+from pysxf.sxf.writer import DATA_TYPE_FLAGS, SXFWriter, pack_record
+
+# форматы координат метрики
+METRICS_FORMATS = tuple(DATA_TYPE_FLAGS)
+
+# типы семантики
+SEMANTIC_TYPES = (0, 1, 2, 4, 8, 126, 127, 128)
+
+WORDS = ['Москва', 'Ока', 'Волга', 'Тула', 'Калуга', 'ручей', 'озеро', 'лес', 'дорога']
+
+Point = Tuple[float, float]
+
+
+def _semantics(rnd: random.Random) -> Dict[int, tuple]:
+    """
+    Семантика объекта со всеми поддерживаемыми типами характеристик.
+    """
+
+    semantics = {}
+    for code, feature_type in enumerate(SEMANTIC_TYPES, start=1):
+        if feature_type in (0, 126, 127, 128):
+            semantics[code] = (feature_type, rnd.choice(WORDS))
+        elif feature_type == 8:
+            semantics[code] = (feature_type, rnd.uniform(-1000, 1000), rnd.randint(-2, 2))
+        else:
+            bound = 1 << (feature_type * 8 - 1)
+            semantics[code] = (feature_type, rnd.randint(-bound, bound - 1))
+    return semantics
+
+
+def _random_path(rnd: random.Random, count: int, closed: bool = False) -> List[Point]:
+    x, y = rnd.uniform(5000, 30000), rnd.uniform(5000, 30000)
+    points = []
+    for _ in range(count):
+        x += rnd.uniform(-50, 50)
+        y += rnd.uniform(-50, 50)
+        points.append((x, y))
+    if closed and points:
+        points[-1] = points[0]
+    return points
+
+
+def make_record(rnd: random.Random,
+                id_: int,
+                type_: ObjectType,
+                data_type: str = '<f',
+                points_count: Optional[int] = None,
+                subitems: int = 0,
+                subitem_points: int = 4,
+                with_semantics: bool = True) -> bytes:
+    """
+    Сборка одной случайной записи SXF.
+    """
+
+    if points_count is None:
+        points_count = {
+            ObjectType.POINT: 1,
+            ObjectType.VECTOR: 2,
+            ObjectType.LABEL: 2
+        }.get(type_, rnd.randint(2, 64))
+
+    closed = type_ == ObjectType.AREA
+    is_label = type_ in (ObjectType.LABEL, ObjectType.TEMPLATE)
+
+    parts = [_random_path(rnd, subitem_points, closed) for _ in range(subitems)]
+
+    return pack_record(
+        rnd.choice((31120000, 42100000, 51200000, 71100000)),
+        _random_path(rnd, points_count, closed),
+        type_=type_,
+        id_=id_ & 0xFFFF,
+        group_id=(id_ >> 16) & 0xFFFF,
+        subitems=() if is_label else parts,
+        text=rnd.choice(WORDS) if is_label else None,
+        text_subitems=[{'points': p, 'text': rnd.choice(WORDS)} for p in parts] if is_label else (),
+        semantics=_semantics(rnd) if with_semantics else None,
+        general_levels=(rnd.randint(0, 15), rnd.randint(0, 15)),
+        data_type=data_type
+    )
+
+
+def generate_sxf(path: str,
+                 records_count: int,
+                 seed: int = 0,
+                 types: Sequence[ObjectType] = tuple(ObjectType),
+                 formats: Sequence[str] = METRICS_FORMATS,
+                 big_objects: int = 0,
+                 big_points_count: int = 70000,
+                 semantics_ratio: float = 0.8) -> int:
+    """
+    Запись синтетического листа SXF v4.
+
+    Типы объектов и форматы метрики перебираются по кругу, `big_objects`
+    записей получают `big_points_count` точек и подобъект с расширенным
+    счётчиком точек. Возвращает размер файла в байтах.
+    """
+
+    rnd = random.Random(seed)
+    nomenclature = b'SYN-' + str(seed).encode()
+
+    rect_coords = (6000000.0, 7400000.0, 6040000.0, 7400000.0,
+                   6040000.0, 7440000.0, 6000000.0, 7440000.0)
+    geo_coords = (0.9, 0.65, 0.91, 0.65, 0.91, 0.67, 0.9, 0.67)
+
+    with SXFWriter(path, nomenclature=nomenclature, name=b'SYNTHETIC', scale=100000, date=b'20240101',
+                   rect_coords=rect_coords, geo_coords=geo_coords) as writer:
+        for i in range(records_count):
+            type_ = types[i % len(types)]
+            data_type = formats[i // len(types) % len(formats)]
+            with_semantics = rnd.random() < semantics_ratio
+
+            if i < big_objects:
+                # координаты '<H' не поместят случайное блуждание большого объекта
+                record = make_record(rnd, i + 1, ObjectType.LINE, '<d', big_points_count,
+                                     subitems=1, subitem_points=big_points_count,
+                                     with_semantics=with_semantics)
+            elif type_ in (ObjectType.AREA, ObjectType.LABEL, ObjectType.TEMPLATE) and i % 3 == 0:
+                record = make_record(rnd, i + 1, type_, data_type, subitems=rnd.randint(1, 3),
+                                     with_semantics=with_semantics)
+            else:
+                record = make_record(rnd, i + 1, type_, data_type, with_semantics=with_semantics)
+
+            writer.write_record(record)
+
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генератор синтетических листов SXF v4.')
+    parser.add_argument('path')
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--big', type=int, default=0, help='число больших объектов')
+    parser.add_argument('--big-points', type=int, default=70000)
+    args = parser.parse_args()
+
+    size = generate_sxf(args.path, args.records, args.seed,
+                        big_objects=args.big, big_points_count=args.big_points)
+    print(f'{args.path}: {args.records} records, {size} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,8 @@
 from pysxf.rsc.rsc import RSC
 from pysxf.sxf.sxf import SXF
+from pysxf.sxf.budget import MemoryBudget
+from pysxf.sxf.catalog import SXFCatalog
+from pysxf.sxf.diff import SheetDiff
+from pysxf.sxf.writer import SXFWriter
 
-__all__ = ['RSC', 'SXF']
+__all__ = ['MemoryBudget', 'RSC', 'SXF', 'SXFCatalog', 'SXFWriter', 'SheetDiff']
@@ -0,0 +1,52 @@
+import asyncio
+import contextvars
+import functools
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# задачи "в полёте" для каждого цикла событий
+_in_flight: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Future]]' = \
+    weakref.WeakKeyDictionary()
+
+
+async def run_in_executor(executor: Optional[Executor],
+                          func: Callable[..., Any],
+                          *args: Any,
+                          **kwargs: Any) -> Any:
+    """
+    Выполнение блокирующей функции в пуле потоков или процессов.
+
+    Если пул не указан, используется пул цикла событий по умолчанию.
+    В пуле потоков функция выполняется в копии текущего контекста
+    (например, с сессией профилирования вызывающей задачи).
+    """
+
+    loop = asyncio.get_running_loop()
+    if kwargs:
+        func = functools.partial(func, **kwargs)
+    if not isinstance(executor, ProcessPoolExecutor):
+        func = functools.partial(contextvars.copy_context().run, func)
+    return await loop.run_in_executor(executor, func, *args)
+
+
+async def single_flight(key: Hashable,
+                        factory: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Объединение одновременных запросов с одинаковым ключом в одну задачу.
+
+    Пока задача с ключом `key` не завершена, все вызывающие ожидают
+    её результат, а не запускают `factory` повторно.
+    """
+
+    loop = asyncio.get_running_loop()
+    tasks = _in_flight.setdefault(loop, {})
+
+    task = tasks.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        tasks[key] = task
+        task.add_done_callback(lambda _: tasks.pop(key, None))
+
+    # отмена одного из ожидающих не должна отменять общую задачу
+    return await asyncio.shield(task)
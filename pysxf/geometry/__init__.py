@@ -0,0 +1,12 @@
+from pysxf.geometry.clip import clip_line, clip_objects, clip_ring, clip_sheet
+from pysxf.geometry.index import GridIndex
+from pysxf.geometry.lod import LODPyramid, is_visible
+from pysxf.geometry.metrics import GeometryArrays, GeometryMetrics, bboxes, columns_metrics, metrics
+from pysxf.geometry.query import SpatialQuery
+from pysxf.geometry.simplify import douglas_peucker, douglas_peucker_mask
+
+__all__ = [
+    'GeometryArrays', 'GeometryMetrics', 'GridIndex', 'LODPyramid', 'SpatialQuery',
+    'bboxes', 'clip_line', 'clip_objects', 'clip_ring', 'clip_sheet', 'columns_metrics',
+    'douglas_peucker', 'douglas_peucker_mask', 'is_visible', 'metrics'
+]
@@ -0,0 +1,220 @@
+import copy
+from array import array
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pysxf.sxf.columns import SheetColumns
+from pysxf.sxf.sxf_object import ObjectType, SXFObject
+from .lod import object_parts
+from .metrics import GeometryArrays, bboxes
+
+BBox = Tuple[float, float, float, float]
+
+
+def clip_line(points, bbox: BBox) -> List[np.ndarray]:
+    """
+    Отсечение ломаной прямоугольником (алгоритм Лианга-Барски).
+
+    Все отрезки отсекаются одновременно, подряд идущие видимые отрезки
+    склеиваются в куски. Возвращает список кусков. Дополнительные
+    столбцы точек (например, высоты) интерполируются вдоль отрезков.
+    """
+
+    points = _as_points(points)
+    if len(points) < 2:
+        return [points] if len(points) and _inside(points, bbox).all() else []
+
+    x_min, y_min, x_max, y_max = bbox
+    start, end = points[:-1], points[1:]
+    delta = end - start
+
+    # p * t <= q для каждой из четырёх границ
+    p = np.stack([-delta[:, 0], delta[:, 0], -delta[:, 1], delta[:, 1]], axis=1)
+    q = np.stack([start[:, 0] - x_min, x_max - start[:, 0], start[:, 1] - y_min, y_max - start[:, 1]], axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = q / p
+    parallel = p == 0
+    entering = (p < 0) & ~parallel
+    leaving = (p > 0) & ~parallel
+
+    t0 = np.max(np.where(entering, t, 0.0), axis=1)
+    t1 = np.min(np.where(leaving, t, 1.0), axis=1)
+    outside = (parallel & (q < 0)).any(axis=1)
+    visible = np.flatnonzero((t0 <= t1) & ~outside)
+    if not len(visible):
+        return []
+
+    t0, t1 = t0[visible], t1[visible]
+    clipped_start = start[visible] + delta[visible] * t0[:, None]
+    clipped_end = start[visible] + delta[visible] * t1[:, None]
+
+    # новый кусок начинается, если предыдущий видимый отрезок не примыкает к текущему
+    continues = np.zeros(len(visible), dtype=bool)
+    continues[1:] = (np.diff(visible) == 1) & (t1[:-1] == 1.0) & (t0[1:] == 0.0)
+    piece_start = ~continues
+
+    # точки: начало каждого куска и концы всех отрезков
+    emit = np.stack([clipped_start, clipped_end], axis=1)
+    mask = np.stack([piece_start, np.ones(len(visible), dtype=bool)], axis=1)
+    result = emit[mask]
+
+    bounds = np.flatnonzero(piece_start) + np.arange(piece_start.sum())
+    return [piece for piece in np.split(result, bounds[1:]) if len(piece)]
+
+
+def _as_points(points) -> np.ndarray:
+    points = np.asarray(points, dtype=np.float64)
+    return points.reshape(-1, points.shape[1] if points.ndim == 2 else 2)
+
+
+def _inside(points: np.ndarray, bbox: BBox) -> np.ndarray:
+    x_min, y_min, x_max, y_max = bbox
+    return (points[:, 0] >= x_min) & (points[:, 0] <= x_max) & (points[:, 1] >= y_min) & (points[:, 1] <= y_max)
+
+
+def clip_ring(points, bbox: BBox) -> np.ndarray:
+    """
+    Отсечение контура прямоугольником (алгоритм Сазерленда-Ходжмана).
+
+    Для каждой из четырёх границ все вершины обрабатываются одновременно.
+    Возвращает замкнутый контур или пустой массив. Дополнительные
+    столбцы точек интерполируются в точках пересечения.
+    """
+
+    ring = _as_points(points)
+    if len(ring) > 1 and np.array_equal(ring[0, :2], ring[-1, :2]):
+        ring = ring[:-1]
+
+    x_min, y_min, x_max, y_max = bbox
+    # (ось, граница, знак): точка внутри, если знак * (координата - граница) >= 0
+    edges = ((0, x_min, 1.0), (0, x_max, -1.0), (1, y_min, 1.0), (1, y_max, -1.0))
+
+    for axis, bound, sign in edges:
+        if len(ring) == 0:
+            break
+
+        previous = np.roll(ring, 1, axis=0)
+        distance = sign * (ring[:, axis] - bound)
+        previous_distance = sign * (previous[:, axis] - bound)
+        inside = distance >= 0
+        crossing = inside != (previous_distance >= 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(crossing, previous_distance / (previous_distance - distance), 0.0)
+        intersection = previous + (ring - previous) * t[:, None]
+
+        # для каждой вершины: точка пересечения входящего ребра, затем сама вершина
+        emit = np.stack([intersection, ring], axis=1)
+        mask = np.stack([crossing, inside], axis=1)
+        ring = emit[mask]
+
+    if len(ring) < 3:
+        return np.empty((0, ring.shape[1]))
+    return np.vstack([ring, ring[:1]])
+
+
+def _parts(obj: SXFObject) -> List[np.ndarray]:
+    """
+    Части метрики объекта; у трёхмерной метрики третий столбец - высоты.
+    """
+
+    parts = [_as_points(part) for part in object_parts(obj)]
+    if obj.is_3d:
+        parts = [np.column_stack((part, np.asarray(heights, dtype=np.float64)))
+                 for part, heights in zip(parts, obj.heights)]
+    return parts
+
+
+def _with_geometry(obj: SXFObject, points, subitems: Sequence = ()) -> SXFObject:
+    """
+    Копия объекта с заменённой метрикой; заголовок и семантика сохраняются.
+
+    Копия не соответствует записи исходного листа: её смещение и длины
+    обнуляются (длины вычисляются при записи).
+    """
+
+    clipped = copy.copy(obj)
+    clipped.offset = clipped.full_len = clipped.metrics_len = 0
+    # части метрики изменились, резервные слова подобъектов не переносятся
+    clipped.subitem_words = b''
+    parts = [np.asarray(part) for part in [points, *subitems]]
+    if obj.is_3d:
+        is_integer = obj.data_type in ('<H', '<i')
+        clipped.heights = [array(obj.data_type[1], np.rint(part[:, 2]).astype(int).tolist() if is_integer
+                                 else part[:, 2].tolist()) for part in parts]
+    clipped.points = [tuple(point) for point in parts[0][:, :2].tolist()]
+    clipped.subitems = [[tuple(point) for point in part[:, :2].tolist()] for part in parts[1:]]
+    clipped.subitems_count = len(subitems)
+
+    counts = [len(clipped.points)] + [len(part) for part in clipped.subitems]
+    is_big = counts[0] >= 65535 or any(count > 65535 for count in counts[1:])
+    clipped.points_count = 65535 if is_big else counts[0]
+    clipped.big_points_count = counts[0] if is_big else 0
+    return clipped
+
+
+def clip_objects(objects: Sequence[SXFObject],
+                 bbox: BBox,
+                 object_bboxes: Optional[np.ndarray] = None) -> List[SXFObject]:
+    """
+    Отсечение объектов прямоугольником.
+
+    Объекты, габариты которых целиком внутри или снаружи, принимаются
+    или отбрасываются без обработки геометрии; отсекаются только
+    пересекающие границу. Линии распадаются на отдельные объекты
+    по кускам, у площадей отсекается внешний контур и дыры. Точечные
+    объекты, подписи и шаблоны сохраняются, если их первая точка внутри.
+    """
+
+    if object_bboxes is None:
+        object_bboxes = bboxes(GeometryArrays.from_columns(SheetColumns.from_objects(objects)))
+
+    x_min, y_min, x_max, y_max = bbox
+    with np.errstate(invalid='ignore'):
+        disjoint = ((object_bboxes[:, 0] > x_max) | (object_bboxes[:, 2] < x_min) |
+                    (object_bboxes[:, 1] > y_max) | (object_bboxes[:, 3] < y_min))
+        contained = ((object_bboxes[:, 0] >= x_min) & (object_bboxes[:, 2] <= x_max) &
+                     (object_bboxes[:, 1] >= y_min) & (object_bboxes[:, 3] <= y_max))
+
+    result = []
+    for index in np.flatnonzero(~disjoint):
+        obj = objects[index]
+        if contained[index]:
+            result.append(obj)
+            continue
+
+        parts = _parts(obj)
+        if obj.type == ObjectType.LINE:
+            for part in parts:
+                result.extend(_with_geometry(obj, piece) for piece in clip_line(part, bbox))
+        elif obj.type == ObjectType.AREA:
+            outer = clip_ring(parts[0], bbox)
+            if len(outer):
+                holes = [hole for hole in (clip_ring(part, bbox) for part in parts[1:]) if len(hole)]
+                result.append(_with_geometry(obj, outer, holes))
+        elif obj.points and _inside(np.asarray(obj.points[:1], dtype=np.float64), bbox).all():
+            result.append(obj)
+
+    return result
+
+
+def clip_sheet(sxf, bbox: BBox):
+    """
+    Вырезание области листа в новый лист в памяти.
+
+    Паспорт, заголовки и семантика объектов сохраняются, число записей
+    соответствует результату. Лист можно записать через `SXFWriter.like`.
+    """
+
+    columns = getattr(sxf, 'columns', None)
+    if columns is None:
+        columns = SheetColumns.from_objects(sxf.objects)
+    object_bboxes = bboxes(GeometryArrays.from_columns(columns))
+
+    clipped = copy.copy(sxf)
+    clipped.__dict__.pop('columns', None)
+    clipped.objects = clip_objects(sxf.objects, bbox, object_bboxes)
+    clipped.records_count = len(clipped.objects)
+    return clipped
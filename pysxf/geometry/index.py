@@ -0,0 +1,171 @@
+import math
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+BBox = Tuple[float, float, float, float]
+
+
+def bbox_distance(object_bboxes: np.ndarray, x: float, y: float) -> np.ndarray:
+    """
+    Расстояние от точки до габаритных прямоугольников (0 - точка внутри).
+    """
+
+    dx = np.maximum(np.maximum(object_bboxes[:, 0] - x, x - object_bboxes[:, 2]), 0.0)
+    dy = np.maximum(np.maximum(object_bboxes[:, 1] - y, y - object_bboxes[:, 3]), 0.0)
+    return np.hypot(dx, dy)
+
+
+class GridIndex:
+    """
+    Равномерная сетка по габаритам объектов.
+
+    Каждый объект регистрируется во всех ячейках, которые пересекает
+    его габаритный прямоугольник. Списки объектов ячеек хранятся
+    в сжатом виде: `cell_starts` - границы списков в `cell_objects`.
+    Объекты без точек в индекс не попадают.
+    """
+
+    def __init__(self, object_bboxes: np.ndarray, cell_size: Optional[float] = None):
+        self.bboxes = np.asarray(object_bboxes, dtype=np.float64)
+        valid = np.flatnonzero(~np.isnan(self.bboxes[:, 0]))
+
+        if len(valid):
+            x_min, y_min = self.bboxes[valid, :2].min(axis=0)
+            x_max, y_max = self.bboxes[valid, 2:].max(axis=0)
+        else:
+            x_min = y_min = x_max = y_max = 0.0
+        width, height = x_max - x_min, y_max - y_min
+
+        if cell_size is None:
+            # в среднем около одного объекта на ячейку
+            cell_size = math.sqrt(width * height / max(len(valid), 1)) or max(width, height) or 1.0
+        self.cell_size = float(cell_size)
+        self.origin = (float(x_min), float(y_min))
+        self.shape = (int(width // self.cell_size) + 1, int(height // self.cell_size) + 1)
+
+        nx, ny = self.shape
+        x0, y0, x1, y1 = (self.__cell(self.bboxes[valid, i], i % 2) for i in range(4))
+        counts_x, counts_y = x1 - x0 + 1, y1 - y0 + 1
+        counts = counts_x * counts_y
+
+        # развёртка объектов по ячейкам: номер ячейки внутри прямоугольника объекта
+        objects = np.repeat(valid, counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = np.repeat(x0, counts) + local % np.repeat(counts_x, counts)
+        cy = np.repeat(y0, counts) + local // np.repeat(counts_x, counts)
+        cells = cy * nx + cx
+
+        order = np.argsort(cells, kind='stable')
+        self.cell_objects = objects[order]
+        self.cell_starts = np.zeros(nx * ny + 1, dtype=np.intp)
+        np.cumsum(np.bincount(cells, minlength=nx * ny), out=self.cell_starts[1:])
+
+    def __cell(self, values, axis: int) -> np.ndarray:
+        cells = np.floor((np.asarray(values) - self.origin[axis]) / self.cell_size).astype(np.intp)
+        return np.clip(cells, 0, self.shape[axis] - 1)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bboxes.nbytes + self.cell_objects.nbytes + self.cell_starts.nbytes
+
+    def __block(self, ix0: int, iy0: int, ix1: int, iy1: int) -> np.ndarray:
+        """
+        Объекты ячеек прямоугольного блока (без повторов).
+        """
+
+        nx = self.shape[0]
+        cells = (np.arange(iy0, iy1 + 1)[:, None] * nx + np.arange(ix0, ix1 + 1)[None, :]).ravel()
+        starts, ends = self.cell_starts[cells], self.cell_starts[cells + 1]
+        lengths = ends - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.unique(self.cell_objects[positions])
+
+    def query(self, bbox: BBox) -> np.ndarray:
+        """
+        Номера объектов, габариты которых пересекают `bbox`.
+        """
+
+        x_min, y_min, x_max, y_max = bbox
+        origin_x, origin_y = self.origin
+        nx, ny = self.shape
+        if x_max < origin_x or y_max < origin_y or \
+                x_min > origin_x + nx * self.cell_size or y_min > origin_y + ny * self.cell_size:
+            return np.empty(0, dtype=np.intp)
+
+        ix0, ix1 = self.__cell([x_min, x_max], 0)
+        iy0, iy1 = self.__cell([y_min, y_max], 1)
+        candidates = self.__block(ix0, iy0, ix1, iy1)
+
+        found = self.bboxes[candidates]
+        hits = (found[:, 0] <= x_max) & (found[:, 2] >= x_min) & (found[:, 1] <= y_max) & (found[:, 3] >= y_min)
+        return candidates[hits]
+
+    @staticmethod
+    def __exact(candidates: np.ndarray,
+                lower: np.ndarray,
+                k: int,
+                distance: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Точные расстояния только для кандидатов, которые могут войти в `k`
+        ближайших: расстояние до габаритов - нижняя граница точного.
+        """
+
+        order = np.argsort(lower, kind='stable')
+        bound = distance(candidates[order[:k]]).max() if len(order) >= k else np.inf
+        selected = order[lower[order] <= bound]
+
+        result = np.full(len(candidates), np.inf)
+        result[selected] = distance(candidates[selected])
+        return result
+
+    def nearest(self,
+                x: float,
+                y: float,
+                k: int = 1,
+                distance: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `k` ближайших к точке объектов и расстояния до них.
+
+        По умолчанию расстояние считается до габаритного прямоугольника,
+        `distance` позволяет задать точное расстояние для номеров
+        объектов-кандидатов (оно не должно быть меньше расстояния
+        до габаритов). Блок просматриваемых ячеек расширяется, пока
+        k-е расстояние не окажется внутри него.
+
+        `mask` - маска допустимых объектов: остальные отбрасываются
+        до отбора кандидатов и в `k` не засчитываются.
+        """
+
+        if k < 1:
+            raise ValueError('Number of nearest objects must be positive!')
+
+        nx, ny = self.shape
+        origin_x, origin_y = self.origin
+        cx = int(math.floor((x - origin_x) / self.cell_size))
+        cy = int(math.floor((y - origin_y) / self.cell_size))
+
+        radius = 0
+        while True:
+            ix0, iy0, ix1, iy1 = cx - radius, cy - radius, cx + radius, cy + radius
+            covers_all = ix0 <= 0 and iy0 <= 0 and ix1 >= nx - 1 and iy1 >= ny - 1
+
+            candidates = self.__block(max(ix0, 0), max(iy0, 0), min(ix1, nx - 1), min(iy1, ny - 1)) \
+                if ix1 >= 0 and iy1 >= 0 and ix0 < nx and iy0 < ny else np.empty(0, dtype=np.intp)
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+
+            if len(candidates) >= k or covers_all:
+                distances = bbox_distance(self.bboxes[candidates], x, y)
+                if distance is not None:
+                    distances = self.__exact(candidates, distances, k, distance)
+                order = np.argsort(distances, kind='stable')[:k]
+
+                # объекты вне блока не ближе, чем расстояние до его границы
+                reach = min(x - (origin_x + ix0 * self.cell_size), origin_x + (ix1 + 1) * self.cell_size - x,
+                            y - (origin_y + iy0 * self.cell_size), origin_y + (iy1 + 1) * self.cell_size - y)
+                if covers_all or (len(order) == k and distances[order[-1]] <= reach):
+                    return candidates[order], distances[order]
+
+            radius = max(1, radius * 2)
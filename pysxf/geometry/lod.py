@@ -0,0 +1,164 @@
+import bisect
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from pysxf.sxf.columns import SheetColumns
+from pysxf.sxf.sxf_object import ObjectType, SXFObject
+from .metrics import GeometryArrays, bboxes
+from .simplify import douglas_peucker_mask, ensure_min_points
+
+# масштабный ряд: индекс уровня генерализации -> знаменатель масштаба
+SCALE_ROW = (
+    500, 1000, 2000, 5000, 10000, 25000, 50000, 100000,
+    200000, 500000, 1000000, 2000000, 5000000, 10000000, 20000000
+)
+
+# уровень генерализации без ограничения
+NO_LEVEL = 15
+
+# размер пикселя устройства вывода (в метрах)
+PIXEL_SIZE = 0.00028
+
+
+def is_visible(obj: SXFObject, scale: int) -> bool:
+    """
+    Проверка видимости объекта в масштабе 1:`scale` по уровням генерализации.
+
+    Верхняя граница - самый мелкий масштаб, в котором объект ещё
+    отображается, нижняя - самый крупный; значение 15 снимает ограничение.
+    """
+
+    upper, lower = obj.general_levels
+    if upper != NO_LEVEL and scale > SCALE_ROW[upper]:
+        return False
+    if lower != NO_LEVEL and scale < SCALE_ROW[lower]:
+        return False
+    return True
+
+
+def object_parts(obj: SXFObject) -> List[Sequence]:
+    """
+    Части геометрии объекта: метрика и метрики подобъектов.
+    """
+
+    parts = [obj.points]
+    if obj.subitems_count:
+        if obj.type in (ObjectType.LABEL, ObjectType.TEMPLATE):
+            parts.extend(item['points'] for item in obj.text_subitems)
+        else:
+            parts.extend(obj.subitems)
+    return parts
+
+
+class Geometry(NamedTuple):
+    obj: SXFObject
+    parts: List[np.ndarray]
+
+
+class LODLevel(NamedTuple):
+    scale: int
+    tolerance: float
+    # маска сохраняемых точек в общем буфере координат
+    keep: np.ndarray
+
+    @property
+    def points_count(self) -> int:
+        return int(self.keep.sum())
+
+
+class LODPyramid:
+    """
+    Пирамида упрощённой геометрии листа по масштабам.
+
+    Координаты всех объектов хранятся в одном буфере, уровень пирамиды -
+    маска сохраняемых точек. Для каждого масштаба из `scales` линии
+    и контуры площадей упрощаются с допуском в один пиксель устройства
+    вывода; точечные объекты и подписи не упрощаются.
+    """
+
+    def __init__(self,
+                 objects: Sequence[SXFObject],
+                 scales: Sequence[int],
+                 units_per_metre: float = 1.0,
+                 pixel_size: float = PIXEL_SIZE):
+        self.objects = list(objects)
+        self.units_per_metre = units_per_metre
+        self.pixel_size = pixel_size
+
+        geometry = GeometryArrays.from_columns(SheetColumns.from_objects(self.objects))
+
+        # границы частей в буфере координат и частей каждого объекта
+        self.coords = geometry.coords
+        self.part_offsets = geometry.part_offsets
+        self.object_parts = geometry.object_parts
+        self.bbox = bboxes(geometry)
+
+        part_types = geometry.types[geometry.part_object()]
+
+        # упрощаются только линии и площади, у контуров площадей остаётся не меньше 4 точек
+        simplified = np.isin(part_types, (ObjectType.LINE, ObjectType.AREA))
+        fixed = np.repeat(~simplified, np.diff(self.part_offsets))
+        min_points = np.where(part_types == ObjectType.AREA, 4, 2)
+
+        self.levels: List[LODLevel] = []
+        for scale in sorted(scales):
+            tolerance = self.tolerance(scale)
+            keep = douglas_peucker_mask(self.coords, tolerance, self.part_offsets)
+            keep |= fixed
+            keep = ensure_min_points(keep, self.part_offsets, min_points)
+            self.levels.append(LODLevel(scale, tolerance, keep))
+
+    @classmethod
+    def from_sxf(cls, sxf, factors: Sequence[int] = (2, 4, 8, 16, 32), **kwargs) -> 'LODPyramid':
+        """
+        Пирамида для прочитанного листа с масштабами, кратными масштабу листа.
+        """
+
+        return cls(sxf.objects, [sxf.scale * factor for factor in factors], **kwargs)
+
+    def tolerance(self, scale: int) -> float:
+        """
+        Допуск упрощения (в единицах координат) для масштаба 1:`scale`.
+        """
+
+        return scale * self.pixel_size * self.units_per_metre
+
+    def level(self, scale: int) -> Optional[LODLevel]:
+        """
+        Самый грубый уровень, масштаб которого не мельче запрошенного.
+        """
+
+        index = bisect.bisect_right([level.scale for level in self.levels], scale)
+        return self.levels[index - 1] if index else None
+
+    def parts(self, index: int, level: Optional[LODLevel] = None) -> List[np.ndarray]:
+        """
+        Части геометрии объекта с номером `index` на уровне `level`.
+        """
+
+        result = []
+        for part in range(self.object_parts[index], self.object_parts[index + 1]):
+            start, end = self.part_offsets[part], self.part_offsets[part + 1]
+            coords = self.coords[start:end]
+            if level is not None:
+                coords = coords[level.keep[start:end]]
+            result.append(coords)
+        return result
+
+    def geometry(self, scale: int, min_pixels: float = 0.0) -> Iterator[Geometry]:
+        """
+        Геометрия объектов, видимых в масштабе 1:`scale`.
+
+        Объекты, габарит которых меньше `min_pixels` пикселей устройства
+        вывода, пропускаются.
+        """
+
+        level = self.level(scale)
+
+        size = np.fmax(self.bbox[:, 2] - self.bbox[:, 0], self.bbox[:, 3] - self.bbox[:, 1])
+        large = ~(size < min_pixels * self.tolerance(scale))
+
+        for index, obj in enumerate(self.objects):
+            if large[index] and is_visible(obj, scale):
+                yield Geometry(obj, self.parts(index, level))
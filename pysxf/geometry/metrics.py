@@ -0,0 +1,185 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from pysxf.sxf.columns import SheetColumns
+from pysxf.sxf.sxf_object import ObjectType
+
+
+class GeometryArrays(NamedTuple):
+    """
+    Геометрия листа в виде массивов NumPy.
+
+    `coords` - координаты (N, 2), `part_offsets` - границы частей
+    в `coords`, `object_parts` - границы частей объектов в `part_offsets`.
+    """
+
+    coords: np.ndarray
+    part_offsets: np.ndarray
+    object_parts: np.ndarray
+    types: np.ndarray
+
+    @classmethod
+    def from_columns(cls, columns: SheetColumns) -> 'GeometryArrays':
+        """
+        Представление колонок листа без копирования координат.
+        """
+
+        return cls(
+            np.frombuffer(columns.coords, dtype=np.float64).reshape(-1, 2),
+            np.frombuffer(columns.part_offsets, dtype=np.uint64).astype(np.intp),
+            np.frombuffer(columns.object_parts, dtype=np.uint64).astype(np.intp),
+            np.frombuffer(columns.type, dtype=np.uint8)
+        )
+
+    @property
+    def objects_count(self) -> int:
+        return len(self.object_parts) - 1
+
+    def part_object(self) -> np.ndarray:
+        """
+        Номер объекта для каждой части.
+        """
+
+        return np.repeat(np.arange(self.objects_count), np.diff(self.object_parts))
+
+    def point_part(self) -> np.ndarray:
+        """
+        Номер части для каждой точки.
+        """
+
+        return np.repeat(np.arange(len(self.part_offsets) - 1), np.diff(self.part_offsets))
+
+
+class GeometryMetrics(NamedTuple):
+    # (x_min, y_min, x_max, y_max), NaN для объектов без точек
+    bbox: np.ndarray
+    # длина линий и периметр площадей
+    length: np.ndarray
+    # площадь площадных объектов за вычетом подобъектов-дыр
+    area: np.ndarray
+    centroid: np.ndarray
+
+
+def bboxes(geometry: GeometryArrays) -> np.ndarray:
+    """
+    Габаритные прямоугольники объектов.
+    """
+
+    count = geometry.objects_count
+    result = np.full((count, 4), np.nan)
+
+    starts = geometry.part_offsets[geometry.object_parts]
+    nonempty = np.flatnonzero(starts[1:] > starts[:-1])
+    if len(nonempty):
+        # пустые объекты не занимают точек, поэтому отрезок от начала
+        # непустого объекта до начала следующего непустого - ровно его точки
+        result[nonempty, :2] = np.minimum.reduceat(geometry.coords, starts[nonempty], axis=0)
+        result[nonempty, 2:] = np.maximum.reduceat(geometry.coords, starts[nonempty], axis=0)
+    return result
+
+
+def _segments(geometry: GeometryArrays):
+    """
+    Отрезки всех частей, включая замыкающий отрезок каждой части.
+
+    Возвращает начала и концы отрезков и номера частей.
+    """
+
+    coords = geometry.coords
+    offsets = geometry.part_offsets
+    lengths = np.diff(offsets)
+
+    point_part = geometry.point_part()
+    # следующая точка в пределах части; для последней - первая точка части
+    following = np.arange(1, len(coords) + 1)
+    nonempty = lengths > 0
+    following[offsets[1:][nonempty] - 1] = offsets[:-1][nonempty]
+    return coords, coords[following] if len(coords) else coords, point_part
+
+
+def metrics(geometry: GeometryArrays) -> GeometryMetrics:
+    """
+    Габариты, длины, площади и центры тяжести всех объектов листа
+    за несколько векторных проходов.
+
+    Для линий центр - середина, взвешенная по длинам отрезков, для
+    площадей - центр тяжести внешнего контура за вычетом дыр, для
+    остальных типов - среднее точек.
+    """
+
+    count = geometry.objects_count
+    parts_count = len(geometry.part_offsets) - 1
+    part_object = geometry.part_object()
+    types = geometry.types
+    is_line = types == ObjectType.LINE
+    is_area = types == ObjectType.AREA
+
+    start, end, point_part = _segments(geometry)
+    point_object = part_object[point_part]
+
+    # замыкающие отрезки учитываются только у площадей
+    is_closing = np.zeros(len(start), dtype=bool)
+    part_lengths = np.diff(geometry.part_offsets)
+    is_closing[geometry.part_offsets[1:][part_lengths > 0] - 1] = True
+    open_segment = ~is_closing | is_area[point_object]
+
+    delta = end - start
+    segment_len = np.hypot(delta[:, 0], delta[:, 1]) * open_segment
+    length = np.bincount(point_object, weights=segment_len, minlength=count)
+
+    # площади и центры тяжести колец по формуле Гаусса
+    cross = start[:, 0] * end[:, 1] - end[:, 0] * start[:, 1]
+    ring_area2 = np.bincount(point_part, weights=cross, minlength=parts_count)
+    ring_cx = np.bincount(point_part, weights=(start[:, 0] + end[:, 0]) * cross, minlength=parts_count)
+    ring_cy = np.bincount(point_part, weights=(start[:, 1] + end[:, 1]) * cross, minlength=parts_count)
+
+    ring_abs = np.abs(ring_area2) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ring_centroid = np.stack([ring_cx, ring_cy], axis=1) / (3 * ring_area2[:, None])
+
+    # первая часть объекта - внешний контур, остальные - дыры
+    is_outer = np.zeros(parts_count, dtype=bool)
+    is_outer[geometry.object_parts[:-1][np.diff(geometry.object_parts) > 0]] = True
+    sign = np.where(is_outer, 1.0, -1.0)
+    weighted = np.nan_to_num(ring_centroid) * (ring_abs * sign)[:, None]
+
+    area = np.bincount(part_object, weights=ring_abs * sign, minlength=count) * is_area
+    area_centroid = np.stack([
+        np.bincount(part_object, weights=weighted[:, 0], minlength=count),
+        np.bincount(part_object, weights=weighted[:, 1], minlength=count)
+    ], axis=1)
+
+    # центры линий - середины отрезков, взвешенные по длине
+    middle = (start + end) / 2 * segment_len[:, None]
+    line_centroid = np.stack([
+        np.bincount(point_object, weights=middle[:, 0], minlength=count),
+        np.bincount(point_object, weights=middle[:, 1], minlength=count)
+    ], axis=1)
+
+    points_count = np.bincount(point_object, minlength=count)
+    mean = np.stack([
+        np.bincount(point_object, weights=geometry.coords[:, 0], minlength=count),
+        np.bincount(point_object, weights=geometry.coords[:, 1], minlength=count)
+    ], axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean /= points_count[:, None]
+        area_centroid /= area[:, None]
+        line_centroid /= length[:, None]
+
+    centroid = mean
+    use_area = is_area & (area > 0)
+    use_line = is_line & (length > 0)
+    centroid[use_area] = area_centroid[use_area]
+    centroid[use_line] = line_centroid[use_line]
+
+    return GeometryMetrics(bboxes(geometry), length, area, centroid)
+
+
+def columns_metrics(columns: SheetColumns) -> GeometryMetrics:
+    """
+    Метрики всех объектов по колонкам листа.
+    """
+
+    return metrics(GeometryArrays.from_columns(columns))
@@ -0,0 +1,127 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from pysxf.sxf.sxf_object import ObjectType
+from .index import GridIndex
+from .metrics import GeometryArrays, bboxes
+
+
+class SpatialQuery:
+    """
+    Поиск ближайших объектов и площадей, содержащих точку.
+
+    Кандидаты отбираются по сеточному индексу, точные расстояния
+    до отрезков и принадлежность точки площади считаются векторно
+    по координатам кандидатов. Подобъекты площадей считаются дырами.
+    """
+
+    def __init__(self, geometry: GeometryArrays, index: Optional[GridIndex] = None):
+        self.geometry = geometry
+        self.index = index if index is not None else GridIndex(bboxes(geometry))
+
+        offsets = geometry.part_offsets
+        lengths = np.diff(offsets)
+        nonempty = lengths > 0
+        point_object = geometry.part_object()[geometry.point_part()]
+
+        # следующая точка части; у последней - первая точка части (замыкание контура)
+        self.__following = np.arange(1, len(geometry.coords) + 1)
+        self.__following[offsets[1:][nonempty] - 1] = offsets[:-1][nonempty]
+        # замыкающий отрезок есть только у площадей
+        self.__closed = np.ones(len(geometry.coords), dtype=bool)
+        last = offsets[1:][nonempty] - 1
+        self.__closed[last] = geometry.types[point_object[last]] == ObjectType.AREA
+
+    def __points(self, objects: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Номера точек объектов, номер объекта в `objects` для каждой
+        точки и число точек объектов.
+        """
+
+        geometry = self.geometry
+        starts = geometry.part_offsets[geometry.object_parts[objects]]
+        ends = geometry.part_offsets[geometry.object_parts[objects + 1]]
+        lengths = ends - starts
+        points = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        labels = np.repeat(np.arange(len(objects)), lengths)
+        return points, labels, lengths
+
+    def __segments(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        start = self.geometry.coords[points]
+        # незамкнутые концы линий вырождаются в точку
+        end = self.geometry.coords[np.where(self.__closed[points], self.__following[points], points)]
+        return start, end
+
+    def __inside(self, objects, labels, start, end, x: float, y: float) -> np.ndarray:
+        straddles = (start[:, 1] > y) != (end[:, 1] > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cross_x = start[:, 0] + (y - start[:, 1]) * (end[:, 0] - start[:, 0]) / (end[:, 1] - start[:, 1])
+        crossings = np.bincount(labels, weights=straddles & (x < cross_x), minlength=len(objects))
+
+        is_area = self.geometry.types[objects] == ObjectType.AREA
+        return is_area & (crossings % 2 == 1)
+
+    def contains(self, objects: np.ndarray, x: float, y: float) -> np.ndarray:
+        """
+        Маска площадных объектов из `objects`, содержащих точку.
+
+        Используется правило чётности пересечений по всем контурам
+        объекта, поэтому точки в дырах не принадлежат объекту.
+        """
+
+        objects = np.asarray(objects, dtype=np.intp)
+        points, labels, _ = self.__points(objects)
+        start, end = self.__segments(points)
+        return self.__inside(objects, labels, start, end, x, y)
+
+    def distance(self, objects: np.ndarray, x: float, y: float) -> np.ndarray:
+        """
+        Расстояния от точки до объектов (0 - точка внутри площади).
+        """
+
+        objects = np.asarray(objects, dtype=np.intp)
+        result = np.full(len(objects), np.inf)
+        points, labels, lengths = self.__points(objects)
+        if not len(points):
+            return result
+
+        start, end = self.__segments(points)
+        delta = end - start
+        squared = (delta ** 2).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.clip(((x - start[:, 0]) * delta[:, 0] + (y - start[:, 1]) * delta[:, 1]) / squared, 0.0, 1.0)
+        t[squared == 0] = 0.0
+        nearest = start + delta * t[:, None]
+        segment_distance = np.hypot(nearest[:, 0] - x, nearest[:, 1] - y)
+
+        nonempty = np.flatnonzero(lengths)
+        group_starts = (np.cumsum(lengths) - lengths)[nonempty]
+        result[nonempty] = np.minimum.reduceat(segment_distance, group_starts)
+
+        result[self.__inside(objects, labels, start, end, x, y)] = 0.0
+        return result
+
+    def nearest(self,
+                x: float,
+                y: float,
+                k: int = 1,
+                mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `k` ближайших к точке объектов и расстояния до них.
+
+        `mask` - необязательная маска допустимых объектов (например,
+        по классификационному коду или типу).
+        """
+
+        indices, distances = self.index.nearest(x, y, k, lambda candidates: self.distance(candidates, x, y), mask)
+        found = np.isfinite(distances)
+        return indices[found], distances[found]
+
+    def containing(self, x: float, y: float) -> np.ndarray:
+        """
+        Площадные объекты, содержащие точку.
+        """
+
+        candidates = self.index.query((x, y, x, y))
+        return candidates[self.contains(candidates, x, y)]
@@ -0,0 +1,105 @@
+from typing import Optional
+
+import numpy as np
+
+
+def _segment_distance(points: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Расстояния от точек до соответствующих отрезков [a, b].
+    """
+
+    ab = b - a
+    ap = points - a
+    length2 = np.einsum('ij,ij->i', ab, ab)
+    t = np.einsum('ij,ij->i', ap, ab) / np.where(length2 > 0, length2, 1.0)
+    t = np.clip(t, 0.0, 1.0)
+    nearest = a + ab * t[:, None]
+    return np.hypot(points[:, 0] - nearest[:, 0], points[:, 1] - nearest[:, 1])
+
+
+def douglas_peucker_mask(points: np.ndarray,
+                         tolerance: float,
+                         offsets: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Маска точек, сохраняемых упрощением Дугласа-Пекера.
+
+    Все отрезки текущего приближения разбиваются одновременно: за один
+    проход по массиву считаются расстояния всех точек до своих отрезков,
+    поэтому число проходов растёт как глубина рекурсии, а не как число точек.
+    Если заданы границы частей `offsets`, в одном буфере упрощается
+    сразу множество линий, концы которых всегда сохраняются.
+    """
+
+    count = len(points)
+    if offsets is None:
+        offsets = np.array([0, count])
+    offsets = np.asarray(offsets, dtype=np.intp)
+
+    keep = np.zeros(count, dtype=bool)
+    if count == 0:
+        return keep
+
+    starts, ends = offsets[:-1], offsets[1:] - 1
+    nonempty = ends >= starts
+    keep[starts[nonempty]] = True
+    keep[ends[nonempty]] = True
+    if tolerance <= 0:
+        keep[:] = True
+        return keep
+
+    indices = np.arange(count)
+
+    while True:
+        kept = np.flatnonzero(keep)
+        if len(kept) < 2:
+            return keep
+        segment = np.minimum(np.searchsorted(kept, indices, side='right') - 1, len(kept) - 2)
+
+        distance = _segment_distance(points, points[kept[segment]], points[kept[segment + 1]])
+        distance[keep] = 0.0
+
+        segment_max = np.maximum.reduceat(distance, kept[:-1])
+        split = segment_max > tolerance
+        if not split.any():
+            return keep
+
+        # самая удалённая точка каждого разбиваемого отрезка
+        candidates = np.flatnonzero((distance == segment_max[segment]) & split[segment])
+        _, first = np.unique(segment[candidates], return_index=True)
+        keep[candidates[first]] = True
+
+
+def ensure_min_points(keep: np.ndarray, offsets: np.ndarray, min_points: np.ndarray) -> np.ndarray:
+    """
+    Дополнение маски точками, выбранными равномерно, в частях,
+    где после упрощения осталось меньше `min_points` точек.
+    """
+
+    offsets = np.asarray(offsets, dtype=np.intp)
+    lengths = np.diff(offsets)
+    cumulative = np.concatenate(([0], np.cumsum(keep)))
+    kept = cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+
+    for part in np.flatnonzero((kept < min_points) & (lengths > kept)):
+        start, length = offsets[part], lengths[part]
+        count = min(int(min_points[part]), length)
+        keep[start + np.linspace(0, length - 1, count).round().astype(np.intp)] = True
+    return keep
+
+
+def douglas_peucker(points, tolerance: float, min_points: int = 2) -> np.ndarray:
+    """
+    Упрощение линии алгоритмом Дугласа-Пекера.
+
+    Если после упрощения остаётся меньше `min_points` точек (например,
+    у замкнутого контура), точки выбираются равномерно.
+    """
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) <= min_points:
+        return points
+
+    keep = douglas_peucker_mask(points, tolerance)
+    if keep.sum() < min_points:
+        return points[np.linspace(0, len(points) - 1, min_points).round().astype(np.intp)]
+    return points[keep]
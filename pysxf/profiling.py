@@ -0,0 +1,222 @@
+import functools
+import heapq
+import inspect
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, DefaultDict, Dict, Iterator, List, Optional, Tuple
+
+# сессия профилирования текущего контекста (потока или задачи asyncio), None - выключено
+_current: ContextVar[Optional['ParseStats']] = ContextVar('pysxf_profiling', default=None)
+
+
+def current() -> Optional['ParseStats']:
+    """
+    Сессия профилирования текущего контекста.
+    """
+
+    return _current.get()
+
+
+class ParseStats:
+    """
+    Статистика парсинга: время и объём данных по фазам, число записей
+    по типам объектов и самые медленные записи.
+    """
+
+    def __init__(self,
+                 callback: Optional[Callable[['ParseStats'], Any]] = None,
+                 slowest_count: int = 10):
+        self.callback = callback
+        self.slowest_count = slowest_count
+
+        self.phase_time: DefaultDict[str, float] = defaultdict(float)
+        self.phase_calls: DefaultDict[str, int] = defaultdict(int)
+        self.phase_bytes: DefaultDict[str, int] = defaultdict(int)
+        self.records_by_type: Counter = Counter()
+
+        # куча (время, id, group_id, class_code) самых медленных записей
+        self.__slowest: List[Tuple[float, int, int, int]] = []
+        # глубина вложенности операций в каждом контексте
+        self.__depth: ContextVar[int] = ContextVar('pysxf_profiling_depth', default=0)
+
+    @property
+    def bytes_read(self) -> int:
+        return sum(self.phase_bytes.values())
+
+    @property
+    def records_count(self) -> int:
+        return sum(self.records_by_type.values())
+
+    @property
+    def slowest(self) -> List[Tuple[float, int, int, int]]:
+        return sorted(self.__slowest, reverse=True)
+
+    def add_phase(self, phase: str, seconds: float, size: int = 0):
+        self.phase_time[phase] += seconds
+        self.phase_calls[phase] += 1
+        self.phase_bytes[phase] += size
+
+    def add_record(self, obj, seconds: float):
+        self.records_by_type[obj.type] += 1
+        item = (seconds, obj.id, obj.group_id, obj.class_code)
+        if len(self.__slowest) < self.slowest_count:
+            heapq.heappush(self.__slowest, item)
+        elif item > self.__slowest[0]:
+            heapq.heapreplace(self.__slowest, item)
+
+    def add_bytes(self, phase: str, size: int):
+        self.phase_bytes[phase] += size
+
+    def enter(self):
+        self.__depth.set(self.__depth.get() + 1)
+
+    def exit(self):
+        # обратный вызов срабатывает по завершении внешней операции
+        depth = self.__depth.get() - 1
+        self.__depth.set(depth)
+        if depth == 0 and self.callback is not None:
+            self.callback(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Статистика в виде словаря для экспорта в системы метрик.
+        """
+
+        return {
+            'phases': {
+                phase: {
+                    'seconds': self.phase_time[phase],
+                    'calls': self.phase_calls[phase],
+                    'bytes': self.phase_bytes[phase]
+                }
+                for phase in self.phase_time
+            },
+            'bytes_read': self.bytes_read,
+            'records_by_type': {int(type_): count for type_, count in self.records_by_type.items()},
+            'slowest': [
+                {'seconds': seconds, 'id': id_, 'group_id': group_id, 'class_code': class_code}
+                for seconds, id_, group_id, class_code in self.slowest
+            ]
+        }
+
+    def __str__(self) -> str:
+        lines = [f'{"Phase":<24}{"Calls":>10}{"Seconds":>12}{"Bytes":>14}']
+        for phase, seconds in sorted(self.phase_time.items(), key=lambda item: -item[1]):
+            lines.append(f'{phase:<24}{self.phase_calls[phase]:>10}{seconds:>12.4f}{self.phase_bytes[phase]:>14}')
+        lines.append(f'Records by type: {dict(self.records_by_type)}')
+        lines.append(f'Slowest records: {self.slowest}')
+        return '\n'.join(lines)
+
+
+def enable(stats: Optional[ParseStats] = None, **kwargs) -> ParseStats:
+    """
+    Включение профилирования в текущем контексте.
+
+    Сессия действует в текущем потоке или задаче asyncio и наследуется
+    задачами, созданными из них, и функциями, выполняемыми в пуле
+    потоков через `pysxf.aio.run_in_executor`.
+    """
+
+    stats = stats if stats is not None else ParseStats(**kwargs)
+    _current.set(stats)
+    return stats
+
+
+def disable():
+    """
+    Выключение профилирования в текущем контексте.
+    """
+
+    _current.set(None)
+
+
+@contextmanager
+def profile(callback: Optional[Callable[[ParseStats], Any]] = None,
+            slowest_count: int = 10) -> Iterator[ParseStats]:
+    """
+    Профилирование парсинга внутри блока with.
+    """
+
+    token = _current.set(ParseStats(callback=callback, slowest_count=slowest_count))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def add_bytes(phase: str, size: int):
+    """
+    Учёт объёма данных, прочитанных операцией (для фаз `profiled`).
+    """
+
+    stats = _current.get()
+    if stats is not None:
+        stats.add_bytes(phase, size)
+
+
+def profiled(phase: str) -> Callable:
+    """
+    Декоратор для учёта времени операции верхнего уровня.
+
+    Поддерживает обычные и асинхронные функции и асинхронные
+    генераторы (учитывается время от вызова до завершения, включая
+    ожидание). При выключенном профилировании добавляет лишь одну проверку.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                stats = _current.get()
+                if stats is None:
+                    async for item in func(*args, **kwargs):
+                        yield item
+                    return
+
+                stats.enter()
+                start = time.perf_counter()
+                try:
+                    async for item in func(*args, **kwargs):
+                        yield item
+                finally:
+                    stats.add_phase(phase, time.perf_counter() - start)
+                    stats.exit()
+
+            return async_gen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                stats = _current.get()
+                if stats is None:
+                    return await func(*args, **kwargs)
+
+                stats.enter()
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    stats.add_phase(phase, time.perf_counter() - start)
+                    stats.exit()
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stats = _current.get()
+            if stats is None:
+                return func(*args, **kwargs)
+
+            stats.enter()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.add_phase(phase, time.perf_counter() - start)
+                stats.exit()
+
+        return wrapper
+
+    return decorator
@@ -1,8 +1,13 @@
 import datetime
 import logging
+import os
 import struct
+from concurrent.futures import Executor, ProcessPoolExecutor
 from typing import BinaryIO, Dict, List, Optional, Tuple
 
+from pysxf import profiling
+from pysxf.aio import run_in_executor, single_flight
+from pysxf.strings import StringPool
 from .primitives import GparhicPrimitive, code_to_primitive
 from .rsc_object import RSCObject
 
@@ -87,17 +92,23 @@ class RSC:
     palette_colors: int
 
     # объекты
-    objects: Dict[int, List[RSCObject]] = {}
+    objects: Dict[int, List[RSCObject]]
 
     # палитра
-    palette: List[Tuple[int, int, int]] = []
+    palette: List[Tuple[int, int, int]]
     palette_name: str
 
     # параметры экрана
-    display_params: Dict[int, GparhicPrimitive] = {}
+    display_params: Dict[int, GparhicPrimitive]
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, strings: Optional[StringPool] = None):
         self.path = path
+        # пул строк: имена и названия объектов декодируются в str
+        self.strings = strings
+
+        self.objects = {}
+        self.palette = []
+        self.display_params = {}
 
         self.logger = logging.getLogger()
         self.logger.setLevel(logging.INFO)
@@ -251,6 +262,59 @@ class RSC:
             f'Scale row: {self.scale_row}'
         ])
 
+    def __getstate__(self):
+        # файловый объект не сериализуется (нужно для пула процессов)
+        state = self.__dict__.copy()
+        state.pop('rsc_file', None)
+        return state
+
+    @classmethod
+    async def aopen(cls,
+                    path: str,
+                    executor: Optional[Executor] = None,
+                    strings: Optional[StringPool] = None) -> 'RSC':
+        """
+        Асинхронное открытие и полный парсинг классификатора.
+
+        Парсинг выполняется в пуле `executor`, одновременные открытия
+        одного и того же файла объединяются в одну задачу.
+        """
+
+        async def load():
+            # в пул процессов передаётся пустой пул строк: строки
+            # интернируются в общем пуле в этом процессе
+            if strings is not None and isinstance(executor, ProcessPoolExecutor):
+                rsc = await run_in_executor(executor, _load, cls, path, StringPool())
+                rsc.intern_strings(strings)
+                return rsc
+            return await run_in_executor(executor, _load, cls, path, strings)
+
+        key = (cls, 'open', os.path.abspath(path), id(strings))
+        return await single_flight(key, load)
+
+    def intern_strings(self, strings: StringPool):
+        """
+        Привязка классификатора к пулу строк и повторное интернирование
+        имён и названий объектов.
+        """
+
+        self.strings = strings
+        for rsc_objects in self.objects.values():
+            for rsc_obj in rsc_objects:
+                if isinstance(rsc_obj.name, str):
+                    rsc_obj.name = strings.intern(rsc_obj.name)
+                    rsc_obj.title = strings.intern(rsc_obj.title)
+
+    def parse(self) -> 'RSC':
+        """
+        Парсинг таблиц объектов, палитры и параметров экрана.
+        """
+
+        self.parse_objects()
+        self.parse_palette()
+        self.parse_display_params()
+        return self
+
     def __get_table_row(self,
                         fp: BinaryIO,
                         length: int,
@@ -262,6 +326,7 @@ class RSC:
             return result[index]
         return result
 
+    @profiling.profiled('rsc.objects')
     def parse_objects(self):
         """
         Парсинг таблицы объектов.
@@ -276,14 +341,16 @@ class RSC:
             raise ValueError('Invalid OBJ table ID!', obj_id)
 
         for _ in range(self.obj_count):
-            rsc_obj = RSCObject(rsc_file)
+            rsc_obj = RSCObject(rsc_file, self.strings)
             if rsc_obj.class_code in self.objects:
                 self.objects[rsc_obj.class_code].append(rsc_obj)
             else:
                 self.objects[rsc_obj.class_code] = [rsc_obj]
 
+        profiling.add_bytes('rsc.objects', rsc_file.tell() - (self.obj_offset - 4))
         rsc_file.close()
 
+    @profiling.profiled('rsc.display_params')
     def parse_display_params(self):
         """
         Парсинг таблицы параметров экрана.
@@ -326,8 +393,10 @@ class RSC:
 
                 self.display_params[par['internal_code']] = prim
 
+        profiling.add_bytes('rsc.display_params', rsc_file.tell() - (self.par_offset - 4))
         rsc_file.close()
 
+    @profiling.profiled('rsc.palette')
     def parse_palette(self):
         rsc_file = open(self.path, 'rb')
         rsc_file.seek(self.pal_offset - 4)
@@ -344,4 +413,9 @@ class RSC:
         name = self.__get_table_row(rsc_file, 32, '<32s', 0)
         self.palette_name = name.decode('cp1251')
 
+        profiling.add_bytes('rsc.palette', rsc_file.tell() - (self.pal_offset - 4))
         rsc_file.close()
+
+
+def _load(cls, path: str, strings: Optional[StringPool] = None) -> RSC:
+    return cls(path, strings).parse()
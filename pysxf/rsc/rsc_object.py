@@ -1,5 +1,7 @@
 import struct
-from typing import BinaryIO
+from typing import BinaryIO, Optional
+
+from pysxf.strings import StringPool
 
 
 class RSCObject:
@@ -11,7 +13,7 @@ class RSCObject:
     name: str
     title: str
 
-    def __init__(self, fp: BinaryIO):
+    def __init__(self, fp: BinaryIO, strings: Optional[StringPool] = None):
         self.fp = fp
 
         # длина записи объекта
@@ -38,12 +40,23 @@ class RSCObject:
         raw_title = self.fp.read(32)
         self.title = struct.unpack('<32s', raw_title)[0]
 
+        # строки до завершающего нуля декодируются через пул
+        if strings is not None:
+            self.name = strings.decode(self.name.split(b'\x00', 1)[0])
+            self.title = strings.decode(self.title.split(b'\x00', 1)[0])
+
         # характер локализации
         raw_type = self.fp.read(1)
         self.type = struct.unpack('<B', raw_type)[0]
 
         self.fp.read(self.length - 81)
 
+    def __getstate__(self):
+        # файловый объект не сериализуется (нужно для пула процессов)
+        state = self.__dict__.copy()
+        state.pop('fp', None)
+        return state
+
     def __str__(self):
         return '\n'.join([
             f'Length: {self.length}',
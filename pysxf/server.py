@@ -0,0 +1,481 @@
+"""
+Локальный сервер запросов к листам SXF.
+
+Сервер держит в памяти прочитанные листы (в колоночном виде),
+общий классификатор и пространственные индексы, вытесняя давно
+не использованные листы при превышении бюджета памяти. Запросы
+и ответы передаются через Unix-сокет кадрами `<I` длина + данные.
+
+Запрос: `<BH` код операции и длина пути, путь к листу (UTF-8),
+параметры операции:
+
+- OP_BBOX: `<4d` x_min, y_min, x_max, y_max;
+- OP_ATTRIBUTE: `<IHB` классификационный код (0 - любой), код
+  характеристики (0 - без условия на семантику), вид значения
+  (VALUE_NONE, VALUE_NUMBER + `<d`, VALUE_STRING + `<H` длина и UTF-8);
+- OP_NEAREST: `<ddIIB` x, y, число объектов, классификационный код
+  (0 - любой) и тип объектов (ANY_TYPE - любой);
+- OP_CONTAINS: `<dd` x, y - площадные объекты, содержащие точку.
+
+Ответ: кадры с байтом состояния STATUS_HITS и записями `HIT`
+или STATUS_ERROR и сообщением, в конце - кадр нулевой длины.
+
+Запуск: python -m pysxf.server SOCKET [--rsc RSC] [--memory-budget MB] [--snapshot-dir DIR]
+"""
+
+import argparse
+import hashlib
+import os
+import socket
+import socketserver
+import stat
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from pysxf import RSC, SXF
+from pysxf.geometry.index import GridIndex
+from pysxf.geometry.metrics import GeometryArrays, bboxes
+from pysxf.geometry.query import SpatialQuery
+from pysxf.strings import StringPool
+from pysxf.sxf.columns import SEMANTIC_FLOAT, SEMANTIC_INT, SheetColumns
+
+FRAME = struct.Struct('<I')
+REQUEST = struct.Struct('<BH')
+BBOX_ARGS = struct.Struct('<4d')
+ATTRIBUTE_ARGS = struct.Struct('<IHB')
+NEAREST_ARGS = struct.Struct('<ddIIB')
+POINT_ARGS = struct.Struct('<dd')
+# номер записи, классификационный код, номер объекта, номер группы, тип, расстояние
+HIT = struct.Struct('<IIHHBd')
+
+OP_BBOX = 1
+OP_ATTRIBUTE = 2
+OP_NEAREST = 3
+OP_CONTAINS = 4
+
+# любой тип объекта в запросе ближайших
+ANY_TYPE = 255
+
+VALUE_NONE = 0
+VALUE_NUMBER = 1
+VALUE_STRING = 2
+
+STATUS_HITS = 0
+STATUS_ERROR = 1
+
+# число записей в одном кадре ответа
+HITS_PER_FRAME = 1024
+
+
+class Hit(NamedTuple):
+    index: int
+    class_code: int
+    id: int
+    group_id: int
+    type: int
+    # расстояние для запросов ближайших объектов, иначе NaN
+    distance: float
+
+
+def _nbytes(column) -> int:
+    return memoryview(column).nbytes
+
+
+class WarmSheet:
+    """
+    Лист, подготовленный к запросам: колонки, габариты объектов,
+    сеточный индекс и точные пространственные запросы.
+    """
+
+    def __init__(self, sxf: SXF, columns: SheetColumns):
+        self.sxf = sxf
+        self.columns = columns
+        self.mtime = os.stat(sxf.path).st_mtime_ns
+        self.geometry = GeometryArrays.from_columns(columns)
+        self.index = GridIndex(bboxes(self.geometry))
+        self.query = SpatialQuery(self.geometry, self.index)
+        self.__strings = None
+
+    @classmethod
+    def load(cls,
+             path: str,
+             strings: Optional[StringPool] = None,
+             snapshot_path: Optional[str] = None) -> 'WarmSheet':
+        """
+        Загрузка листа из снимка `snapshot_path`, если он задан и актуален,
+        иначе полный парсинг с сохранением снимка для следующих запусков.
+        Без `snapshot_path` снимки не читаются и не пишутся.
+        """
+
+        if snapshot_path is not None:
+            sxf = SXF.load_snapshot(path, snapshot_path)
+            if sxf is not None:
+                return cls(sxf, sxf.columns)
+
+        mtime = os.stat(path).st_mtime_ns
+        sxf = SXF(path, strings=strings)
+        sxf.columns = SheetColumns.from_objects(sxf.parse())
+        # снимок не пишется, если лист изменился во время чтения
+        if snapshot_path is not None and os.stat(path).st_mtime_ns == mtime:
+            try:
+                sxf.save_snapshot(snapshot_path)
+            except OSError:
+                # снимок - только кэш, каталог снимков может быть недоступен для записи
+                pass
+        # объекты не храним: при необходимости они восстанавливаются из колонок
+        columns = sxf.__dict__.pop('columns')
+        del sxf.objects
+        return cls(sxf, columns)
+
+    @property
+    def nbytes(self) -> int:
+        columns = self.columns.columns
+        return sum(_nbytes(column) for column in columns.values()) + self.index.nbytes
+
+    def is_stale(self) -> bool:
+        try:
+            return os.stat(self.sxf.path).st_mtime_ns != self.mtime
+        except OSError:
+            return True
+
+    def __string_ids(self, value: str) -> List[int]:
+        if self.__strings is None:
+            columns = self.columns
+            offsets = columns.str_offsets
+            data = bytes(columns.str_data)
+            self.__strings = {}
+            for i in range(len(offsets) - 1):
+                self.__strings.setdefault(data[offsets[i]:offsets[i + 1]], []).append(i)
+
+        # строки хранятся в UTF-8 (декодированные) или в исходной кодировке листа
+        ids = []
+        for encoded in {value.encode(), value.encode('cp1251', errors='ignore')}:
+            ids.extend(self.__strings.get(encoded, ()))
+        return ids
+
+    def attribute(self, class_code: int = 0, code: int = 0, value: Union[float, str, None] = None) -> np.ndarray:
+        """
+        Номера объектов с заданным классификационным кодом и значением
+        характеристики семантики.
+        """
+
+        columns = self.columns
+        mask = np.ones(len(columns), dtype=bool)
+        if class_code:
+            mask &= np.frombuffer(columns.class_code, dtype=np.uint32) == class_code
+
+        if code:
+            sem_codes = np.frombuffer(columns.sem_codes, dtype=np.uint16)
+            rows = sem_codes == code
+            if value is not None:
+                sem_kinds = np.frombuffer(columns.sem_kinds, dtype=np.uint8)
+                sem_values = np.frombuffer(columns.sem_values, dtype=np.float64)
+                if isinstance(value, str):
+                    is_number = (sem_kinds == SEMANTIC_INT) | (sem_kinds == SEMANTIC_FLOAT)
+                    rows &= ~is_number & np.isin(sem_values, self.__string_ids(value))
+                else:
+                    rows &= ((sem_kinds == SEMANTIC_INT) | (sem_kinds == SEMANTIC_FLOAT)) & (sem_values == value)
+
+            sem_offsets = np.frombuffer(columns.sem_offsets, dtype=np.uint64).astype(np.intp)
+            row_object = np.repeat(np.arange(len(columns)), np.diff(sem_offsets))
+            has_value = np.zeros(len(columns), dtype=bool)
+            has_value[row_object[rows]] = True
+            mask &= has_value
+
+        return np.flatnonzero(mask)
+
+    def hits(self, indices: np.ndarray, distances: Optional[np.ndarray] = None) -> Iterator[Hit]:
+        columns = self.columns
+        for i, index in enumerate(indices.tolist()):
+            yield Hit(index, columns.class_code[index], columns.id[index], columns.group_id[index],
+                      columns.type[index], float('nan') if distances is None else float(distances[i]))
+
+
+class SheetCache:
+    """
+    Кэш подготовленных листов с бюджетом памяти.
+
+    При превышении бюджета вытесняются давно не использованные листы,
+    последний загруженный лист остаётся в кэше в любом случае.
+    Изменённые на диске листы перечитываются. Листы загружаются вне
+    блокировки кэша, одновременные запросы одного листа ожидают одну
+    загрузку.
+
+    `snapshot_dir` - каталог колоночных снимков листов, ускоряющих
+    повторную загрузку (None - снимки не используются, каталоги
+    листов не изменяются).
+    """
+
+    def __init__(self,
+                 memory_budget: int = 1 << 30,
+                 rsc_path: Optional[str] = None,
+                 strings: Optional[StringPool] = None,
+                 snapshot_dir: Optional[str] = None):
+        self.memory_budget = memory_budget
+        self.snapshot_dir = snapshot_dir
+        if snapshot_dir is not None:
+            os.makedirs(snapshot_dir, exist_ok=True)
+        self.strings = strings if strings is not None else StringPool()
+        # общий классификатор для всех листов
+        self.rsc = RSC(rsc_path, self.strings).parse() if rsc_path is not None else None
+        self.__sheets: 'OrderedDict[str, WarmSheet]' = OrderedDict()
+        # загружаемые листы
+        self.__loading: Dict[str, Future] = {}
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__sheets)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(sheet.nbytes for sheet in self.__sheets.values())
+
+    def snapshot_path(self, path: str) -> Optional[str]:
+        """
+        Путь к снимку листа в каталоге снимков (имена листов из разных
+        каталогов различаются хэшем полного пути).
+        """
+
+        if self.snapshot_dir is None:
+            return None
+        digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+        return os.path.join(self.snapshot_dir, f'{os.path.basename(path)}.{digest}.snap')
+
+    def get(self, path: str) -> WarmSheet:
+        path = os.path.abspath(path)
+        with self.__lock:
+            sheet = self.__sheets.get(path)
+            if sheet is not None and not sheet.is_stale():
+                self.__sheets.move_to_end(path)
+                return sheet
+
+            future = self.__loading.get(path)
+            if future is None:
+                future = self.__loading[path] = Future()
+                loading = True
+            else:
+                loading = False
+
+        if not loading:
+            return future.result()
+
+        try:
+            sheet = WarmSheet.load(path, self.strings, self.snapshot_path(path))
+            sheet.sxf.rsc = self.rsc
+        except BaseException as error:
+            with self.__lock:
+                del self.__loading[path]
+            future.set_exception(error)
+            raise
+
+        with self.__lock:
+            del self.__loading[path]
+            self.__sheets[path] = sheet
+            self.__sheets.move_to_end(path)
+
+            while len(self.__sheets) > 1 and self.nbytes > self.memory_budget:
+                self.__sheets.popitem(last=False)
+
+        future.set_result(sheet)
+        return sheet
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv_frame(sock: socket.socket) -> Optional[bytes]:
+    header = _recv_exact(sock, FRAME.size)
+    if header is None:
+        return None
+    return _recv_exact(sock, FRAME.unpack(header)[0])
+
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(FRAME.pack(len(payload)) + payload)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        while True:
+            request = _recv_frame(self.request)
+            if request is None:
+                return
+            try:
+                hits = self.server.execute(request)
+                batch = bytearray([STATUS_HITS])
+                for hit in hits:
+                    batch += HIT.pack(*hit)
+                    if len(batch) >= 1 + HITS_PER_FRAME * HIT.size:
+                        _send_frame(self.request, bytes(batch))
+                        batch = bytearray([STATUS_HITS])
+                if len(batch) > 1:
+                    _send_frame(self.request, bytes(batch))
+            except (OSError, ValueError, TypeError, struct.error) as error:
+                _send_frame(self.request, bytes([STATUS_ERROR]) + str(error).encode())
+            _send_frame(self.request, b'')
+
+
+class SXFServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Сервер запросов на Unix-сокете (доступен только локально).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, cache: Optional[SheetCache] = None):
+        try:
+            mode = os.lstat(socket_path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            # удаляется только сокет прежнего запуска, не произвольный файл
+            if not stat.S_ISSOCK(mode):
+                raise ValueError('Socket path exists and is not a socket!')
+            os.unlink(socket_path)
+        self.cache = cache if cache is not None else SheetCache()
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+    def execute(self, request: bytes) -> Iterator[Hit]:
+        """
+        Выполнение запроса, возвращает найденные объекты.
+        """
+
+        op, path_len = REQUEST.unpack_from(request)
+        pos = REQUEST.size
+        path = request[pos:pos + path_len].decode()
+        pos += path_len
+        sheet = self.cache.get(path)
+
+        if op == OP_BBOX:
+            return sheet.hits(sheet.index.query(BBOX_ARGS.unpack_from(request, pos)))
+
+        if op == OP_ATTRIBUTE:
+            class_code, code, kind = ATTRIBUTE_ARGS.unpack_from(request, pos)
+            pos += ATTRIBUTE_ARGS.size
+            value = None
+            if kind == VALUE_NUMBER:
+                value = struct.unpack_from('<d', request, pos)[0]
+            elif kind == VALUE_STRING:
+                size = struct.unpack_from('<H', request, pos)[0]
+                value = request[pos + 2:pos + 2 + size].decode()
+            return sheet.hits(sheet.attribute(class_code, code, value))
+
+        if op == OP_NEAREST:
+            x, y, k, class_code, type_ = NEAREST_ARGS.unpack_from(request, pos)
+            mask = None
+            if class_code:
+                mask = np.frombuffer(sheet.columns.class_code, dtype=np.uint32) == class_code
+            if type_ != ANY_TYPE:
+                is_type = sheet.geometry.types == type_
+                mask = is_type if mask is None else mask & is_type
+            return sheet.hits(*sheet.query.nearest(x, y, k, mask))
+
+        if op == OP_CONTAINS:
+            return sheet.hits(sheet.query.containing(*POINT_ARGS.unpack_from(request, pos)))
+
+        raise ValueError('Invalid operation!')
+
+
+class SXFClient:
+    """
+    Клиент сервера запросов.
+    """
+
+    def __init__(self, socket_path: str):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+
+    def __enter__(self) -> 'SXFClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.sock.close()
+
+    def query(self, op: int, path: str, args: bytes) -> Iterator[Hit]:
+        """
+        Отправка запроса и потоковое чтение ответа.
+        """
+
+        raw_path = path.encode()
+        _send_frame(self.sock, REQUEST.pack(op, len(raw_path)) + raw_path + args)
+
+        error = None
+        while True:
+            frame = _recv_frame(self.sock)
+            if frame is None:
+                raise ConnectionError('Connection closed!')
+            if not frame:
+                break
+            if frame[0] == STATUS_ERROR:
+                error = frame[1:].decode()
+                continue
+            for pos in range(1, len(frame), HIT.size):
+                yield Hit(*HIT.unpack_from(frame, pos))
+
+        if error is not None:
+            raise ValueError(error)
+
+    def bbox(self, path: str, bbox: Tuple[float, float, float, float]) -> List[Hit]:
+        return list(self.query(OP_BBOX, path, BBOX_ARGS.pack(*bbox)))
+
+    def attribute(self, path: str, class_code: int = 0, code: int = 0,
+                  value: Union[float, str, None] = None) -> List[Hit]:
+        if value is None:
+            args = ATTRIBUTE_ARGS.pack(class_code, code, VALUE_NONE)
+        elif isinstance(value, str):
+            raw_value = value.encode()
+            args = ATTRIBUTE_ARGS.pack(class_code, code, VALUE_STRING) + struct.pack('<H', len(raw_value)) + raw_value
+        else:
+            args = ATTRIBUTE_ARGS.pack(class_code, code, VALUE_NUMBER) + struct.pack('<d', value)
+        return list(self.query(OP_ATTRIBUTE, path, args))
+
+    def nearest(self, path: str, x: float, y: float, k: int = 1,
+                class_code: int = 0, type_: Optional[int] = None) -> List[Hit]:
+        args = NEAREST_ARGS.pack(x, y, k, class_code, ANY_TYPE if type_ is None else type_)
+        return list(self.query(OP_NEAREST, path, args))
+
+    def containing(self, path: str, x: float, y: float) -> List[Hit]:
+        return list(self.query(OP_CONTAINS, path, POINT_ARGS.pack(x, y)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SXF query server')
+    parser.add_argument('socket', help='path to the Unix socket')
+    parser.add_argument('--rsc', help='shared RSC classifier')
+    parser.add_argument('--memory-budget', type=int, default=1024, help='memory budget in MB')
+    parser.add_argument('--snapshot-dir', help='directory for sheet snapshots')
+    args = parser.parse_args()
+
+    cache = SheetCache(args.memory_budget << 20, args.rsc, snapshot_dir=args.snapshot_dir)
+    with SXFServer(args.socket, cache) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
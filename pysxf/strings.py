@@ -0,0 +1,94 @@
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+# кодировки строковых характеристик семантики по типу
+SEMANTIC_ENCODINGS = {
+    0: 'cp1251',
+    126: 'cp1251',
+    127: 'utf-16-le',
+    128: 'cp1251'
+}
+
+
+class StringPool:
+    """
+    Пул декодированных строк.
+
+    Каждое уникальное значение декодируется один раз и хранится в одном
+    экземпляре, повторяющиеся подписи и значения семантики (названия
+    населённых пунктов, рек, типы объектов) разделяют одну строку.
+    Пул можно использовать для нескольких листов и классификаторов,
+    в том числе из нескольких потоков.
+    """
+
+    def __init__(self):
+        self.__codes: Dict[Tuple[bytes, str], int] = {}
+        # номера по декодированным значениям (для повторного интернирования)
+        self.__interned: Dict[str, int] = {}
+        self.values: List[str] = []
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getstate__(self):
+        # блокировка не сериализуется (нужно для пула процессов)
+        state = self.__dict__.copy()
+        state.pop('_StringPool__lock')
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.Lock()
+
+    def __append(self, value: str) -> int:
+        code = self.__interned.setdefault(value, len(self.values))
+        if code == len(self.values):
+            self.values.append(value)
+        return code
+
+    def code(self, raw: bytes, encoding: str = 'cp1251') -> int:
+        """
+        Номер строки в словаре пула (словарное кодирование).
+        """
+
+        key = (raw, encoding)
+        code = self.__codes.get(key)
+        if code is None:
+            if encoding == 'utf-16-le' and len(raw) % 2:
+                # завершающий нулевой байт символа срезается вместе с терминатором
+                raw += b'\x00'
+            value = raw.decode(encoding, errors='replace')
+            with self.__lock:
+                code = self.__codes.get(key)
+                if code is None:
+                    code = self.__codes[key] = self.__append(value)
+        return code
+
+    def intern(self, value: str) -> str:
+        """
+        Интернирование уже декодированной строки (например, полученной
+        из другого процесса вместе с копией пула).
+        """
+
+        code = self.__interned.get(value)
+        if code is None:
+            with self.__lock:
+                code = self.__append(value)
+        return self.values[code]
+
+    def decode(self, raw: bytes, encoding: str = 'cp1251') -> str:
+        """
+        Декодирование строки с интернированием.
+        """
+
+        return self.values[self.code(raw, encoding)]
+
+    def decode_many(self, raws: Iterable[bytes], encoding: str = 'cp1251') -> List[str]:
+        """
+        Пакетное декодирование: уникальные значения декодируются один раз.
+        """
+
+        raws = list(raws)
+        decoded = {raw: self.decode(raw, encoding) for raw in set(raws)}
+        return [decoded[raw] for raw in raws]
@@ -0,0 +1,305 @@
+import functools
+import os
+import pickle
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, defaultdict
+from typing import BinaryIO, Dict, NamedTuple, Optional, Tuple
+
+from .sxf_object import SXFObject
+
+# примерные размеры структур Python в байтах (64-битная сборка)
+LIST_SIZE = 56
+# ссылка в списке, кортеж из двух элементов и два числа
+POINT_SIZE = 8 + 56 + 2 * 24
+DICT_ENTRY_SIZE = 100
+STR_SIZE = 50
+# заголовки array.array и bytes
+ARRAY_SIZE = 64
+BYTES_SIZE = 33
+
+
+def estimate_footprint(obj: SXFObject) -> int:
+    """
+    Примерный объём памяти декодированного тела записи: метрики
+    с высотами, подписей, семантики и графического описания
+    (без заголовка).
+    """
+
+    parts = [obj.__dict__.get('points', ())]
+    parts.extend(obj.__dict__.get('subitems', ()))
+    text_subitems = obj.__dict__.get('text_subitems', ())
+    parts.extend(item['points'] for item in text_subitems)
+
+    size = sum(LIST_SIZE + POINT_SIZE * len(points) for points in parts)
+    size += sum(DICT_ENTRY_SIZE + STR_SIZE + len(item['text']) for item in text_subitems)
+    if 'text' in obj.__dict__:
+        size += STR_SIZE + len(obj.text)
+
+    heights = obj.__dict__.get('heights') or ()
+    if heights:
+        size += LIST_SIZE + sum(8 + ARRAY_SIZE + part.itemsize * len(part) for part in heights)
+
+    semantics = obj.__dict__.get('semantics', {})
+    for value in semantics.values():
+        size += DICT_ENTRY_SIZE + (STR_SIZE + len(value) if isinstance(value, (bytes, str)) else 24)
+
+    # графическое описание и оформление записи хранятся байтами
+    for name in ('raw_graphics', 'semantic_formats', 'text_sizes', 'subitem_words'):
+        raw = obj.__dict__.get(name)
+        if raw is not None:
+            size += BYTES_SIZE + len(raw)
+    return size
+
+
+class FootprintReport(NamedTuple):
+    # объём декодированных тел записей в памяти
+    total: int
+    # число записей с телом в памяти и вытесненных
+    resident: int
+    released: int
+    # ключи - значения `ObjectType`
+    by_type: Dict[int, int]
+    by_class_code: Dict[int, int]
+
+
+def _decode_from(path: str, obj: SXFObject):
+    """
+    Загрузчик записи, снятой с учёта: тело декодируется из файла листа.
+    """
+
+    with open(path, 'rb') as data:
+        obj.decode(data)
+    obj.raw_data = None
+
+
+class MemoryBudget:
+    """
+    Бюджет памяти для декодированных записей одного или нескольких листов.
+
+    Бюджет учитывает примерный объём тела каждой записи и при превышении
+    лимита вытесняет записи в порядке загрузки (первыми - загруженные
+    раньше всех; `touch` переносит запись в конец очереди), оставляя
+    заголовки. При обращении к вытесненному атрибуту тело декодируется
+    заново из файла листа или читается из файла выгрузки, если у записи
+    нет исходного файла.
+
+    Бюджет хранит только слабые ссылки на записи: записи удалённых
+    листов снимаются с учёта автоматически.
+    """
+
+    def __init__(self, limit: int, spill_path: Optional[str] = None):
+        self.limit = limit
+        self.spill_path = spill_path
+        self.nbytes = 0
+        self.evictions = 0
+        self.reloads = 0
+
+        # записи с телом в памяти в порядке загрузки: id -> (ссылка на запись, объём)
+        self.__resident: 'OrderedDict[int, Tuple[weakref.ref, int]]' = OrderedDict()
+        # вытесненные записи
+        self.__released: Dict[int, weakref.ref] = {}
+        self.__sources: Dict[int, Optional[str]] = {}
+        self.__spilled: Dict[int, Tuple[int, int]] = {}
+        self.__finalizers: Dict[int, weakref.finalize] = {}
+        self.__files: Dict[str, BinaryIO] = {}
+        self.__spill: Optional[BinaryIO] = None
+        self.__lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.__sources)
+
+    def __enter__(self) -> 'MemoryBudget':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def track(self, obj: SXFObject, path: Optional[str] = None):
+        """
+        Учёт декодированной записи.
+
+        `path` - файл листа, из которого тело можно декодировать заново,
+        без него вытесненное тело сохраняется в файл выгрузки
+        (например, для изменённых в памяти объектов).
+        """
+
+        with self.__lock:
+            key = id(obj)
+            if key in self.__resident:
+                self.nbytes -= self.__resident.pop(key)[1]
+            self.__released.pop(key, None)
+            self.__spilled.pop(key, None)
+            self.__sources[key] = path
+            if key not in self.__finalizers:
+                self.__finalizers[key] = weakref.finalize(obj, self.__forget, key)
+            obj.set_loader(self.__load)
+            self.__add(obj)
+
+    def __forget(self, key: int):
+        """
+        Удаление учёта записи (запись удалена или снята с учёта).
+        """
+
+        with self.__lock:
+            resident = self.__resident.pop(key, None)
+            if resident is not None:
+                self.nbytes -= resident[1]
+            self.__released.pop(key, None)
+            self.__sources.pop(key, None)
+            self.__spilled.pop(key, None)
+            finalizer = self.__finalizers.pop(key, None)
+            if finalizer is not None:
+                finalizer.detach()
+
+    def __add(self, obj: SXFObject):
+        key = id(obj)
+        size = estimate_footprint(obj)
+        self.__resident[key] = (weakref.ref(obj), size)
+        self.nbytes += size
+
+        while self.nbytes > self.limit and len(self.__resident) > 1:
+            oldest, (ref, _) = next(iter(self.__resident.items()))
+            if oldest == key:
+                break
+            cold = ref()
+            if cold is None:
+                self.__forget(oldest)
+            else:
+                self.__evict(cold)
+
+    def __evict(self, obj: SXFObject):
+        key = id(obj)
+        self.nbytes -= self.__resident.pop(key)[1]
+        body = obj.release()
+        if self.__sources[key] is None:
+            self.__spilled[key] = self.__write_spill(body)
+        self.__released[key] = weakref.ref(obj)
+        self.evictions += 1
+
+    def __write_spill(self, body: dict) -> Tuple[int, int]:
+        if self.__spill is None:
+            if self.spill_path is None:
+                self.__spill = tempfile.TemporaryFile(prefix='pysxf-spill-')
+            else:
+                self.__spill = open(self.spill_path, 'w+b')
+        data = pickle.dumps(body, pickle.HIGHEST_PROTOCOL)
+        self.__spill.seek(0, os.SEEK_END)
+        offset = self.__spill.tell()
+        self.__spill.write(data)
+        return offset, len(data)
+
+    def __restore(self, obj: SXFObject, key: int):
+        spilled = self.__spilled.pop(key, None)
+        if spilled is not None:
+            offset, size = spilled
+            self.__spill.seek(offset)
+            obj.restore(pickle.loads(self.__spill.read(size)))
+            return
+
+        path = self.__sources[key]
+        data = self.__files.get(path)
+        if data is None:
+            data = self.__files[path] = open(path, 'rb')
+        obj.decode(data)
+
+    def __load(self, obj: SXFObject):
+        """
+        Восстановление вытесненного тела записи.
+        """
+
+        with self.__lock:
+            key = id(obj)
+            if self.__released.pop(key, None) is None:
+                return
+
+            self.__restore(obj, key)
+            self.reloads += 1
+            self.__add(obj)
+
+    def touch(self, obj: SXFObject):
+        """
+        Отметка обращения к записи (переносит её в конец очереди вытеснения).
+        """
+
+        with self.__lock:
+            if id(obj) in self.__resident:
+                self.__resident.move_to_end(id(obj))
+
+    def untrack(self, obj: SXFObject):
+        """
+        Прекращение учёта записи.
+
+        Вытесненное тело остаётся вне памяти и при обращении декодируется
+        из файла листа (тела из файла выгрузки восстанавливаются сразу).
+        """
+
+        with self.__lock:
+            key = id(obj)
+            if key not in self.__sources:
+                return
+
+            path = self.__sources[key]
+            if key in self.__released:
+                if path is None:
+                    self.__restore(obj, key)
+                    obj.set_loader(None)
+                else:
+                    obj.set_loader(functools.partial(_decode_from, path))
+            else:
+                obj.set_loader(None)
+            self.__forget(key)
+
+    def untrack_sheet(self, path: str):
+        """
+        Прекращение учёта всех записей листа и закрытие его файла.
+        """
+
+        with self.__lock:
+            keys = [key for key, source in self.__sources.items() if source == path]
+            for key in keys:
+                ref = self.__resident.get(key, (self.__released.get(key),))[0]
+                obj = ref() if ref is not None else None
+                if obj is None:
+                    self.__forget(key)
+                else:
+                    self.untrack(obj)
+
+            data = self.__files.pop(path, None)
+            if data is not None:
+                data.close()
+
+    def report(self) -> FootprintReport:
+        """
+        Текущий объём декодированных записей по типам объектов
+        и классификационным кодам.
+        """
+
+        with self.__lock:
+            by_type = defaultdict(int)
+            by_class_code = defaultdict(int)
+            for ref, size in self.__resident.values():
+                obj = ref()
+                if obj is not None:
+                    by_type[obj.type] += size
+                    by_class_code[obj.class_code] += size
+            return FootprintReport(self.nbytes, len(self.__resident), len(self.__released),
+                                   dict(by_type), dict(by_class_code))
+
+    def close(self):
+        """
+        Закрытие исходных файлов и удаление файла выгрузки.
+
+        Вытесненные записи после закрытия восстановить нельзя.
+        """
+
+        with self.__lock:
+            for data in self.__files.values():
+                data.close()
+            self.__files.clear()
+            if self.__spill is not None:
+                self.__spill.close()
+                if self.spill_path is not None and os.path.exists(self.spill_path):
+                    os.unlink(self.spill_path)
+                self.__spill = None
@@ -0,0 +1,249 @@
+import bisect
+import logging
+import os
+import struct
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .sxf import SXF
+
+logger = logging.getLogger(__name__)
+
+BBox = Tuple[float, float, float, float]
+
+CATALOG_ID = b'SXFC'
+CATALOG_VERSION = 1
+
+# масштаб, число записей, ESPG, время изменения, размер файла, рамки листа
+ENTRY_FORMAT = struct.Struct('<IIIdQ4d4d')
+
+
+class CatalogEntry(NamedTuple):
+    path: str
+    nomenclature: bytes
+    scale: int
+    records_count: int
+    espg: int
+    mtime: float
+    size: int
+    # рамки листа (x_min, y_min, x_max, y_max) в геодезических и прямоугольных координатах
+    geo_bbox: BBox
+    rect_bbox: BBox
+
+
+def _bbox(coords: Sequence[float]) -> BBox:
+    xs, ys = coords[0::2], coords[1::2]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def read_entry(path: str) -> CatalogEntry:
+    """
+    Чтение записи каталога по паспорту и дескриптору листа.
+    """
+
+    sxf = SXF(path)
+    stat = os.stat(path)
+    return CatalogEntry(
+        path,
+        sxf.nomenclature,
+        sxf.scale,
+        sxf.records_count,
+        sxf.espg,
+        stat.st_mtime,
+        stat.st_size,
+        _bbox(sxf.geo_coords),
+        _bbox(sxf.rect_coords)
+    )
+
+
+class _FrameIndex:
+    """
+    Индекс рамок листов в одной системе координат.
+
+    Листы сгруппированы по масштабу (листы одного масштаба близки
+    по размеру) и упорядочены по x_min рамки: для каждого масштаба
+    поиск пересечений сводится к двоичному поиску диапазона шириной
+    самого широкого листа этого масштаба.
+    """
+
+    def __init__(self, entries: Iterable[CatalogEntry], frame: Callable[[CatalogEntry], BBox]):
+        self.frame = frame
+        groups = defaultdict(list)
+        for entry in entries:
+            groups[entry.scale].append(entry)
+
+        # масштаб -> (записи, x_min рамок, наибольшая ширина)
+        self.groups: Dict[int, Tuple[List[CatalogEntry], List[float], float]] = {}
+        for scale, group in groups.items():
+            group.sort(key=lambda entry: frame(entry)[0])
+            x_mins = [frame(entry)[0] for entry in group]
+            width = max(frame(entry)[2] - frame(entry)[0] for entry in group)
+            self.groups[scale] = (group, x_mins, width)
+
+    def query(self, bbox: BBox, min_scale: Optional[int] = None, max_scale: Optional[int] = None) -> List[CatalogEntry]:
+        x_min, y_min, x_max, y_max = bbox
+        result = []
+        for scale, (group, x_mins, width) in self.groups.items():
+            if min_scale is not None and not min_scale <= scale <= max_scale:
+                continue
+            # у листов с x_min < x_min запроса - ширина не больше наибольшей для масштаба
+            start = bisect.bisect_left(x_mins, x_min - width)
+            end = bisect.bisect_right(x_mins, x_max)
+            for entry in group[start:end]:
+                e_x_min, e_y_min, e_x_max, e_y_max = self.frame(entry)
+                if e_x_min <= x_max and e_x_max >= x_min and e_y_min <= y_max and e_y_max >= y_min:
+                    result.append(entry)
+        return result
+
+
+def _read_entry_safe(path: str) -> Optional[CatalogEntry]:
+    try:
+        return read_entry(path)
+    except (OSError, TypeError, ValueError, struct.error) as error:
+        logger.warning('Skip %s: %s', path, error)
+        return None
+
+
+class SXFCatalog:
+    """
+    Каталог листов, построенный только по паспортам.
+
+    Рамки листов в геодезических и прямоугольных координатах
+    индексируются по масштабам и x_min рамки, поэтому поиск пересечений
+    сводится к двоичному поиску диапазона и проверке нескольких соседей.
+    """
+
+    def __init__(self, entries: Iterable[CatalogEntry] = ()):
+        self.entries: List[CatalogEntry] = []
+        self.__index = {}
+        for entry in entries:
+            self.__index[entry.path] = entry
+        self.__reindex()
+
+    def __reindex(self):
+        self.entries = sorted(self.__index.values(), key=lambda entry: entry.geo_bbox[0])
+        self.__geo = _FrameIndex(self.entries, lambda entry: entry.geo_bbox)
+        self.__rect = _FrameIndex(self.entries, lambda entry: entry.rect_bbox)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    @classmethod
+    def build(cls, paths: Iterable[str], max_workers: Optional[int] = None) -> 'SXFCatalog':
+        """
+        Параллельное построение каталога по списку файлов.
+
+        Из каждого файла читаются только паспорт и дескриптор (452 байта),
+        файлы, не являющиеся листами SXF, пропускаются.
+        """
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            entries = [entry for entry in executor.map(_read_entry_safe, paths) if entry is not None]
+        return cls(entries)
+
+    @classmethod
+    def scan(cls, directory: str, max_workers: Optional[int] = None) -> 'SXFCatalog':
+        """
+        Построение каталога по всем файлам .sxf в каталоге (рекурсивно).
+        """
+
+        paths = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(directory)
+            for name in names
+            if name.lower().endswith('.sxf')
+        ]
+        return cls.build(paths, max_workers)
+
+    def refresh(self, max_workers: Optional[int] = None) -> int:
+        """
+        Перечитывание изменённых и удаление отсутствующих листов.
+
+        Возвращает число обновлённых записей.
+        """
+
+        changed = []
+        for entry in list(self.__index.values()):
+            try:
+                stat = os.stat(entry.path)
+            except OSError:
+                del self.__index[entry.path]
+                continue
+            if stat.st_mtime != entry.mtime or stat.st_size != entry.size:
+                changed.append(entry.path)
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            for path, entry in zip(changed, executor.map(_read_entry_safe, changed)):
+                if entry is None:
+                    del self.__index[path]
+                else:
+                    self.__index[path] = entry
+
+        self.__reindex()
+        return len(changed)
+
+    def intersects(self,
+                   bbox: BBox,
+                   scale: Union[int, Tuple[int, int], None] = None,
+                   rect: bool = False) -> List[CatalogEntry]:
+        """
+        Листы, рамки которых пересекают `bbox` (x_min, y_min, x_max, y_max).
+
+        По умолчанию рамка задаётся в геодезических координатах (радианы),
+        при `rect=True` - в прямоугольных. Масштаб задаётся знаменателем
+        или диапазоном знаменателей.
+        """
+
+        if isinstance(scale, tuple):
+            min_scale, max_scale = scale
+        elif scale is not None:
+            min_scale = max_scale = scale
+        else:
+            min_scale = max_scale = None
+
+        index = self.__rect if rect else self.__geo
+        result = index.query(bbox, min_scale, max_scale)
+        # порядок результата как у `entries`
+        result.sort(key=lambda entry: entry.geo_bbox[0])
+        return result
+
+    def save(self, path: str):
+        """
+        Сохранение каталога в компактный двоичный файл.
+        """
+
+        with open(path, 'wb') as fp:
+            fp.write(struct.pack('<4sHI', CATALOG_ID, CATALOG_VERSION, len(self.entries)))
+            for entry in self.entries:
+                fp.write(ENTRY_FORMAT.pack(entry.scale, entry.records_count, entry.espg, entry.mtime, entry.size,
+                                           *entry.geo_bbox, *entry.rect_bbox))
+                raw_path = entry.path.encode()
+                fp.write(struct.pack('<HB', len(raw_path), len(entry.nomenclature)))
+                fp.write(raw_path + entry.nomenclature)
+
+    @classmethod
+    def load(cls, path: str) -> 'SXFCatalog':
+        """
+        Загрузка каталога из файла.
+        """
+
+        with open(path, 'rb') as fp:
+            catalog_id, version, count = struct.unpack('<4sHI', fp.read(10))
+            if catalog_id != CATALOG_ID:
+                raise TypeError('Invalid file type!')
+            if version != CATALOG_VERSION:
+                raise ValueError('Invalid catalog version!')
+            return cls(cls.__read_entry(fp) for _ in range(count))
+
+    @staticmethod
+    def __read_entry(fp: BinaryIO) -> CatalogEntry:
+        scale, records_count, espg, mtime, size, *bboxes = ENTRY_FORMAT.unpack(fp.read(ENTRY_FORMAT.size))
+        path_len, nomenclature_len = struct.unpack('<HB', fp.read(3))
+        path = fp.read(path_len).decode()
+        nomenclature = fp.read(nomenclature_len)
+        return CatalogEntry(path, nomenclature, scale, records_count, espg, mtime, size,
+                            tuple(bboxes[:4]), tuple(bboxes[4:]))
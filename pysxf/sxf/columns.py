@@ -0,0 +1,416 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .sxf_object import ObjectType, SXFObject
+
+SNAPSHOT_ID = b'SXFS'
+SNAPSHOT_VERSION = 4
+
+# заголовок снимка: идентификатор, версия, порядок байт, размер и время изменения исходного файла,
+# число колонок и число записей исходного листа (снимок содержит все записи)
+SNAPSHOT_HEADER = struct.Struct('<4sHHQQII')
+# элемент каталога колонок: имя, тип элементов, смещение, длина в байтах
+COLUMN_ENTRY = struct.Struct('<16s1s7xQQ')
+
+# флаги записи
+HAS_SEMANTICS = 1
+RAW_DATA_SIZE = 2
+RAW_DATA_TYPE = 4
+HAS_TEXT = 8
+HAS_GRAPHICS = 16
+# подписи декодированы в str (в таблице строк хранятся в UTF-8)
+TEXT_DECODED = 32
+# трёхмерная метрика и вектор привязки 3D-модели
+IS_3D = 64
+HAS_VECTOR = 128
+
+# (размер элемента, точность) -> (размер, формат)
+DATA_FORMATS = {
+    (0, 0): (2, '<H'),
+    (0, 1): (4, '<f'),
+    (1, 0): (4, '<i'),
+    (1, 1): (8, '<d')
+}
+
+# виды значений семантики
+SEMANTIC_INT = 0
+SEMANTIC_FLOAT = 1
+SEMANTIC_BYTES = 2
+SEMANTIC_STR = 3
+
+COLUMNS = {
+    # заголовки записей
+    'offset': 'Q',
+    'full_len': 'I',
+    'metrics_len': 'I',
+    'class_code': 'I',
+    'id': 'H',
+    'group_id': 'H',
+    'type': 'B',
+    'flags': 'B',
+    'general_levels': 'B',
+    'big_points_count': 'I',
+    'subitems_count': 'H',
+    'points_count': 'H',
+    # геометрия: координаты (x, y), границы частей и частей объектов
+    'coords': 'd',
+    'part_offsets': 'Q',
+    'object_parts': 'Q',
+    # высоты точек трёхмерной метрики: границы высот объектов и значения
+    'height_offsets': 'Q',
+    'heights': 'd',
+    # графическое описание и вектор привязки: номер строки (-1 - нет)
+    'graphics': 'q',
+    # подписи: номер строки объекта и подобъектов (-1 - нет)
+    'text': 'q',
+    'part_text': 'q',
+    # семантика: границы характеристик объектов, коды, виды и значения
+    'sem_offsets': 'Q',
+    'sem_codes': 'H',
+    'sem_kinds': 'B',
+    'sem_values': 'd',
+    # оформление записи: номера строк заголовков характеристик семантики,
+    # объявленных длин подписей и резервных слов заголовков подобъектов
+    'sem_formats': 'q',
+    'text_sizes': 'q',
+    'subitem_words': 'q',
+    # таблица строк
+    'str_offsets': 'Q',
+    'str_data': 'B'
+}
+
+
+def _has_decoded_text(obj: SXFObject) -> bool:
+    if obj.has_text:
+        return isinstance(obj.text, str)
+    if obj.subitems_count and obj.type in (ObjectType.LABEL, ObjectType.TEMPLATE):
+        return any(isinstance(item['text'], str) for item in obj.text_subitems)
+    return False
+
+
+class SheetColumns:
+    """
+    Колоночное представление прочитанного листа.
+
+    Координаты всех объектов хранятся в одном буфере, части (метрика
+    и подобъекты) задаются границами в нём, строки подписей и семантики
+    вынесены в общую таблицу строк.
+    """
+
+    def __init__(self, columns: Dict[str, Any], source: Any = None):
+        self.columns = columns
+        # источник данных колонок (например, mmap), должен жить вместе с ними
+        self.source = source
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.__dict__['columns'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __len__(self) -> int:
+        return len(self.columns['offset'])
+
+    @classmethod
+    def from_objects(cls, objects: Iterable[SXFObject]) -> 'SheetColumns':
+        """
+        Построение колонок по прочитанным объектам.
+        """
+
+        columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        columns['part_offsets'].append(0)
+        columns['object_parts'].append(0)
+        columns['height_offsets'].append(0)
+        columns['sem_offsets'].append(0)
+        columns['str_offsets'].append(0)
+
+        strings = {}
+        str_data = bytearray()
+
+        def string_id(value: Union[bytes, str]) -> int:
+            index = strings.get(value)
+            if index is None:
+                index = strings[value] = len(strings)
+                str_data.extend(value.encode() if isinstance(value, str) else value)
+                columns['str_offsets'].append(len(str_data))
+            return index
+
+        coords = columns['coords']
+        part_offsets = columns['part_offsets']
+
+        for obj in objects:
+            columns['offset'].append(obj.offset)
+            columns['full_len'].append(obj.full_len)
+            columns['metrics_len'].append(obj.metrics_len)
+            columns['class_code'].append(obj.class_code)
+            columns['id'].append(obj.id)
+            columns['group_id'].append(obj.group_id)
+            columns['type'].append(obj.type)
+            columns['flags'].append(
+                HAS_SEMANTICS * obj.has_semantics | RAW_DATA_SIZE * obj.raw_data_size |
+                RAW_DATA_TYPE * obj.raw_data_type | HAS_TEXT * obj.has_text | HAS_GRAPHICS * obj.has_graphics |
+                TEXT_DECODED * _has_decoded_text(obj) | IS_3D * obj.is_3d | HAS_VECTOR * obj.has_vector
+            )
+            columns['general_levels'].append((obj.general_levels[0] << 4) | obj.general_levels[1])
+            columns['big_points_count'].append(obj.big_points_count)
+            columns['subitems_count'].append(obj.subitems_count)
+            columns['points_count'].append(obj.points_count)
+            columns['text'].append(string_id(obj.text) if obj.has_text else -1)
+
+            parts: List[Tuple[Any, Optional[bytes]]] = [(obj.points, None)]
+            if obj.subitems_count:
+                if obj.type in (ObjectType.LABEL, ObjectType.TEMPLATE):
+                    parts.extend((item['points'], item['text']) for item in obj.text_subitems)
+                else:
+                    parts.extend((points, None) for points in obj.subitems)
+
+            for points, text in parts:
+                for point in points:
+                    coords.extend(point)
+                part_offsets.append(len(coords) // 2)
+                columns['part_text'].append(-1 if text is None else string_id(text))
+            columns['object_parts'].append(len(part_offsets) - 1)
+
+            if obj.is_3d:
+                for heights in obj.heights:
+                    columns['heights'].fromlist(heights.tolist())
+            columns['height_offsets'].append(len(columns['heights']))
+            raw_graphics = getattr(obj, 'raw_graphics', None) if obj.has_graphics or obj.has_vector else None
+            columns['graphics'].append(-1 if raw_graphics is None else string_id(raw_graphics))
+
+            for code, value in (obj.semantics.items() if obj.has_semantics else ()):
+                columns['sem_codes'].append(code)
+                if isinstance(value, bytes):
+                    columns['sem_kinds'].append(SEMANTIC_BYTES)
+                    columns['sem_values'].append(string_id(value))
+                elif isinstance(value, str):
+                    columns['sem_kinds'].append(SEMANTIC_STR)
+                    columns['sem_values'].append(string_id(value))
+                elif isinstance(value, float):
+                    columns['sem_kinds'].append(SEMANTIC_FLOAT)
+                    columns['sem_values'].append(value)
+                else:
+                    columns['sem_kinds'].append(SEMANTIC_INT)
+                    columns['sem_values'].append(value)
+            columns['sem_offsets'].append(len(columns['sem_codes']))
+            columns['sem_formats'].append(string_id(getattr(obj, 'semantic_formats', b'')))
+            columns['text_sizes'].append(string_id(getattr(obj, 'text_sizes', b'')))
+            columns['subitem_words'].append(string_id(getattr(obj, 'subitem_words', b'')))
+
+        columns['str_data'] = array('B', bytes(str_data))
+        return cls(columns)
+
+    def string(self, index: int, decoded: bool = False) -> Union[bytes, str]:
+        offsets = self.columns['str_offsets']
+        raw = bytes(self.columns['str_data'][offsets[index]:offsets[index + 1]])
+        return raw.decode() if decoded else raw
+
+    def part(self, index: int) -> List[Tuple[float, float]]:
+        """
+        Точки части с номером `index`.
+        """
+
+        offsets = self.columns['part_offsets']
+        flat = self.columns['coords'][offsets[index] * 2:offsets[index + 1] * 2].tolist()
+        return list(zip(flat[0::2], flat[1::2]))
+
+    def object(self, index: int) -> SXFObject:
+        """
+        Восстановление объекта с номером `index`.
+        """
+
+        c = self.columns
+        obj = SXFObject.__new__(SXFObject)
+        obj.raw_data = None
+        obj.start_id = 0xFF7FFF7F
+        obj.offset = c['offset'][index]
+        obj.full_len = c['full_len'][index]
+        obj.metrics_len = c['metrics_len'][index]
+        obj.class_code = c['class_code'][index]
+        obj.id = c['id'][index]
+        obj.group_id = c['group_id'][index]
+        obj.type = c['type'][index]
+
+        flags = c['flags'][index]
+        obj.has_semantics = bool(flags & HAS_SEMANTICS)
+        obj.raw_data_size = bool(flags & RAW_DATA_SIZE)
+        obj.raw_data_type = bool(flags & RAW_DATA_TYPE)
+        obj.has_text = bool(flags & HAS_TEXT)
+        obj.has_graphics = bool(flags & HAS_GRAPHICS)
+        obj.is_3d = bool(flags & IS_3D)
+        obj.has_vector = bool(flags & HAS_VECTOR)
+        text_decoded = bool(flags & TEXT_DECODED)
+        obj.data_size, obj.data_type = DATA_FORMATS[(obj.raw_data_size, obj.raw_data_type)]
+
+        levels = c['general_levels'][index]
+        obj.general_levels = (levels >> 4, levels & 0x0F)
+        obj.big_points_count = c['big_points_count'][index]
+        obj.subitems_count = c['subitems_count'][index]
+        obj.points_count = c['points_count'][index]
+
+        is_integer = obj.data_type in ('<H', '<i')
+        parts = []
+        for part in range(c['object_parts'][index], c['object_parts'][index + 1]):
+            points = self.part(part)
+            if is_integer:
+                points = [(int(x), int(y)) for x, y in points]
+            parts.append((points, c['part_text'][part]))
+
+        obj.points = parts[0][0]
+        if obj.is_3d:
+            values = c['heights'][c['height_offsets'][index]:c['height_offsets'][index + 1]].tolist()
+            if is_integer:
+                values = [int(value) for value in values]
+            # высоты частей идут подряд в порядке точек
+            obj.heights = []
+            start = 0
+            for points, _ in parts:
+                obj.heights.append(array(obj.data_type[1], values[start:start + len(points)]))
+                start += len(points)
+        if c['graphics'][index] >= 0:
+            obj.raw_graphics = self.string(c['graphics'][index])
+        if obj.has_text:
+            obj.text = self.string(c['text'][index], text_decoded)
+        if obj.subitems_count:
+            if obj.type in (ObjectType.LABEL, ObjectType.TEMPLATE):
+                obj.text_subitems = [{'points': points, 'text': self.string(text, text_decoded)}
+                                     for points, text in parts[1:]]
+            else:
+                obj.subitems = [points for points, _ in parts[1:]]
+
+        if obj.has_semantics:
+            obj.semantics = {}
+            for row in range(c['sem_offsets'][index], c['sem_offsets'][index + 1]):
+                kind, value = c['sem_kinds'][row], c['sem_values'][row]
+                if kind == SEMANTIC_BYTES:
+                    value = self.string(int(value))
+                elif kind == SEMANTIC_STR:
+                    value = self.string(int(value), True)
+                elif kind == SEMANTIC_INT:
+                    value = int(value)
+                obj.semantics[c['sem_codes'][row]] = value
+            obj.semantic_formats = self.string(c['sem_formats'][index])
+        obj.text_sizes = self.string(c['text_sizes'][index])
+        obj.subitem_words = self.string(c['subitem_words'][index])
+
+        return obj
+
+    def save(self, path: str, source_path: str):
+        """
+        Сохранение колонок в файл снимка.
+
+        В заголовок записываются размер и время изменения исходного
+        листа, по которым снимок проверяется при загрузке, и число
+        записей. Колонки должны содержать все записи листа. Снимок
+        пишется во временный файл рядом и заменяет прежний целиком.
+        """
+
+        stat = os.stat(source_path)
+        byteorder = 1 if sys.byteorder == 'little' else 2
+
+        directory = []
+        offset = SNAPSHOT_HEADER.size + COLUMN_ENTRY.size * len(COLUMNS)
+        for name, typecode in COLUMNS.items():
+            # данные колонок выравниваются на 8 байт для приведения типа memoryview
+            offset = (offset + 7) & ~7
+            size = len(self.columns[name]) * self.columns[name].itemsize
+            directory.append((name, typecode, offset, size))
+            offset += size
+
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path), dir=os.path.dirname(path) or '.')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(SNAPSHOT_HEADER.pack(SNAPSHOT_ID, SNAPSHOT_VERSION, byteorder,
+                                              stat.st_size, stat.st_mtime_ns, len(directory), len(self)))
+                for name, typecode, offset, size in directory:
+                    fp.write(COLUMN_ENTRY.pack(name.encode(), typecode.encode(), offset, size))
+                for name, typecode, offset, size in directory:
+                    fp.write(b'\x00' * (offset - fp.tell()))
+                    fp.write(memoryview(self.columns[name]).cast('B'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, source_path: str, records_count: Optional[int] = None) -> Optional['SheetColumns']:
+        """
+        Загрузка снимка через mmap без копирования колонок.
+
+        Возвращает None, если снимок устарел (исходный лист изменился),
+        записан в другой версии формата или содержит не все записи
+        листа (`records_count` - число записей по дескриптору листа),
+        а также если файл снимка обрезан.
+        """
+
+        with open(path, 'rb') as fp:
+            if os.fstat(fp.fileno()).st_size < SNAPSHOT_HEADER.size:
+                return None
+            data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        snapshot_id, version, byteorder, size, mtime_ns, count, snapshot_records = SNAPSHOT_HEADER.unpack_from(data)
+        if snapshot_id != SNAPSHOT_ID:
+            data.close()
+            raise TypeError('Invalid file type!')
+
+        stat = os.stat(source_path)
+        native = 1 if sys.byteorder == 'little' else 2
+        if (version, byteorder, size, mtime_ns) != (SNAPSHOT_VERSION, native, stat.st_size, stat.st_mtime_ns) or \
+                len(data) < SNAPSHOT_HEADER.size + count * COLUMN_ENTRY.size:
+            data.close()
+            return None
+
+        directory = []
+        for i in range(count):
+            raw_name, typecode, offset, length = COLUMN_ENTRY.unpack_from(data, SNAPSHOT_HEADER.size + i * COLUMN_ENTRY.size)
+            directory.append((raw_name.rstrip(b'\x00').decode(), typecode.decode(), offset, length))
+
+        # обрезанный файл: колонки выходят за его конец
+        if any(offset + length > len(data) or length % struct.calcsize(typecode)
+               for _, typecode, offset, length in directory) or \
+                {name for name, *_ in directory} != set(COLUMNS):
+            data.close()
+            return None
+
+        view = memoryview(data)
+        columns = {name: view[offset:offset + length].cast(typecode) for name, typecode, offset, length in directory}
+
+        if len(columns['offset']) != snapshot_records or \
+                (records_count is not None and snapshot_records != records_count):
+            del view, columns
+            data.close()
+            return None
+
+        return cls(columns, data)
+
+
+class ColumnObjects(Sequence):
+    """
+    Список объектов листа, восстанавливаемых из колонок по обращению.
+    """
+
+    def __init__(self, columns: SheetColumns):
+        self.columns = columns
+        self.__cache: Dict[int, SXFObject] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Object index out of range!')
+
+        obj = self.__cache.get(index)
+        if obj is None:
+            obj = self.__cache[index] = self.columns.object(index)
+        return obj
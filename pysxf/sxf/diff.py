@@ -0,0 +1,150 @@
+import mmap
+import struct
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+from .sxf import SXF
+from .sxf_object import SXFObject
+
+# длина записи, классификационный код, номер, номер группы
+RECORD_HEADER = struct.Struct('<4xI4xIHH')
+
+# ключ сопоставления: классификационный код, номер группы, номер объекта
+# и порядковый номер среди записей с одинаковыми кодами
+ObjectKey = Tuple[int, int, int, int]
+
+
+class RecordRef(NamedTuple):
+    offset: int
+    full_len: int
+
+
+class ObjectChange(NamedTuple):
+    key: ObjectKey
+    old: SXFObject
+    new: SXFObject
+    header: bool
+    geometry: bool
+    semantics: bool
+
+
+def _scan(sxf: SXF, data: mmap.mmap) -> Dict[ObjectKey, RecordRef]:
+    """
+    Смещения записей листа по ключам без декодирования объектов.
+    """
+
+    records = {}
+    seen = defaultdict(int)
+    offset = sxf.passport_len + sxf.descriptor_len
+
+    for _ in range(sxf.records_count):
+        full_len, class_code, id_, group_id = RECORD_HEADER.unpack_from(data, offset)
+        base = (class_code, group_id, id_)
+        records[base + (seen[base],)] = RecordRef(offset, full_len)
+        seen[base] += 1
+        offset += full_len
+
+    return records
+
+
+def _geometry(obj: SXFObject) -> tuple:
+    parts = [obj.points]
+    parts.extend(getattr(obj, 'subitems', ()))
+    parts.extend((item['points'], item['text']) for item in getattr(obj, 'text_subitems', ()))
+    heights = tuple(part.tolist() for part in obj.heights) if obj.is_3d else None
+    # графическое описание и вектор привязки сравниваются побайтно
+    return tuple(parts), getattr(obj, 'text', None), heights, getattr(obj, 'raw_graphics', None)
+
+
+def _semantics(obj: SXFObject) -> tuple:
+    # типы и масштабы характеристик различают значения, равные после декодирования
+    return getattr(obj, 'semantics', {}), getattr(obj, 'semantic_formats', b'')
+
+
+def _header(obj: SXFObject) -> tuple:
+    return obj.type, obj.general_levels, obj.has_text, obj.has_graphics, obj.is_3d, obj.has_vector
+
+
+class SheetDiff:
+    """
+    Разница между двумя версиями листа.
+
+    Записи сопоставляются по классификационному коду, номеру группы
+    и номеру объекта. Сначала сравниваются заголовки и байты записей,
+    декодируются только записи, байты которых отличаются.
+    """
+
+    def __init__(self,
+                 added: List[SXFObject],
+                 removed: List[SXFObject],
+                 changed: List[ObjectChange],
+                 unchanged_count: int):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.unchanged_count = unchanged_count
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self) -> str:
+        return '\n'.join([
+            f'Added: {len(self.added)}',
+            f'Removed: {len(self.removed)}',
+            f'Changed: {len(self.changed)}',
+            f'Geometry changed: {sum(change.geometry for change in self.changed)}',
+            f'Semantics changed: {sum(change.semantics for change in self.changed)}',
+            f'Unchanged: {self.unchanged_count}'
+        ])
+
+    @classmethod
+    def compare(cls, old: Union[SXF, str], new: Union[SXF, str]) -> 'SheetDiff':
+        """
+        Сравнение двух версий листа (объектов `SXF` или путей к файлам).
+        """
+
+        old = old if isinstance(old, SXF) else SXF(old)
+        new = new if isinstance(new, SXF) else SXF(new)
+
+        with open(old.path, 'rb') as old_file, open(new.path, 'rb') as new_file:
+            with mmap.mmap(old_file.fileno(), 0, access=mmap.ACCESS_READ) as old_data, \
+                    mmap.mmap(new_file.fileno(), 0, access=mmap.ACCESS_READ) as new_data:
+                return cls.__compare(old, new, old_file, new_file, old_data, new_data)
+
+    @classmethod
+    def __compare(cls, old, new, old_file, new_file, old_data, new_data) -> 'SheetDiff':
+        old_records = _scan(old, old_data)
+        new_records = _scan(new, new_data)
+
+        def decode(sxf: SXF, fp, ref: RecordRef) -> SXFObject:
+            fp.seek(ref.offset)
+            return SXFObject(fp, strings=sxf.strings)
+
+        removed = [decode(old, old_file, old_records[key]) for key in old_records.keys() - new_records.keys()]
+        added = [decode(new, new_file, new_records[key]) for key in new_records.keys() - old_records.keys()]
+
+        changed = []
+        unchanged_count = 0
+        for key in old_records.keys() & new_records.keys():
+            old_ref, new_ref = old_records[key], new_records[key]
+            if old_ref.full_len == new_ref.full_len and \
+                    old_data[old_ref.offset:old_ref.offset + old_ref.full_len] == \
+                    new_data[new_ref.offset:new_ref.offset + new_ref.full_len]:
+                unchanged_count += 1
+                continue
+
+            old_obj, new_obj = decode(old, old_file, old_ref), decode(new, new_file, new_ref)
+            header = _header(old_obj) != _header(new_obj)
+            geometry = _geometry(old_obj) != _geometry(new_obj)
+            semantics = _semantics(old_obj) != _semantics(new_obj)
+            if header or geometry or semantics:
+                changed.append(ObjectChange(key, old_obj, new_obj, header, geometry, semantics))
+            else:
+                # байты отличаются только форматом хранения (например, точностью координат)
+                unchanged_count += 1
+
+        changed.sort(key=lambda change: old_records[change.key].offset)
+        removed.sort(key=lambda obj: obj.offset)
+        added.sort(key=lambda obj: obj.offset)
+
+        return cls(added, removed, changed, unchanged_count)
@@ -1,29 +1,39 @@
 import datetime
+import mmap
+import os
+import random
 import struct
-from typing import List, Optional
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple
 
-from pysxf import RSC
-from .sxf_object import SXFObject
+from pysxf import RSC, profiling
+from pysxf.aio import run_in_executor, single_flight
+from pysxf.strings import StringPool
+from .budget import MemoryBudget
+from .columns import ColumnObjects, SheetColumns
+from .sxf_object import Point, SXFObject
 
 
 class SXF:
 
     def __init__(self,
                  path: str,
-                 rsc_path: Optional[str] = None):
+                 rsc_path: Optional[str] = None,
+                 strings: Optional[StringPool] = None):
         self.path = path
         self.rsc_path = rsc_path
+        self.rsc: Optional[RSC] = None
+        # пул строк: подписи и строковая семантика декодируются в str
+        self.strings = strings
 
-        map_file = open(self.path, 'rb')
+        with open(self.path, 'rb') as map_file:
+            raw_passport_data = map_file.read(400)
+            raw_descriptor_data = map_file.read(52)
 
-        raw_passport_data = map_file.read(400)
         self.__parse_passport(raw_passport_data)
-
-        raw_descriptor_data = map_file.read(52)
         self.__parse_descriptor(raw_descriptor_data)
 
-        map_file.close()
-
     def __parse_passport(self, data: bytes):
         """
         Парсинг паспортных данных.
@@ -151,18 +161,98 @@ class SXF:
         ])
 
     def __parse_rsc(self):
-        rsc = RSC(self.rsc_path)
-        rsc.parse_objects()
-        rsc.parse_palette()
-        rsc.parse_display_params()
-        return rsc
+        return RSC(self.rsc_path, self.strings).parse()
+
+    def iter_headers(self) -> Iterator[SXFObject]:
+        """
+        Обход записей листа с чтением только заголовков.
+        """
+
+        with open(self.path, 'rb') as map_file:
+            map_file.seek(self.passport_len + self.descriptor_len)
+            for _ in range(self.records_count):
+                yield SXFObject(map_file, header_only=True, strings=self.strings)
+
+    def iter_metrics(self,
+                     obj: SXFObject,
+                     chunk_size: int = 65536) -> Iterator[Tuple[int, List[Point], Optional[array]]]:
+        """
+        Потоковое чтение метрики объекта из отображённого в память файла
+        (см. `SXFObject.iter_metrics`).
+
+        Подходит для больших объектов, прочитанных только по заголовку
+        (например, из `iter_headers`): память ограничена размером блока.
+        """
+
+        with open(self.path, 'rb') as map_file:
+            with mmap.mmap(map_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield from obj.iter_metrics(data, chunk_size)
+
+    def record_offsets(self) -> array:
+        """
+        Смещения всех записей листа по цепочке заголовков
+        (читается только поле длины каждой записи).
+        """
+
+        offsets = array('Q')
+        with open(self.path, 'rb') as map_file:
+            with mmap.mmap(map_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                offset = self.passport_len + self.descriptor_len
+                for _ in range(self.records_count):
+                    offsets.append(offset)
+                    offset += struct.unpack_from('<I', data, offset + 4)[0]
+        return offsets
+
+    def preview(self,
+                every: int = 1,
+                sample: Optional[int] = None,
+                stride: int = 1,
+                seed: Optional[int] = None) -> List[SXFObject]:
+        """
+        Приближённое чтение листа для эскизов и контроля.
+
+        Читается каждая `every`-я запись или, если задан `sample`,
+        случайная выборка из `sample` записей (`seed` - зерно генератора).
+        Метрика прореживается с шагом `stride`, семантика не читается.
+        Результат не сохраняется в `objects`.
+        """
 
-    def parse(self) -> List[SXFObject]:
+        offsets = self.record_offsets()
+        if sample is not None:
+            indices = sorted(random.Random(seed).sample(range(len(offsets)), min(sample, len(offsets))))
+        else:
+            indices = range(0, len(offsets), every)
+
+        objects = []
+        with open(self.path, 'rb') as map_file:
+            with mmap.mmap(map_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for index in indices:
+                    data.seek(offsets[index])
+                    obj = SXFObject(data, header_only=True, strings=self.strings)
+                    obj.decode_preview(data, stride)
+                    obj.raw_data = None
+                    objects.append(obj)
+        return objects
+
+    @profiling.profiled('sxf.parse')
+    def parse(self,
+              predicate: Optional[Callable[[SXFObject], bool]] = None,
+              budget: Optional[MemoryBudget] = None) -> List[SXFObject]:
         """
         Парсинг записей, метрик и семантик.
+
+        Если задан `predicate`, он вызывается для каждой записи
+        с прочитанным заголовком, и тело декодируется только у записей,
+        для которых он вернул True.
+
+        Если задан бюджет памяти `budget`, записи учитываются в нём,
+        и тела давно прочитанных записей вытесняются с повторным
+        декодированием из файла при обращении (файл листа не должен
+        меняться, пока записи используются). Записи снимаются с учёта
+        при удалении листа или через `budget.untrack_sheet(sxf.path)`.
         """
 
-        if self.rsc_path is not None:
+        if self.rsc_path is not None and self.rsc is None:
             self.rsc = self.__parse_rsc()
 
         map_file = open(self.path, 'rb')
@@ -171,9 +261,155 @@ class SXF:
         self.objects = []
 
         for _ in range(self.records_count):
-            obj = SXFObject(map_file)
+            if predicate is None:
+                obj = SXFObject(map_file, strings=self.strings)
+            else:
+                obj = SXFObject(map_file, header_only=True, strings=self.strings)
+                if not predicate(obj):
+                    continue
+                obj.decode(map_file)
+                map_file.seek(obj.offset + obj.full_len)
+            if budget is not None:
+                budget.track(obj, self.path)
             self.objects.append(obj)
 
         map_file.close()
 
         return self.objects
+
+    def save_snapshot(self, snapshot_path: Optional[str] = None) -> str:
+        """
+        Сохранение прочитанного листа в колоночный снимок.
+
+        По умолчанию снимок записывается рядом с листом (`<путь>.snap`).
+        Снимок сохраняется только для листа, прочитанного целиком
+        (не после `parse` с `predicate`).
+        """
+
+        objects = getattr(self, 'objects', None)
+        if objects is None:
+            raise ValueError('Sheet is not parsed!')
+        # записи должны совпадать с записями файла листа
+        if [obj.offset for obj in objects] != self.record_offsets().tolist():
+            raise ValueError('Sheet is parsed partially!')
+
+        if snapshot_path is None:
+            snapshot_path = self.path + '.snap'
+
+        columns = getattr(self, 'columns', None)
+        if columns is None:
+            columns = SheetColumns.from_objects(self.objects)
+        columns.save(snapshot_path, self.path)
+
+        return snapshot_path
+
+    @classmethod
+    def load_snapshot(cls,
+                      path: str,
+                      snapshot_path: Optional[str] = None,
+                      rsc_path: Optional[str] = None) -> Optional['SXF']:
+        """
+        Загрузка листа из колоночного снимка.
+
+        Колонки отображаются в память, объекты восстанавливаются
+        при обращении к ним. Возвращает None, если снимка нет,
+        исходный лист изменился после его записи или снимок неполный.
+        """
+
+        if snapshot_path is None:
+            snapshot_path = path + '.snap'
+        if not os.path.exists(snapshot_path):
+            return None
+
+        sxf = cls(path, rsc_path)
+        columns = SheetColumns.load(snapshot_path, path, sxf.records_count)
+        if columns is None:
+            return None
+
+        sxf.columns = columns
+        sxf.objects = ColumnObjects(columns)
+
+        return sxf
+
+    @classmethod
+    async def aopen(cls,
+                    path: str,
+                    rsc_path: Optional[str] = None,
+                    executor: Optional[Executor] = None,
+                    strings: Optional[StringPool] = None) -> 'SXF':
+        """
+        Асинхронное открытие листа.
+
+        Чтение паспорта и классификатора выполняется в пуле `executor`,
+        одновременные открытия одного и того же листа объединяются
+        в одну задачу.
+        """
+
+        async def open_sheet():
+            sxf = await run_in_executor(executor, cls, path, rsc_path)
+            sxf.strings = strings
+            if rsc_path is not None:
+                sxf.rsc = await RSC.aopen(rsc_path, executor, strings)
+            return sxf
+
+        key = (cls, 'open', os.path.abspath(path), rsc_path and os.path.abspath(rsc_path), id(strings))
+        return await single_flight(key, open_sheet)
+
+    @profiling.profiled('sxf.aiter_objects')
+    async def aiter_objects(self,
+                            executor: Optional[Executor] = None,
+                            batch_size: int = 256) -> AsyncIterator[SXFObject]:
+        """
+        Асинхронный обход записей листа.
+
+        Записи декодируются в пуле `executor` пачками по `batch_size`,
+        между пачками управление возвращается циклу событий.
+        """
+
+        offset = self.passport_len + self.descriptor_len
+        remaining = self.records_count
+
+        # в пул процессов передаётся пустой пул строк: строки пачки
+        # интернируются в общем пуле в этом процессе
+        reintern = self.strings is not None and isinstance(executor, ProcessPoolExecutor)
+        strings = StringPool() if reintern else self.strings
+
+        while remaining > 0:
+            count = min(batch_size, remaining)
+            batch, offset = await run_in_executor(executor, _parse_batch, self.path, offset, count, strings)
+            remaining -= count
+            for obj in batch:
+                if reintern:
+                    obj.intern_strings(self.strings)
+                yield obj
+
+    @profiling.profiled('sxf.aparse')
+    async def aparse(self,
+                     executor: Optional[Executor] = None,
+                     batch_size: int = 256) -> List[SXFObject]:
+        """
+        Асинхронный парсинг записей, метрик и семантик.
+        """
+
+        if self.rsc_path is not None and self.rsc is None:
+            self.rsc = await RSC.aopen(self.rsc_path, executor, self.strings)
+
+        self.objects = [obj async for obj in self.aiter_objects(executor, batch_size)]
+
+        return self.objects
+
+
+def _parse_batch(path: str,
+                 offset: int,
+                 count: int,
+                 strings: Optional[StringPool] = None) -> Tuple[List[SXFObject], int]:
+    """
+    Парсинг `count` записей начиная со смещения `offset`.
+
+    Возвращает записи и смещение следующей записи.
+    """
+
+    with open(path, 'rb') as map_file:
+        map_file.seek(offset)
+        objects = [SXFObject(map_file, strings=strings) for _ in range(count)]
+        return objects, map_file.tell()
@@ -1,6 +1,12 @@
 import struct
+import sys
+import time
+from array import array
 from enum import IntEnum
-from typing import BinaryIO
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pysxf import profiling
+from pysxf.strings import SEMANTIC_ENCODINGS, StringPool
 
 
 class ObjectType(IntEnum):
@@ -12,25 +18,232 @@ class ObjectType(IntEnum):
     TEMPLATE = 5
 
 
+Point = Tuple[float, float]
+
+# атрибуты декодированного тела записи (могут быть вытеснены из памяти)
+BODY_ATTRIBUTES = ('points', 'subitems', 'text', 'text_subitems', 'semantics', 'semantic_formats', 'text_sizes',
+                   'subitem_words', 'heights',
+                   'raw_graphics')
+
+
+def read_points(data: BinaryIO,
+                count: int,
+                data_type: str,
+                data_size: int,
+                heights: Optional[array] = None,
+                stride: int = 1) -> List[Point]:
+    """
+    Чтение `count` точек метрики одним блоком.
+
+    Для трёхмерной метрики нужно передать `heights`: высоты точек
+    добавляются в этот массив, а возвращаются плановые координаты.
+    При `stride` > 1 читается каждая `stride`-я точка и последняя.
+    """
+
+    if stride > 1:
+        return _read_strided(data, count, data_type, data_size, heights, stride)
+
+    if heights is None:
+        flat = struct.unpack(f'<{count * 2}{data_type[1]}', data.read(count * 2 * data_size))
+        return list(zip(flat[0::2], flat[1::2]))
+
+    flat = struct.unpack(f'<{count * 3}{data_type[1]}', data.read(count * 3 * data_size))
+    heights.extend(flat[2::3])
+    return list(zip(flat[0::3], flat[1::3]))
+
+
+def _read_strided(data: BinaryIO,
+                  count: int,
+                  data_type: str,
+                  data_size: int,
+                  heights: Optional[array],
+                  stride: int) -> List[Point]:
+    """
+    Прореживание метрики шагом по буферу координат: в объекты Python
+    превращаются только выбранные точки.
+    """
+
+    dimension = 2 if heights is None else 3
+    values = array(data_type[1])
+    values.frombytes(data.read(count * dimension * data_size))
+    if sys.byteorder != 'little':
+        values.byteswap()
+
+    step = dimension * stride
+    xs, ys = values[0::step].tolist(), values[1::step].tolist()
+    if heights is not None:
+        heights.extend(values[2::step])
+    # последняя точка сохраняется, чтобы не разрывать контуры
+    if count and (count - 1) % stride:
+        xs.append(values[-dimension])
+        ys.append(values[1 - dimension])
+        if heights is not None:
+            heights.append(values[-1])
+    return list(zip(xs, ys))
+
+
 class SXFObject:
 
-    def __init__(self, data: BinaryIO):
+    # пул для декодирования подписей и строк семантики (None - хранить байты)
+    __strings: Optional[StringPool] = None
+    # загрузчик вытесненного тела записи (см. `MemoryBudget`)
+    __loader: Optional[Callable[['SXFObject'], None]] = None
+    __released = False
+    # шаг прореживания метрики при предварительном просмотре
+    __stride = 1
+
+    def __init__(self,
+                 data: BinaryIO,
+                 header_only: bool = False,
+                 strings: Optional[StringPool] = None):
+        self.raw_data = data
+        self.offset = data.tell()
+        if strings is not None:
+            self.__strings = strings
+
+        stats = profiling.current()
+        start = time.perf_counter() if stats is not None else 0.0
+
+        self.__run_phase(stats, 'header', self.__parse_header)
+        if header_only:
+            self.raw_data.seek(self.offset + self.full_len)
+        else:
+            self.__parse_body(stats)
+            if stats is not None:
+                stats.add_record(self, time.perf_counter() - start)
+
+    def decode(self, data: BinaryIO):
+        """
+        Парсинг тела записи, прочитанной только по заголовку.
+        """
+
+        self.raw_data = data
+        self.raw_data.seek(self.offset + 32)
+        self.__released = False
+
+        stats = profiling.current()
+        start = time.perf_counter() if stats is not None else 0.0
+
+        self.__parse_body(stats)
+        if stats is not None:
+            stats.add_record(self, time.perf_counter() - start)
+
+    def decode_preview(self, data: BinaryIO, stride: int = 1):
+        """
+        Приближённый парсинг тела записи для предварительного просмотра.
+
+        Метрика прореживается (каждая `stride`-я точка каждой части
+        и последняя), графика пропускается, семантика не читается.
+        """
+
         self.raw_data = data
+        self.raw_data.seek(self.offset + 32)
+        self.__released = False
+        self.__stride = stride
+        try:
+            self.__parse_body(full=False)
+        finally:
+            del self.__stride
 
-        self.__parse_header()
-        self.__parse_metrics()
+    def release(self) -> Dict[str, Any]:
+        """
+        Удаление декодированного тела записи из объекта.
+
+        Возвращает удалённые атрибуты. Если задан загрузчик, при следующем
+        обращении к ним тело будет восстановлено.
+        """
+
+        body = {name: self.__dict__.pop(name) for name in BODY_ATTRIBUTES if name in self.__dict__}
+        self.__released = True
+        return body
+
+    def restore(self, body: Dict[str, Any]):
+        """
+        Восстановление тела записи, удалённого `release`.
+        """
+
+        self.__dict__.update(body)
+        self.__released = False
+
+    def set_loader(self, loader: Optional[Callable[['SXFObject'], None]]):
+        self.__loader = loader
+
+    def intern_strings(self, strings: StringPool):
+        """
+        Привязка записи к пулу строк и повторное интернирование строк тела
+        (для записей, декодированных в другом процессе с копией пула).
+        """
+
+        self.__strings = strings
+        if isinstance(self.__dict__.get('text'), str):
+            self.text = strings.intern(self.text)
+        for item in self.__dict__.get('text_subitems', ()):
+            if isinstance(item['text'], str):
+                item['text'] = strings.intern(item['text'])
+        semantics = self.__dict__.get('semantics', {})
+        for feature_code, feature_value in semantics.items():
+            if isinstance(feature_value, str):
+                semantics[feature_code] = strings.intern(feature_value)
+
+    def __getattr__(self, name: str):
+        # вызывается только для отсутствующих атрибутов
+        if name in BODY_ATTRIBUTES and self.__released and self.__loader is not None:
+            self.__loader(self)
+            if name in self.__dict__:
+                return self.__dict__[name]
+        raise AttributeError(name)
+
+    def __run_phase(self,
+                    stats: Optional[profiling.ParseStats],
+                    phase: str,
+                    parse: Callable[[], None]):
+        """
+        Выполнение фазы парсинга с учётом времени и прочитанных байт.
+        """
+
+        if stats is None:
+            parse()
+            return
+
+        start_pos = self.raw_data.tell()
+        start = time.perf_counter()
+        parse()
+        stats.add_phase(phase, time.perf_counter() - start, self.raw_data.tell() - start_pos)
+
+    def __parse_body(self, stats: Optional[profiling.ParseStats] = None, full: bool = True):
+        """
+        Парсинг метрики, подписи, подобъектов и семантики.
+
+        При `full=False` графика и семантика пропускаются.
+        """
+
+        # объявленные длины подписей и резервные слова заголовков подобъектов,
+        # нужны для записи объекта без изменений (см. `SXFWriter.write_sxf_object`)
+        self.text_sizes = b''
+        self.subitem_words = b''
+
+        self.__run_phase(stats, 'metrics', self.__parse_metrics)
         if self.has_text:
-            self.__parse_text()
+            self.__run_phase(stats, 'text', self.__parse_text)
         if self.subitems_count:
             if self.type in (ObjectType.LABEL, ObjectType.TEMPLATE):
-                self.__parse_text_subitems()
+                self.__run_phase(stats, 'text_subitems', self.__parse_text_subitems)
             else:
-                self.__parse_subitems()
-        if self.has_graphics:
-            self.__parse_graphics()
-        # TODO: парсинг вектора привзяки 3D-моедли объекта
-        if self.has_semantics:
-            self.__parse_semantics()
+                self.__run_phase(stats, 'subitems', self.__parse_subitems)
+        if (self.has_graphics or self.has_vector) and full:
+            self.__run_phase(stats, 'graphics', self.__parse_graphics)
+        # семантика начинается сразу за областью метрики
+        self.raw_data.seek(self.offset + 32 + self.metrics_len)
+        if self.has_semantics and full:
+            self.__run_phase(stats, 'semantics', self.__parse_semantics)
+
+    def __getstate__(self):
+        # файловый объект не сериализуется (нужно для пула процессов)
+        state = self.__dict__.copy()
+        state.pop('raw_data', None)
+        state.pop('_SXFObject__strings', None)
+        state.pop('_SXFObject__loader', None)
+        return state
 
     def __str__(self):
         return '\n'.join([
@@ -46,6 +259,8 @@ class SXFObject:
             f'Points count: {self.points_count}',
             f'Text: {self.text if self.has_text else None}',
             f'Has graphics: {self.has_graphics}',
+            f'Has 3D vector: {self.has_vector}',
+            f'3D metrics: {self.is_3d}',
             f'Has semantics: {self.has_semantics}',
             f'Type: {self.type}'
         ])
@@ -83,8 +298,10 @@ class SXFObject:
         raw_help_data = data[20:23]
         help_data = struct.unpack('<BBB', raw_help_data)
         self.type = help_data[0] & 0x0F
+        self.is_3d = bool(help_data[1] & 1)
         self.has_semantics = bool(help_data[1] & 2)
         self.raw_data_size = bool(help_data[1] & 4)
+        self.has_vector = bool(help_data[1] & 8)
         self.raw_data_type = bool(help_data[2] & 4)
         self.has_text = bool(help_data[2] & 8)
         self.has_graphics = bool(help_data[2] & 16)
@@ -106,22 +323,98 @@ class SXFObject:
 
         # число точек метрики для больших объектов
         raw_big_points_count = data[24:28]
-        self.big_points_count = struct.unpack('<I', raw_big_points_count)
+        self.big_points_count = struct.unpack('<I', raw_big_points_count)[0]
 
         # описатель метрики
         raw_metrics_count = data[28:32]
         self.subitems_count, self.points_count = struct.unpack('<HH', raw_metrics_count)
 
+    @property
+    def metrics_points_count(self) -> int:
+        """
+        Число точек метрики с учётом больших объектов.
+        """
+
+        # для больших объектов фактическое число точек хранится отдельно
+        if self.points_count == 65535:
+            return self.big_points_count
+        return self.points_count
+
+    def __read_points(self, count: int) -> List[Point]:
+        """
+        Чтение точек части метрики, для трёхмерной метрики высоты
+        части сохраняются в `heights`.
+        """
+
+        if not self.is_3d:
+            return read_points(self.raw_data, count, self.data_type, self.data_size, stride=self.__stride)
+
+        heights = array(self.data_type[1])
+        self.heights.append(heights)
+        return read_points(self.raw_data, count, self.data_type, self.data_size, heights, self.__stride)
+
+    def __subitem_points_count(self, data: BinaryIO, keep_words: bool = False) -> int:
+        raw_n_data = data.read(4)
+        n1, n2 = struct.unpack('<HH', raw_n_data)
+        if keep_words:
+            self.subitem_words += raw_n_data[:2]
+
+        if self.points_count == 65535:
+            return n2 + (n1 << 16)
+        return n2
+
+    @staticmethod
+    def __skip_text(data: BinaryIO):
+        raw_text_size = data.read(1)
+        text_size = struct.unpack('<B', raw_text_size)[0]
+        data.seek(text_size + 1, 1)
+
+    def iter_metrics(self,
+                     data: BinaryIO,
+                     chunk_size: int = 65536) -> Iterator[Tuple[int, List[Point], Optional[array]]]:
+        """
+        Потоковое чтение метрики блоками по `chunk_size` точек.
+
+        Возвращает тройки (номер части, точки, высоты точек блока),
+        где часть 0 - метрика объекта, остальные - подобъекты; высоты
+        есть только у трёхмерной метрики (иначе None). Источником может
+        быть файл или mmap, в памяти одновременно находится не больше
+        одного блока.
+        """
+
+        if not self.full_len:
+            raise ValueError('Object has no source record!')
+
+        # источник не сохраняется в объекте: вызывающий может закрыть его
+        data.seek(self.offset + 32)
+
+        def chunks(part: int, count: int):
+            while count > 0:
+                size = min(chunk_size, count)
+                heights = array(self.data_type[1]) if self.is_3d else None
+                chunk = read_points(data, size, self.data_type, self.data_size, heights)
+                count -= size
+                yield part, chunk, heights
+
+        yield from chunks(0, self.metrics_points_count)
+
+        if self.has_text:
+            self.__skip_text(data)
+
+        for part in range(1, self.subitems_count + 1):
+            yield from chunks(part, self.__subitem_points_count(data))
+            if self.type in (ObjectType.LABEL, ObjectType.TEMPLATE):
+                self.__skip_text(data)
+
     def __parse_metrics(self):
         """
         Парсинг метрики объекта.
         """
 
-        self.points = []
-        for i in range(self.points_count):
-            x = struct.unpack(self.data_type, self.raw_data.read(self.data_size))[0]
-            y = struct.unpack(self.data_type, self.raw_data.read(self.data_size))[0]
-            self.points.append((x, y))
+        if self.is_3d:
+            # высоты частей метрики: объекта и подобъектов
+            self.heights = []
+        self.points = self.__read_points(self.metrics_points_count)
 
     def __parse_subitems(self):
         """
@@ -131,21 +424,15 @@ class SXFObject:
         self.subitems = []
 
         for _ in range(self.subitems_count):
-            points = []
-            raw_n_data = self.raw_data.read(4)
-            n1, n2 = struct.unpack('<HH', raw_n_data)
-
-            if self.points_count == 65535:
-                points_count = n2 + (n1 << 16)
-            else:
-                points_count = n2
-
-            for i in range(points_count):
-                x = struct.unpack(self.data_type, self.raw_data.read(self.data_size))[0]
-                y = struct.unpack(self.data_type, self.raw_data.read(self.data_size))[0]
-                points.append((x, y))
+            points_count = self.__subitem_points_count(self.raw_data, True)
+            points = self.__read_points(points_count)
             self.subitems.append(points)
 
+    def __decode_text(self, text: bytes):
+        if self.__strings is None:
+            return text
+        return self.__strings.decode(text)
+
     def __parse_text(self):
         """
         Парсинг подписи.
@@ -153,11 +440,12 @@ class SXFObject:
 
         raw_text_size = self.raw_data.read(1)
         text_size = struct.unpack('<B', raw_text_size)[0]
+        self.text_sizes += raw_text_size
 
         raw_text = self.raw_data.read(text_size + 1)
         text = struct.unpack(f'<{text_size + 1}s', raw_text)[0]
 
-        self.text = text.rstrip(b'\x00')
+        self.text = self.__decode_text(text.rstrip(b'\x00'))
 
     def __parse_text_subitems(self):
         """
@@ -167,43 +455,81 @@ class SXFObject:
         self.text_subitems = []
 
         for _ in range(self.subitems_count):
-            points = []
-            raw_n_data = self.raw_data.read(4)
-            n1, n2 = struct.unpack('<HH', raw_n_data)
-
-            if self.points_count == 65535:
-                points_count = n2 + (n1 << 16)
-            else:
-                points_count = n2
-
-            for i in range(points_count):
-                x = struct.unpack(self.data_type, self.raw_data.read(self.data_size))[0]
-                y = struct.unpack(self.data_type, self.raw_data.read(self.data_size))[0]
-                points.append((x, y))
+            points_count = self.__subitem_points_count(self.raw_data, True)
+            points = self.__read_points(points_count)
 
             raw_text_size = self.raw_data.read(1)
             text_size = struct.unpack('<B', raw_text_size)[0]
+            self.text_sizes += raw_text_size
 
             raw_text = self.raw_data.read(text_size + 1)
             text = struct.unpack(f'<{text_size + 1}s', raw_text)[0]
-            strip_text = text.rstrip(b'\x00')
+            strip_text = self.__decode_text(text.rstrip(b'\x00'))
             self.text_subitems.append({'points': points, 'text': strip_text})
 
     def __parse_graphics(self):
         """
-        Парсинг графического объекта.
+        Чтение графического описания и вектора привязки 3D-модели.
+
+        Оба раздела лежат в конце области метрики и сохраняются
+        без разбора, декодируются при обращении (`graphics`, `vector`).
         """
 
-        raise NotImplementedError
+        end = self.offset + 32 + self.metrics_len
+        self.raw_graphics = self.raw_data.read(max(0, end - self.raw_data.tell()))
+
+    def __raw_graphics(self) -> Optional[bytes]:
+        # вытесненное тело восстанавливается через __getattr__
+        return getattr(self, 'raw_graphics', None)
+
+    def __graphics_len(self, raw: bytes) -> int:
+        if not self.has_graphics:
+            return 0
+        # длина графического описания включает само поле длины
+        length = struct.unpack_from('<I', raw)[0] if len(raw) >= 4 else len(raw)
+        return length if 4 <= length <= len(raw) else len(raw)
+
+    @property
+    def graphics(self) -> Optional[bytes]:
+        """
+        Параметры графического описания объекта (без поля длины).
+        """
+
+        raw = self.__raw_graphics()
+        if not self.has_graphics or raw is None:
+            return None
+        return raw[4:self.__graphics_len(raw)]
+
+    @property
+    def vector(self) -> Optional[array]:
+        """
+        Вектор привязки 3D-модели: координаты точек в формате метрики.
+        """
+
+        raw = self.__raw_graphics()
+        if not self.has_vector or raw is None:
+            return None
+
+        raw = raw[self.__graphics_len(raw):]
+        vector = array(self.data_type[1])
+        vector.frombytes(raw[:len(raw) - len(raw) % vector.itemsize])
+        if sys.byteorder != 'little':
+            vector.byteswap()
+        return vector
 
     def __parse_semantics(self):
         """
         Парсинг семантики объекта.
+
+        Кроме значений сохраняются заголовки характеристик (код, тип
+        и масштаб, `semantic_formats`), по которым семантика
+        записывается обратно без изменения типов.
         """
 
         cur_sem_len = self.full_len - self.metrics_len - 32
 
         self.semantics = {}
+        formats = bytearray()
 
         while cur_sem_len > 0:
 
@@ -223,6 +549,8 @@ class SXFObject:
                 raw_feature_value = self.raw_data.read(feature_scale + null_size)
                 feature_value = struct.unpack(f'<{feature_scale + null_size}s', raw_feature_value)[0]
                 feature_value = feature_value.rstrip(b'\x00')
+                if self.__strings is not None:
+                    feature_value = self.__strings.decode(feature_value, SEMANTIC_ENCODINGS[feature_type])
                 cur_sem_len -= (feature_scale + null_size)
             elif feature_type in (1, 2, 4, 8, 16):
                 type_ = {
@@ -240,8 +568,11 @@ class SXFObject:
                 raise ValueError('Invalid feature type!')
 
             self.semantics[feature_code] = feature_value
+            formats += raw_feature_code + raw_block_len
 
             # пропускаем "лишние" байты в семантике :/
             if cur_sem_len <= 4:
                 self.raw_data.read(cur_sem_len)
                 break
+
+        self.semantic_formats = bytes(formats)
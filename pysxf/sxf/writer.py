@@ -0,0 +1,525 @@
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .sxf_object import ObjectType, SXFObject
+
+PASSPORT_LEN = 400
+DESCRIPTOR_LEN = 52
+
+# формат координат -> (размер элемента, точность)
+DATA_TYPE_FLAGS = {
+    '<H': (0, 0),
+    '<f': (0, 1),
+    '<i': (1, 0),
+    '<d': (1, 1)
+}
+
+# числовые типы семантики
+SEMANTIC_NUMBERS = {
+    1: '<b',
+    2: '<h',
+    4: '<i',
+    8: '<d'
+}
+
+Text = Union[str, bytes]
+SemanticValue = Union[Text, int, float, Tuple]
+
+
+def _pack_points(points: Any, data_type: str, heights: Optional[Sequence[float]] = None) -> Tuple[int, bytes]:
+    """
+    Упаковка координат метрики.
+
+    Принимает массив NumPy формы (N, 2) или последовательность пар.
+    Для трёхмерной метрики `heights` - высоты точек.
+    """
+
+    if heights is not None and len(heights) != len(points):
+        raise ValueError('Heights do not match metrics points!')
+
+    if hasattr(points, 'dtype'):
+        if heights is None:
+            # массив NumPy упаковывается одним вызовом без обхода точек
+            array = points.astype(data_type, order='C')
+            return len(array), array.tobytes()
+        points = points.tolist()
+
+    if heights is None:
+        flat = [c for point in points for c in point]
+    else:
+        flat = [c for (x, y), h in zip(points, heights) for c in (x, y, h)]
+    if data_type in ('<H', '<i'):
+        flat = [int(c) for c in flat]
+    return len(points), struct.pack(f'<{len(flat)}{data_type[1]}', *flat)
+
+
+def _pack_text(text: Text, size: int = 0) -> bytes:
+    if isinstance(text, str):
+        text = text.encode('cp1251')
+    terminator = b'\x00'
+    if size and len(text) == size + 1:
+        # ненулевой терминатор читается вместе с текстом
+        text, terminator = text[:size], text[size:]
+    # объявленная длина может включать нулевые байты после текста
+    text = text.ljust(size, b'\x00')
+    if len(text) > 255:
+        raise ValueError('Text is too long!')
+    return struct.pack('<B', len(text)) + text + terminator
+
+
+def _pack_semantic(code: int, value: SemanticValue) -> bytes:
+    """
+    Упаковка одной характеристики семантики.
+
+    Значение задаётся явно кортежем (тип, значение[, масштаб]) или
+    выводится из типа Python: строки - тип 0, целые - 1/2/4, вещественные - 8.
+    Для строк масштаб - минимальная длина, до которой значение
+    дополняется нулевыми байтами.
+    """
+
+    if isinstance(value, tuple):
+        feature_type, value, *rest = value
+        scale = rest[0] if rest else 0
+    elif isinstance(value, (str, bytes)):
+        feature_type, scale = 0, 0
+    elif isinstance(value, float):
+        feature_type, scale = 8, 0
+    elif isinstance(value, int):
+        feature_type, scale = next(
+            (size for size in (1, 2, 4) if -(1 << (size * 8 - 1)) <= value < (1 << (size * 8 - 1))), 8
+        ), 0
+    else:
+        raise ValueError('Invalid feature type!')
+
+    if feature_type in (0, 126, 127, 128):
+        null_size = 2 if feature_type >= 127 else 1
+        if isinstance(value, str):
+            value = value.encode('utf-16-le' if feature_type == 127 else 'cp1251')
+        elif feature_type == 127 and len(value) % 2:
+            # завершающий нулевой байт символа срезается при чтении вместе с терминатором
+            value += b'\x00'
+        value = value.ljust(scale & 0xff, b'\x00')
+        if len(value) > 255:
+            raise ValueError('Semantic string is too long!')
+        return struct.pack('>HBB', code, feature_type, len(value)) + value + b'\x00' * null_size
+
+    if feature_type in SEMANTIC_NUMBERS:
+        return struct.pack('>HBb', code, feature_type, scale) + struct.pack(SEMANTIC_NUMBERS[feature_type], value)
+
+    if feature_type == 16:
+        return struct.pack('>HBb16s', code, feature_type, scale, value)
+
+    raise ValueError('Invalid feature type!')
+
+
+def _stored_value(value: SemanticValue, feature_type: int, scale: int) -> SemanticValue:
+    """
+    Прочитанное значение в виде (тип, хранимое значение, масштаб).
+
+    Значение, не подходящее к исходному типу (например, заменённое
+    строкой число), упаковывается по типу Python.
+    """
+
+    if isinstance(value, (str, bytes)):
+        if feature_type in (0, 126, 127, 128) or (feature_type == 16 and isinstance(value, bytes)):
+            # длина строки сохраняется вместе со срезанными при чтении нулями
+            return feature_type, value, scale
+        return value
+
+    if feature_type == 8:
+        return feature_type, float(value) / 10 ** scale, scale
+    if feature_type in SEMANTIC_NUMBERS:
+        # при чтении значение умножено на 10 в степени масштаба
+        if scale < 0:
+            value = round(value * 10 ** -scale)
+        elif scale > 0:
+            value = round(value) // 10 ** scale
+        return feature_type, int(value), scale
+    return value
+
+
+def pack_semantics(semantics: Dict[int, SemanticValue], formats: Optional[bytes] = None) -> bytes:
+    """
+    Упаковка семантики объекта.
+
+    `formats` - заголовки характеристик прочитанного объекта
+    (`SXFObject.semantic_formats`): с ними сохраняются исходные типы
+    и масштабы значений, без них тип выводится из типа Python.
+    """
+
+    known = {}
+    if formats:
+        known = {code: (feature_type, scale) for code, feature_type, scale in struct.iter_unpack('>HBb', formats)}
+
+    return b''.join(
+        _pack_semantic(code, _stored_value(value, *known[code]) if code in known else value)
+        for code, value in semantics.items()
+    )
+
+
+def pack_record(class_code: int,
+                points: Any,
+                type_: int = ObjectType.LINE,
+                id_: int = 0,
+                group_id: int = 0,
+                subitems: Sequence[Any] = (),
+                text: Optional[Text] = None,
+                text_subitems: Sequence[Dict[str, Any]] = (),
+                semantics: Union[Dict[int, SemanticValue], bytes, None] = None,
+                general_levels: Tuple[int, int] = (15, 15),
+                data_type: str = '<d',
+                heights: Optional[Sequence[Sequence[float]]] = None,
+                graphics: Optional[bytes] = None,
+                vector: Optional[Sequence[float]] = None,
+                text_sizes: bytes = b'',
+                subitem_words: bytes = b'') -> bytes:
+    """
+    Сборка записи SXF.
+
+    Длины записи и метрики, а также признак большого объекта
+    вычисляются по содержимому. Семантика принимается словарём или
+    уже упакованными байтами (например, скопированными из исходного листа).
+
+    `heights` - высоты точек трёхмерной метрики по частям (метрика
+    объекта, затем подобъекты), `graphics` - параметры графического
+    описания (без поля длины), `vector` - координаты вектора привязки
+    3D-модели в формате метрики.
+
+    `text_sizes` - объявленные длины подписей (объекта, затем
+    подобъектов) и `subitem_words` - резервные слова заголовков
+    подобъектов (`SXFObject.text_sizes` и `SXFObject.subitem_words`)
+    сохраняют исходное оформление прочитанной записи.
+    """
+
+    try:
+        raw_data_size, raw_data_type = DATA_TYPE_FLAGS[data_type]
+    except KeyError:
+        raise ValueError('Invalid metrics coordinates format!')
+
+    if type_ in (ObjectType.LABEL, ObjectType.TEMPLATE):
+        parts = [(item['points'], item['text']) for item in text_subitems]
+    else:
+        parts = [(item, None) for item in subitems]
+
+    if heights is not None and len(heights) != len(parts) + 1:
+        raise ValueError('Heights do not match metrics parts!')
+    part_heights = heights if heights is not None else [None] * (len(parts) + 1)
+
+    points_count, raw_points = _pack_points(points, data_type, part_heights[0])
+    metrics = [raw_points]
+    counts = [points_count]
+
+    sizes = iter(text_sizes)
+    words = [word for word, in struct.iter_unpack('<H', subitem_words)]
+
+    if text is not None:
+        metrics.append(_pack_text(text, next(sizes, 0)))
+
+    packed_parts = []
+    for (part_points, part_text), part_height in zip(parts, part_heights[1:]):
+        count, raw_part = _pack_points(part_points, data_type, part_height)
+        counts.append(count)
+        packed_parts.append((count, raw_part, part_text))
+
+    # в больших объектах старшее слово числа точек подобъекта хранится отдельно
+    is_big = points_count >= 65535 or any(count > 65535 for count in counts[1:])
+
+    for i, (count, raw_part, part_text) in enumerate(packed_parts):
+        if is_big:
+            metrics.append(struct.pack('<HH', count >> 16, count & 0xFFFF))
+        else:
+            metrics.append(struct.pack('<HH', words[i] if i < len(words) else 0, count))
+        metrics.append(raw_part)
+        if part_text is not None:
+            metrics.append(_pack_text(part_text, next(sizes, 0)))
+
+    # графическое описание и вектор привязки замыкают область метрики
+    if graphics is not None:
+        metrics.append(struct.pack('<I', len(graphics) + 4) + graphics)
+    if vector is not None:
+        vector = list(vector)
+        if data_type in ('<H', '<i'):
+            vector = [int(c) for c in vector]
+        metrics.append(struct.pack(f'<{len(vector)}{data_type[1]}', *vector))
+
+    raw_metrics = b''.join(metrics)
+
+    if semantics is None:
+        raw_semantics = b''
+    elif isinstance(semantics, bytes):
+        raw_semantics = semantics
+    else:
+        raw_semantics = pack_semantics(semantics)
+
+    help_data = (
+        type_ & 0x0F,
+        (1 if heights is not None else 0) | (2 if raw_semantics else 0) | (4 if raw_data_size else 0) |
+        (8 if vector is not None else 0),
+        (4 if raw_data_type else 0) | (8 if text is not None else 0) | (16 if graphics is not None else 0),
+        (general_levels[0] << 4) | general_levels[1]
+    )
+
+    header = struct.pack(
+        '>I', 0xFF7FFF7F
+    ) + struct.pack(
+        '<IIIHHBBBBIHH',
+        32 + len(raw_metrics) + len(raw_semantics),
+        len(raw_metrics),
+        class_code,
+        id_,
+        group_id,
+        *help_data,
+        points_count if is_big else 0,
+        len(parts),
+        65535 if is_big else points_count
+    )
+
+    return header + raw_metrics + raw_semantics
+
+
+def pack_passport(nomenclature: bytes = b'',
+                  scale: int = 100000,
+                  name: bytes = b'',
+                  espg: int = 0,
+                  rect_coords: Sequence[float] = (0.0,) * 8,
+                  geo_coords: Sequence[float] = (0.0,) * 8,
+                  date: bytes = b'20000101') -> bytes:
+    """
+    Сборка паспорта листа.
+    """
+
+    return b''.join([
+        struct.pack('<4sI', b'SXF\x00', PASSPORT_LEN),
+        struct.pack('>I', 0x0400),
+        struct.pack('<4s12s32sI32s4sI', b'', date, nomenclature, scale, name, b'', espg),
+        struct.pack('<8d', *rect_coords),
+        struct.pack('<8d', *geo_coords),
+        struct.pack('<8B12sBBBBddd12sIdd', 1, 1, 1, 1, 0, 0, 2, 1,
+                    date, 1, 1, 0, 0, 0.0, 0.0, 0.0, date, 0, 0.0, 0.0),
+        struct.pack('<i8II6d', 20000, *([0] * 8), 0, *([0.0] * 6))
+    ])
+
+
+class SXFWriter:
+    """
+    Запись листа SXF.
+
+    Записи накапливаются в буфере и сбрасываются на диск блоками
+    по `chunk_size` байт, число записей в дескрипторе заполняется
+    при закрытии.
+    """
+
+    def __init__(self,
+                 path: str,
+                 passport: Optional[bytes] = None,
+                 nomenclature: bytes = b'',
+                 chunk_size: int = 1 << 20,
+                 descriptor_flags: bytes = b'',
+                 **passport_fields):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.records_count = 0
+
+        if passport is None:
+            passport = pack_passport(nomenclature, **passport_fields)
+        elif len(passport) != PASSPORT_LEN:
+            raise ValueError('Invalid passport length!')
+        if len(descriptor_flags) > 8:
+            raise ValueError('Invalid descriptor flags length!')
+
+        self.__buffer: List[bytes] = []
+        self.__buffer_len = 0
+
+        self.map_file = open(self.path, 'wb')
+        self.map_file.write(passport)
+        self.map_file.write(struct.pack('<4sI32sI8s', b'DAT\x00', DESCRIPTOR_LEN, nomenclature, 0, descriptor_flags))
+
+    @classmethod
+    def like(cls, sxf, path: str, **kwargs) -> 'SXFWriter':
+        """
+        Создание листа с паспортом, номенклатурой и флагами дескриптора
+        существующего листа.
+        """
+
+        with open(sxf.path, 'rb') as map_file:
+            passport = map_file.read(sxf.passport_len)
+            descriptor = map_file.read(DESCRIPTOR_LEN)
+        kwargs.setdefault('descriptor_flags', descriptor[44:52])
+        return cls(path, passport, sxf.desc_nomenclature, **kwargs)
+
+    def __enter__(self) -> 'SXFWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_record(self, record: bytes):
+        """
+        Запись готовой записи SXF.
+        """
+
+        self.__buffer.append(record)
+        self.__buffer_len += len(record)
+        self.records_count += 1
+        if self.__buffer_len >= self.chunk_size:
+            self.flush()
+
+    def write_object(self, class_code: int, points: Any, **kwargs):
+        """
+        Запись объекта по метрике и атрибутам (см. `pack_record`).
+        """
+
+        self.write_record(pack_record(class_code, points, **kwargs))
+
+    def write_sxf_object(self,
+                         obj: SXFObject,
+                         points: Any = None,
+                         subitems: Optional[Sequence[Any]] = None,
+                         raw_semantics: Optional[bytes] = None,
+                         heights: Optional[Sequence[Sequence[float]]] = None):
+        """
+        Запись прочитанного объекта, возможно с заменой метрики.
+
+        Если передана исходная упакованная семантика, она копируется
+        без перекодирования, иначе семантика упаковывается с исходными
+        типами и масштабами характеристик. При замене трёхмерной метрики нужно
+        передать высоты новых частей. Графическое описание и вектор
+        привязки копируются из объекта.
+        """
+
+        if obj.is_3d and heights is None:
+            if points is not None or subitems is not None:
+                raise ValueError('Heights are required to replace 3D metrics!')
+            heights = obj.heights
+
+        graphics = obj.graphics if obj.has_graphics else None
+        vector = obj.vector if obj.has_vector else None
+        if (obj.has_graphics and graphics is None) or (obj.has_vector and vector is None):
+            raise ValueError('Object graphics are not loaded!')
+
+        is_label = obj.type in (ObjectType.LABEL, ObjectType.TEMPLATE)
+        if obj.subitems_count and is_label:
+            text_subitems = obj.text_subitems
+            if subitems is not None:
+                text_subitems = [{'points': p, 'text': item['text']} for p, item in zip(subitems, text_subitems)]
+            subitems = ()
+        else:
+            text_subitems = ()
+            if subitems is None:
+                subitems = obj.subitems if obj.subitems_count else ()
+
+        if raw_semantics is not None:
+            semantics = raw_semantics
+        elif obj.has_semantics:
+            semantics = pack_semantics(obj.semantics, getattr(obj, 'semantic_formats', None))
+        else:
+            semantics = None
+
+        self.write_object(
+            obj.class_code,
+            obj.points if points is None else points,
+            type_=obj.type,
+            id_=obj.id,
+            group_id=obj.group_id,
+            subitems=subitems,
+            text=obj.text if obj.has_text else None,
+            text_subitems=text_subitems,
+            semantics=semantics,
+            general_levels=obj.general_levels,
+            data_type=obj.data_type,
+            heights=heights,
+            graphics=graphics,
+            vector=vector,
+            text_sizes=getattr(obj, 'text_sizes', b''),
+            subitem_words=getattr(obj, 'subitem_words', b'')
+        )
+
+    def copy_records(self, sxf, objects: Iterable[SXFObject]):
+        """
+        Побайтовое копирование записей из исходного листа.
+
+        Записи длиннее `chunk_size` (большие объекты) копируются
+        блоками, не загружаясь в память целиком. Объекты без исходной
+        записи (например, отсечённые копии) записываются через
+        `write_sxf_object`.
+        """
+
+        with open(sxf.path, 'rb') as map_file:
+            for obj in objects:
+                if not obj.full_len:
+                    raise ValueError('Object has no source record!')
+                map_file.seek(obj.offset)
+                if obj.full_len < self.chunk_size:
+                    self.write_record(map_file.read(obj.full_len))
+                    continue
+
+                self.flush()
+                remaining = obj.full_len
+                while remaining > 0:
+                    chunk = map_file.read(min(self.chunk_size, remaining))
+                    self.map_file.write(chunk)
+                    remaining -= len(chunk)
+                self.records_count += 1
+
+    def write_columns(self,
+                      class_codes: Sequence[int],
+                      coords: Any,
+                      part_offsets: Sequence[int],
+                      object_parts: Optional[Sequence[int]] = None,
+                      types: Optional[Sequence[int]] = None,
+                      ids: Optional[Sequence[int]] = None,
+                      group_ids: Optional[Sequence[int]] = None,
+                      texts: Optional[Sequence[Optional[Text]]] = None,
+                      semantics: Optional[Dict[int, Sequence[Optional[SemanticValue]]]] = None,
+                      data_type: str = '<d'):
+        """
+        Запись объектов из колоночного представления.
+
+        `coords` - массив координат формы (N, 2), `part_offsets` - границы
+        частей (метрики и подобъектов) в `coords`, `object_parts` - границы
+        частей каждого объекта в `part_offsets` (по умолчанию одна часть
+        на объект). Семантика задаётся колонками по кодам характеристик,
+        None означает отсутствие значения.
+        """
+
+        if object_parts is None:
+            object_parts = range(len(class_codes) + 1)
+
+        for i, class_code in enumerate(class_codes):
+            first, last = object_parts[i], object_parts[i + 1]
+            parts = [coords[part_offsets[j]:part_offsets[j + 1]] for j in range(first, last)]
+
+            object_semantics = None
+            if semantics is not None:
+                object_semantics = {code: column[i] for code, column in semantics.items() if column[i] is not None}
+
+            self.write_object(
+                class_code,
+                parts[0],
+                type_=types[i] if types is not None else ObjectType.LINE,
+                id_=ids[i] if ids is not None else (i + 1) & 0xFFFF,
+                group_id=group_ids[i] if group_ids is not None else 0,
+                subitems=parts[1:],
+                text=texts[i] if texts is not None else None,
+                semantics=object_semantics,
+                data_type=data_type
+            )
+
+    def flush(self):
+        if self.__buffer:
+            self.map_file.write(b''.join(self.__buffer))
+            self.__buffer = []
+            self.__buffer_len = 0
+
+    def close(self):
+        """
+        Сброс буфера и заполнение числа записей в дескрипторе.
+        """
+
+        if self.map_file.closed:
+            return
+
+        self.flush()
+        self.map_file.seek(PASSPORT_LEN + 40)
+        self.map_file.write(struct.pack('<I', self.records_count))
+        self.map_file.close()
@@ -0,0 +1,26 @@
+import os
+import shutil
+
+import pytest
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def sheet_path(tmp_path) -> str:
+    """
+    Копия листа из репозитория во временном каталоге (рядом пишутся снимки).
+    """
+
+    path = str(tmp_path / 'n-37-141.sxf')
+    shutil.copy(os.path.join(DATA_DIR, 'n-37-141.sxf'), path)
+    return path
+
+
+@pytest.fixture
+def rsc_path() -> str:
+    """
+    Классификатор из репозитория (только для чтения).
+    """
+
+    return os.path.join(DATA_DIR, '100t03g.rsc')
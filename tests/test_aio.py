@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from pysxf import RSC, SXF
+from pysxf.aio import single_flight
+
+
+def test_single_flight():
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return object()
+
+    async def main():
+        first, second = await asyncio.gather(single_flight('key', factory), single_flight('key', factory))
+        assert first is second
+        assert len(calls) == 1
+
+        # после завершения задача запускается заново
+        assert await single_flight('key', factory) is not first
+        assert len(calls) == 2
+
+        # отмена одного ожидающего не отменяет общую задачу
+        waiter = asyncio.ensure_future(single_flight('other', factory))
+        other = asyncio.ensure_future(single_flight('other', factory))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert await other is not None
+        assert len(calls) == 3
+
+    asyncio.run(main())
+
+
+def test_single_flight_error():
+    async def factory():
+        await asyncio.sleep(0)
+        raise ValueError('failed')
+
+    async def main():
+        results = await asyncio.gather(single_flight('key', factory), single_flight('key', factory),
+                                       return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+    asyncio.run(main())
+
+
+def test_aopen_and_aparse(sheet_path, rsc_path):
+    async def main():
+        first, second = await asyncio.gather(SXF.aopen(sheet_path, rsc_path), SXF.aopen(sheet_path, rsc_path))
+        assert first is second
+        assert isinstance(first.rsc, RSC)
+        return first, await first.aparse(batch_size=500)
+
+    sxf, objects = asyncio.run(main())
+    expected = SXF(sheet_path)
+    expected.parse()
+    assert len(objects) == expected.records_count
+    assert [obj.points for obj in objects] == [obj.points for obj in expected.objects]
+    assert [obj.semantics for obj in objects if obj.has_semantics] == \
+        [obj.semantics for obj in expected.objects if obj.has_semantics]
@@ -0,0 +1,87 @@
+import copy
+import gc
+import weakref
+
+from pysxf import MemoryBudget, SXF
+from pysxf.sxf.budget import estimate_footprint
+
+
+def _body(obj) -> tuple:
+    return (obj.points, getattr(obj, 'subitems', None), getattr(obj, 'text_subitems', None),
+            getattr(obj, 'semantics', None), getattr(obj, 'raw_graphics', None))
+
+
+def test_eviction_and_reload(sheet_path):
+    expected = SXF(sheet_path).parse()
+
+    with MemoryBudget(1 << 20) as budget:
+        sxf = SXF(sheet_path)
+        sxf.parse(budget=budget)
+
+        assert budget.nbytes <= budget.limit
+        report = budget.report()
+        assert report.total == budget.nbytes == sum(report.by_type.values())
+        assert report.released == budget.evictions > 0
+        assert report.resident + report.released == len(budget) == sxf.records_count
+
+        # первые записи вытеснены и декодируются заново при обращении
+        first = sxf.objects[0]
+        assert 'points' not in vars(first)
+        for obj, reference in zip(sxf.objects, expected):
+            assert _body(obj) == _body(reference)
+        assert budget.reloads >= report.released
+        assert budget.nbytes <= budget.limit
+
+
+def test_touch_keeps_record(sheet_path):
+    with MemoryBudget(1 << 16) as budget:
+        sxf = SXF(sheet_path)
+        objects = sxf.parse()[:50]
+        for obj in objects:
+            budget.track(obj, sheet_path)
+            budget.touch(objects[0])
+        assert 'points' in vars(objects[0])
+        assert 'points' not in vars(objects[1])
+
+
+def test_spill(sheet_path, tmp_path):
+    spill_path = str(tmp_path / 'spill.bin')
+    reference = SXF(sheet_path).parse()[:200]
+    # изменённые в памяти объекты без исходного файла выгружаются на диск
+    objects = [copy.copy(obj) for obj in reference]
+    for obj in objects:
+        obj.points = [(x + 1, y) for x, y in obj.points]
+
+    budget = MemoryBudget(sum(estimate_footprint(obj) for obj in objects) // 4, spill_path)
+    for obj in objects:
+        budget.track(obj)
+    assert budget.evictions > 0
+    assert 'points' not in vars(objects[0])
+
+    for obj, source in zip(objects, reference):
+        assert obj.points == [(x + 1, y) for x, y in source.points]
+        assert getattr(obj, 'semantics', None) == getattr(source, 'semantics', None)
+
+    budget.close()
+    assert not (tmp_path / 'spill.bin').exists()
+
+
+def test_weak_references_and_untrack(sheet_path):
+    budget = MemoryBudget(1 << 20)
+    sxf = SXF(sheet_path)
+    sxf.parse(budget=budget)
+    ref = weakref.ref(sxf.objects[5])
+    del sxf
+    gc.collect()
+    # записи удалённого листа снимаются с учёта
+    assert ref() is None
+    assert len(budget) == 0 and budget.nbytes == 0
+
+    sxf = SXF(sheet_path)
+    sxf.parse(budget=budget)
+    budget.untrack_sheet(sheet_path)
+    assert len(budget) == 0 and budget.nbytes == 0
+    # вытесненные записи после снятия с учёта декодируются из файла листа
+    expected = SXF(sheet_path).parse()
+    assert [_body(obj) for obj in sxf.objects] == [_body(obj) for obj in expected]
+    budget.close()
@@ -0,0 +1,89 @@
+import os
+import random
+import shutil
+
+from pysxf import SXF, SXFWriter
+from pysxf.sxf.catalog import CatalogEntry, SXFCatalog
+
+
+def _write_sheet(path, scale, x, y, records=1):
+    frame = (x, y, x + 1.0, y, x + 1.0, y + 1.0, x, y + 1.0)
+    with SXFWriter(path, nomenclature=b'TEST', scale=scale, rect_coords=[c * 1000 for c in frame],
+                   geo_coords=frame) as writer:
+        for i in range(records):
+            writer.write_object(1, [(0.0, 0.0), (1.0, 1.0)], id_=i)
+
+
+def _intersects(frame, bbox) -> bool:
+    return frame[0] <= bbox[2] and frame[2] >= bbox[0] and frame[1] <= bbox[3] and frame[3] >= bbox[1]
+
+
+def test_scan_save_load(sheet_path, tmp_path):
+    nested = tmp_path / 'nested'
+    nested.mkdir()
+    _write_sheet(str(nested / 'a.sxf'), 25000, 1.0, 2.0)
+    with open(tmp_path / 'broken.sxf', 'wb') as fp:
+        fp.write(b'not a sheet')
+
+    catalog = SXFCatalog.scan(str(tmp_path))
+    assert sorted(os.path.basename(entry.path) for entry in catalog) == ['a.sxf', 'n-37-141.sxf']
+
+    entry = next(entry for entry in catalog if entry.path == sheet_path)
+    sxf = SXF(sheet_path)
+    assert (entry.scale, entry.records_count, entry.nomenclature) == (sxf.scale, sxf.records_count, sxf.nomenclature)
+
+    written = next(entry for entry in catalog if entry.path.endswith('a.sxf'))
+    assert written.geo_bbox == (1.0, 2.0, 2.0, 3.0)
+    assert written.rect_bbox == (1000.0, 2000.0, 2000.0, 3000.0)
+
+    path = str(tmp_path / 'catalog.bin')
+    catalog.save(path)
+    assert list(SXFCatalog.load(path)) == list(catalog)
+
+
+def test_intersects_matches_brute_force():
+    rng = random.Random(1)
+    entries = []
+    for i in range(2000):
+        scale = rng.choice([10000, 25000, 50000, 100000, 1000000])
+        size = scale / 1e6
+        x, y = rng.random() * 100, rng.random() * 100
+        entries.append(CatalogEntry(f'sheet{i}', b'', scale, 0, 0, 0.0, 0, (x, y, x + size, y + size),
+                                    (x * 1e4, y * 1e4, (x + size) * 1e4, (y + size) * 1e4)))
+    catalog = SXFCatalog(entries)
+
+    for _ in range(300):
+        x, y = rng.random() * 100, rng.random() * 100
+        bbox = (x, y, x + 0.5, y + 0.5)
+        scale = rng.choice([None, 50000, (10000, 25000)])
+        for rect in (False, True):
+            query = tuple(c * 1e4 for c in bbox) if rect else bbox
+
+            def matches(entry):
+                if isinstance(scale, tuple) and not scale[0] <= entry.scale <= scale[1]:
+                    return False
+                if isinstance(scale, int) and entry.scale != scale:
+                    return False
+                return _intersects(entry.rect_bbox if rect else entry.geo_bbox, query)
+
+            assert sorted(catalog.intersects(query, scale, rect)) == sorted(filter(matches, entries))
+
+
+def test_refresh(sheet_path, tmp_path):
+    changed_path = str(tmp_path / 'changed.sxf')
+    removed_path = str(tmp_path / 'removed.sxf')
+    _write_sheet(changed_path, 25000, 0.0, 0.0)
+    shutil.copy(sheet_path, removed_path)
+
+    catalog = SXFCatalog.scan(str(tmp_path))
+    assert len(catalog) == 3
+
+    _write_sheet(changed_path, 25000, 10.0, 10.0, records=3)
+    os.remove(removed_path)
+
+    assert catalog.refresh() == 1
+    assert sorted(entry.path for entry in catalog) == sorted([sheet_path, changed_path])
+    changed = next(entry for entry in catalog if entry.path == changed_path)
+    assert changed.records_count == 3
+    assert [entry.path for entry in catalog.intersects((10.5, 10.5, 10.6, 10.6))] == [changed_path]
+    assert catalog.intersects((0.5, 0.5, 0.6, 0.6)) == []
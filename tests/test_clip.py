@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from pysxf import SXF, SXFWriter
+from pysxf.geometry import GeometryArrays, bboxes, clip_line, clip_ring, clip_sheet
+from pysxf.geometry.lod import object_parts
+from pysxf.sxf.columns import SheetColumns
+from pysxf.sxf.sxf_object import ObjectType
+
+BBOX = (0.0, 0.0, 10.0, 10.0)
+
+
+def _inside(points, bbox, eps=1e-9) -> bool:
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    x_min, y_min, x_max, y_max = bbox
+    return bool(((points[:, 0] >= x_min - eps) & (points[:, 0] <= x_max + eps) &
+                 (points[:, 1] >= y_min - eps) & (points[:, 1] <= y_max + eps)).all())
+
+
+def test_clip_line():
+    pieces = clip_line([(-5, 5), (5, 5), (5, 15), (8, 5), (8, 8)], BBOX)
+    assert [piece.tolist() for piece in pieces] == [
+        [[0, 5], [5, 5], [5, 10]],
+        [[6.5, 10], [8, 5], [8, 8]]
+    ]
+    assert clip_line([(20, 20), (30, 30)], BBOX) == []
+
+
+def test_clip_ring():
+    ring = clip_ring([(-5, -5), (5, -5), (5, 5), (-5, 5), (-5, -5)], BBOX)
+    assert _inside(ring, BBOX)
+    assert ring[0].tolist() == ring[-1].tolist()
+    assert sorted(map(tuple, ring[:-1].tolist())) == [(0, 0), (0, 5), (5, 0), (5, 5)]
+    assert len(clip_ring([(20, 20), (30, 20), (30, 30)], BBOX)) == 0
+
+
+def test_clip_interpolates_heights():
+    piece, = clip_line([(-10, 5, 0.0), (10, 5, 20.0)], BBOX)
+    assert piece.tolist() == [[0, 5, 10.0], [10, 5, 20.0]]
+
+
+def _middle(object_bboxes: np.ndarray):
+    # рамка в средней части листа
+    valid = object_bboxes[~np.isnan(object_bboxes[:, 0])]
+    x_min, y_min = valid[:, :2].min(axis=0)
+    x_max, y_max = valid[:, 2:].max(axis=0)
+    return (x_min + (x_max - x_min) * 0.3, y_min + (y_max - y_min) * 0.3,
+            x_min + (x_max - x_min) * 0.6, y_min + (y_max - y_min) * 0.6)
+
+
+def test_clip_sheet_invariants(sheet_path):
+    sxf = SXF(sheet_path)
+    sxf.parse()
+
+    object_bboxes = bboxes(GeometryArrays.from_columns(SheetColumns.from_objects(sxf.objects)))
+    bbox = _middle(object_bboxes)
+    clipped = clip_sheet(sxf, bbox)
+    assert 0 < clipped.records_count == len(clipped.objects) < sxf.records_count
+
+    for obj in clipped.objects:
+        if obj.type in (ObjectType.LINE, ObjectType.AREA):
+            for part in object_parts(obj):
+                assert _inside(part, bbox)
+        else:
+            assert _inside(obj.points[:1], bbox)
+
+    # объекты целиком внутри рамки сохраняются без изменений
+    inside = [obj for obj, box in zip(sxf.objects, object_bboxes)
+              if box[0] >= bbox[0] and box[1] >= bbox[1] and box[2] <= bbox[2] and box[3] <= bbox[3]]
+    clipped_ids = {id(obj) for obj in clipped.objects}
+    assert inside and all(id(obj) in clipped_ids for obj in inside)
+
+
+def test_clipped_sheet_can_be_written(sheet_path, tmp_path):
+    sxf = SXF(sheet_path)
+    sxf.parse()
+    clipped = clip_sheet(sxf, _middle(bboxes(GeometryArrays.from_columns(SheetColumns.from_objects(sxf.objects)))))
+
+    path = str(tmp_path / 'clipped.sxf')
+    with SXFWriter.like(sxf, path) as writer:
+        for obj in clipped.objects:
+            writer.write_sxf_object(obj)
+
+    written = SXF(path)
+    written.parse()
+    assert 0 < written.records_count == clipped.records_count
+    for obj, expected in zip(written.objects, clipped.objects):
+        assert obj.class_code == expected.class_code
+        # координаты округляются до формата метрики листа
+        assert np.allclose(np.asarray(obj.points, dtype=np.float64).reshape(-1, 2),
+                           np.asarray(expected.points, dtype=np.float64).reshape(-1, 2), rtol=1e-6)
+
+
+def test_clipped_copies_have_no_source_record(sheet_path, tmp_path):
+    sxf = SXF(sheet_path)
+    sxf.parse()
+    clipped = clip_sheet(sxf, _middle(bboxes(GeometryArrays.from_columns(SheetColumns.from_objects(sxf.objects)))))
+
+    source_ids = {id(obj) for obj in sxf.objects}
+    copies = [obj for obj in clipped.objects if id(obj) not in source_ids]
+    assert copies
+    assert all(obj.offset == obj.full_len == obj.metrics_len == 0 for obj in copies)
+    assert set(SheetColumns.from_objects(copies).full_len) == {0}
+
+    with SXFWriter.like(sxf, str(tmp_path / 'copied.sxf')) as writer:
+        with pytest.raises(ValueError):
+            writer.copy_records(sxf, copies[:1])
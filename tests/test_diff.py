@@ -0,0 +1,115 @@
+import shutil
+
+from pysxf import SXF, SheetDiff, SXFWriter
+from pysxf.strings import StringPool
+
+
+def _rewrite(sxf: SXF, path: str, change=None, skip=(), extra=None):
+    """
+    Перезапись листа: `change(index, obj, writer)` возвращает True, если записал объект сам.
+    """
+
+    with SXFWriter.like(sxf, path) as writer:
+        for index, obj in enumerate(sxf.objects):
+            if index in skip:
+                continue
+            if change is None or not change(index, obj, writer):
+                writer.write_sxf_object(obj)
+        if extra is not None:
+            extra(writer)
+
+
+def test_identical_sheets(sheet_path, tmp_path):
+    copy_path = str(tmp_path / 'copy.sxf')
+    shutil.copy(sheet_path, copy_path)
+
+    diff = SheetDiff.compare(sheet_path, copy_path)
+    assert not diff
+    assert diff.unchanged_count == SXF(sheet_path).records_count
+
+
+def test_rewritten_sheet_is_unchanged(sheet_path, tmp_path):
+    sxf = SXF(sheet_path)
+    sxf.parse()
+    path = str(tmp_path / 'rewritten.sxf')
+    _rewrite(sxf, path)
+
+    diff = SheetDiff.compare(sxf, path)
+    assert not diff
+    assert diff.unchanged_count == sxf.records_count
+
+
+def test_changes(sheet_path, tmp_path):
+    sxf = SXF(sheet_path)
+    sxf.parse()
+    semantic_index = next(i for i, obj in enumerate(sxf.objects) if obj.has_semantics)
+    geometry_index = next(i for i, obj in enumerate(sxf.objects) if len(obj.points) > 1 and i != semantic_index)
+    removed_index = next(i for i in range(len(sxf.objects)) if i not in (semantic_index, geometry_index))
+
+    def change(index, obj, writer):
+        if index == semantic_index:
+            semantics = dict(obj.semantics)
+            code = next(iter(semantics))
+            semantics[code] = 'changed'
+            writer.write_object(obj.class_code, obj.points, type_=obj.type, id_=obj.id, group_id=obj.group_id,
+                                subitems=getattr(obj, 'subitems', ()),
+                                text_subitems=getattr(obj, 'text_subitems', ()),
+                                text=obj.text if obj.has_text else None, semantics=semantics,
+                                general_levels=obj.general_levels, data_type=obj.data_type)
+            return True
+        if index == geometry_index:
+            x, y = obj.points[0]
+            writer.write_sxf_object(obj, points=[(x + 1, y)] + obj.points[1:])
+            return True
+        return False
+
+    path = str(tmp_path / 'changed.sxf')
+    _rewrite(sxf, path, change, skip={removed_index},
+             extra=lambda writer: writer.write_object(1, [(0.0, 0.0), (1.0, 1.0)], id_=65000, group_id=7))
+
+    diff = SheetDiff.compare(sxf, path)
+    assert [obj.offset for obj in diff.removed] == [sxf.objects[removed_index].offset]
+    assert [(obj.id, obj.group_id) for obj in diff.added] == [(65000, 7)]
+
+    changes = {change.old.offset: change for change in diff.changed}
+    assert set(changes) == {sxf.objects[semantic_index].offset, sxf.objects[geometry_index].offset}
+    semantic_change = changes[sxf.objects[semantic_index].offset]
+    assert semantic_change.semantics and not semantic_change.geometry
+    geometry_change = changes[sxf.objects[geometry_index].offset]
+    assert geometry_change.geometry and not geometry_change.semantics
+    assert diff.unchanged_count == sxf.records_count - 3
+
+
+def test_heights_and_graphics_changes(tmp_path):
+    def write(path, height, graphics):
+        with SXFWriter(path) as writer:
+            writer.write_object(1, [(0.0, 0.0), (1.0, 1.0)], id_=1, heights=[[1.0, height]])
+            writer.write_object(2, [(0.0, 0.0), (1.0, 1.0)], id_=2, graphics=graphics)
+
+    old_path, new_path = str(tmp_path / 'old.sxf'), str(tmp_path / 'new.sxf')
+    write(old_path, 2.0, b'\x01')
+    write(new_path, 3.0, b'\x02')
+
+    diff = SheetDiff.compare(old_path, new_path)
+    assert len(diff.changed) == 2
+    assert all(change.geometry for change in diff.changed)
+    assert diff.unchanged_count == 0
+
+
+def test_semantic_format_changes(tmp_path):
+    def write(path, semantics):
+        with SXFWriter(path) as writer:
+            writer.write_object(1, [(0.0, 0.0), (1.0, 1.0)], id_=1, semantics=semantics)
+
+    old_path, new_path = str(tmp_path / 'old.sxf'), str(tmp_path / 'new.sxf')
+    write(old_path, {1: (127, 'Ока'), 2: (2, 15, -1)})
+    write(new_path, {1: (0, 'Ока'), 2: (8, 1.5)})
+
+    # с пулом строк значения после декодирования совпадают
+    old, new = SXF(old_path, strings=StringPool()), SXF(new_path, strings=StringPool())
+    diff = SheetDiff.compare(old, new)
+    assert len(diff.changed) == 1
+    change = diff.changed[0]
+    assert change.semantics and not change.geometry and not change.header
+    assert change.old.semantics == change.new.semantics
+    assert diff.unchanged_count == 0
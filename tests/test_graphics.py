@@ -0,0 +1,40 @@
+from pysxf import SXF, SXFWriter
+from pysxf.sxf.budget import estimate_footprint
+
+
+def _write(path):
+    with SXFWriter(path) as writer:
+        writer.write_object(1, [(float(i), 0.0) for i in range(5)], subitems=[[(0.0, 1.0), (1.0, 1.0)]],
+                            heights=[[float(i * 10) for i in range(5)], [7.0, 8.0]],
+                            graphics=b'\x01' * 40, vector=[1.0, 2.0, 3.0])
+        writer.write_object(2, [(float(i), 0.0) for i in range(5)], subitems=[[(0.0, 1.0), (1.0, 1.0)]])
+
+
+def test_iter_metrics_yields_heights(tmp_path):
+    path = str(tmp_path / '3d.sxf')
+    _write(path)
+    sxf = SXF(path)
+    solid, flat = sxf.iter_headers()
+
+    chunks = list(sxf.iter_metrics(solid, chunk_size=2))
+    assert [(part, points) for part, points, _ in chunks] == [
+        (0, [(0.0, 0.0), (1.0, 0.0)]), (0, [(2.0, 0.0), (3.0, 0.0)]), (0, [(4.0, 0.0)]),
+        (1, [(0.0, 1.0), (1.0, 1.0)])
+    ]
+    assert [heights.tolist() for _, _, heights in chunks] == [[0.0, 10.0], [20.0, 30.0], [40.0], [7.0, 8.0]]
+
+    assert all(heights is None for _, _, heights in sxf.iter_metrics(flat, chunk_size=2))
+
+
+def test_footprint_counts_heights_and_graphics(tmp_path):
+    path = str(tmp_path / '3d.sxf')
+    _write(path)
+    sxf = SXF(path)
+    solid, flat = sxf.parse()
+
+    # одинаковая плановая метрика, разница - высоты и графическое описание
+    assert estimate_footprint(solid) - estimate_footprint(flat) >= 7 * 8 + 40
+
+    solid.release()
+    flat.release()
+    assert estimate_footprint(solid) == estimate_footprint(flat)
@@ -0,0 +1,48 @@
+from pysxf import SXF, SXFWriter
+from pysxf.sxf.sxf_object import ObjectType
+
+
+def _parts(obj) -> list:
+    if obj.type in (ObjectType.LABEL, ObjectType.TEMPLATE):
+        return [obj.points] + [item['points'] for item in getattr(obj, 'text_subitems', ())]
+    return [obj.points] + list(getattr(obj, 'subitems', ()))
+
+
+def _stream(sxf, obj, chunk_size) -> list:
+    parts = [[] for _ in range(obj.subitems_count + 1)]
+    for part, points, _ in sxf.iter_metrics(obj, chunk_size):
+        assert 0 < len(points) <= chunk_size
+        parts[part].extend(points)
+    return parts
+
+
+def test_stream_matches_parse(sheet_path):
+    sxf = SXF(sheet_path)
+    headers = list(sxf.iter_headers())
+    parsed = SXF(sheet_path).parse()
+
+    for header, obj in zip(headers, parsed):
+        assert _stream(sxf, header, 100) == _parts(obj)
+        # объект, прочитанный по заголовку, не декодируется
+        assert 'points' not in vars(header)
+
+
+def test_big_objects(tmp_path):
+    path = str(tmp_path / 'big.sxf')
+    points = [(float(i), float(i % 7)) for i in range(70000)]
+    subitems = [[(float(i), 1.0) for i in range(66000)], [(0.0, 0.0), (1.0, 1.0)]]
+    with SXFWriter(path) as writer:
+        writer.write_object(1, points, type_=ObjectType.AREA, subitems=subitems)
+        writer.write_object(2, points[:10])
+
+    sxf = SXF(path)
+    big, small = sxf.iter_headers()
+    assert _stream(sxf, big, 4096) == [points] + subitems
+    assert _stream(sxf, small, 4096) == [points[:10]]
+
+    # большие записи копируются блоками
+    copy_path = str(tmp_path / 'copy.sxf')
+    with SXFWriter.like(sxf, copy_path, chunk_size=4096) as writer:
+        writer.copy_records(sxf, [big, small])
+    with open(path, 'rb') as original, open(copy_path, 'rb') as copy:
+        assert original.read() == copy.read()
@@ -0,0 +1,68 @@
+import numpy as np
+
+from pysxf import SXF
+from pysxf.geometry import GeometryArrays, columns_metrics, metrics
+from pysxf.geometry.lod import object_parts
+from pysxf.sxf.columns import SheetColumns
+from pysxf.sxf.sxf_object import ObjectType
+
+
+def _geometry(objects) -> GeometryArrays:
+    """
+    Геометрия из списка (тип, части).
+    """
+
+    coords, part_offsets, object_parts_, types = [], [0], [0], []
+    for type_, parts in objects:
+        for part in parts:
+            coords.extend(part)
+            part_offsets.append(len(coords))
+        object_parts_.append(len(part_offsets) - 1)
+        types.append(type_)
+    return GeometryArrays(np.asarray(coords, dtype=np.float64).reshape(-1, 2), np.asarray(part_offsets),
+                          np.asarray(object_parts_), np.asarray(types, dtype=np.uint8))
+
+
+def _ring_area(points) -> float:
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * abs(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+
+
+def test_metrics():
+    square = [(0, 0), (10, 0), (10, 10), (0, 10)]
+    hole = [(6, 6), (8, 6), (8, 8), (6, 8)]
+    result = metrics(_geometry([
+        (ObjectType.AREA, [square, hole]),
+        (ObjectType.LINE, [[(0, 0), (3, 0), (3, 4)]]),
+        (ObjectType.POINT, [[(1, 1), (3, 5)]]),
+        (ObjectType.LINE, [])
+    ]))
+
+    assert np.allclose(result.bbox[:3], [[0, 0, 10, 10], [0, 0, 3, 4], [1, 1, 3, 5]])
+    assert np.isnan(result.bbox[3]).all()
+
+    assert np.allclose(result.area, [96, 0, 0, 0])
+    assert np.allclose(result.length[[0, 1, 3]], [48, 7, 0])
+    # центр площади смещается от дыры
+    expected_x = (100 * 5 - 4 * 7) / 96
+    assert np.allclose(result.centroid[0], [expected_x, expected_x])
+    # центр линии - середины отрезков, взвешенные по длинам
+    assert np.allclose(result.centroid[1], [(1.5 * 3 + 3 * 4) / 7, (0 * 3 + 2 * 4) / 7])
+    assert np.allclose(result.centroid[2], [2, 3])
+
+
+def test_sheet_metrics_match_objects(sheet_path):
+    sxf = SXF(sheet_path)
+    objects = sxf.parse()
+    result = columns_metrics(SheetColumns.from_objects(objects))
+
+    for i, obj in enumerate(objects):
+        parts = [np.asarray(part, dtype=np.float64).reshape(-1, 2) for part in object_parts(obj)]
+        points = np.concatenate(parts)
+        assert np.allclose(result.bbox[i], [*points.min(axis=0), *points.max(axis=0)])
+        if obj.type == ObjectType.AREA:
+            area = _ring_area(parts[0]) - sum(_ring_area(hole) for hole in parts[1:])
+            assert np.isclose(result.area[i], area)
+        elif obj.type == ObjectType.LINE:
+            length = sum(np.hypot(*np.diff(part, axis=0).T).sum() for part in parts)
+            assert np.isclose(result.length[i], length)
@@ -0,0 +1,45 @@
+import pickle
+
+from pysxf import SXF
+from pysxf.sxf.sxf_object import ObjectType
+
+
+def _thinned(points, stride) -> list:
+    result = points[::stride]
+    if (len(points) - 1) % stride:
+        result.append(points[-1])
+    return result
+
+
+def test_every_and_stride(sheet_path):
+    sxf = SXF(sheet_path)
+    expected = SXF(sheet_path).parse()
+
+    objects = sxf.preview(every=10, stride=8)
+    assert [obj.offset for obj in objects] == [obj.offset for obj in expected[::10]]
+    assert not hasattr(sxf, 'objects')
+
+    for obj, source in zip(objects, expected[::10]):
+        assert obj.points == _thinned(source.points, 8)
+        assert not hasattr(obj, 'semantics')
+        if obj.subitems_count and obj.type not in (ObjectType.LABEL, ObjectType.TEMPLATE):
+            assert obj.subitems == [_thinned(part, 8) for part in source.subitems]
+    # объекты просмотра не держат файл и сериализуются
+    pickle.dumps(objects)
+
+
+def test_full_preview_matches_parse(sheet_path):
+    objects = SXF(sheet_path).preview()
+    expected = SXF(sheet_path).parse()
+    assert [obj.points for obj in objects] == [obj.points for obj in expected]
+
+
+def test_sample(sheet_path):
+    sxf = SXF(sheet_path)
+    first = sxf.preview(sample=200, stride=4, seed=1)
+    second = sxf.preview(sample=200, stride=4, seed=1)
+
+    offsets = [obj.offset for obj in first]
+    assert len(offsets) == 200 and offsets == sorted(set(offsets))
+    assert offsets == [obj.offset for obj in second]
+    assert len(sxf.preview(sample=sxf.records_count + 10)) == sxf.records_count
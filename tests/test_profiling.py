@@ -0,0 +1,78 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pysxf import RSC, SXF, profiling
+
+
+def test_parse_stats(sheet_path):
+    fired = []
+    sxf = SXF(sheet_path)
+    with profiling.profile(callback=fired.append, slowest_count=5) as stats:
+        sxf.parse()
+
+    assert profiling.current() is None
+    assert fired == [stats]
+    assert stats.records_count == sxf.records_count
+    assert stats.phase_calls['header'] == sxf.records_count
+    assert stats.phase_bytes['header'] == 32 * sxf.records_count
+    assert stats.phase_calls['sxf.parse'] == 1
+    # записи читаются целиком: заголовки и тела
+    assert stats.bytes_read == os.path.getsize(sheet_path) - sxf.passport_len - sxf.descriptor_len
+    assert len(stats.slowest) == 5
+    assert stats.to_dict()['records_by_type'] == {int(type_): count for type_, count in stats.records_by_type.items()}
+
+
+def test_enable_and_disable(sheet_path):
+    stats = profiling.enable()
+    profiling.disable()
+    SXF(sheet_path).parse()
+    assert stats.records_count == 0
+
+
+def test_sessions_are_per_thread(sheet_path):
+    results = {}
+
+    def profiled(name):
+        with profiling.profile() as stats:
+            SXF(sheet_path).parse()
+        results[name] = stats.records_count
+
+    def plain():
+        SXF(sheet_path).parse()
+        results['plain'] = profiling.current()
+
+    threads = [threading.Thread(target=profiled, args=(i,)) for i in range(2)] + [threading.Thread(target=plain)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    records_count = SXF(sheet_path).records_count
+    assert results == {0: records_count, 1: records_count, 'plain': None}
+
+
+def test_async_phases(sheet_path):
+    async def main():
+        fired = []
+        with profiling.profile(callback=fired.append) as stats:
+            sxf = SXF(sheet_path)
+            with ThreadPoolExecutor(2) as executor:
+                await sxf.aparse(executor)
+        return fired, stats, sxf
+
+    fired, stats, sxf = asyncio.run(main())
+    # записи, декодированные в пуле потоков, учитываются в сессии задачи
+    assert stats.records_count == sxf.records_count
+    assert stats.phase_calls['sxf.aparse'] == stats.phase_calls['sxf.aiter_objects'] == 1
+    assert fired == [stats]
+
+
+def test_rsc_bytes(rsc_path):
+    with profiling.profile() as stats:
+        RSC(rsc_path).parse()
+
+    for phase in ('rsc.objects', 'rsc.display_params', 'rsc.palette'):
+        assert stats.phase_calls[phase] == 1
+        assert stats.phase_bytes[phase] > 0
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from pysxf import SXF, SXFWriter
+from pysxf.geometry import GeometryArrays
+from pysxf.geometry.query import SpatialQuery
+from pysxf.sxf.columns import SheetColumns
+from pysxf.sxf.sxf_object import ObjectType
+
+SQUARE = [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (0.0, 10.0), (0.0, 0.0)]
+HOLE = [(4.0, 4.0), (6.0, 4.0), (6.0, 6.0), (4.0, 6.0), (4.0, 4.0)]
+
+
+def _query(objects) -> SpatialQuery:
+    return SpatialQuery(GeometryArrays.from_columns(SheetColumns.from_objects(objects)))
+
+
+@pytest.fixture
+def sheet_query(sheet_path) -> SpatialQuery:
+    sxf = SXF(sheet_path)
+    sxf.parse()
+    return _query(sxf.objects)
+
+
+def test_nearest_matches_brute_force(sheet_query):
+    object_bboxes = sheet_query.index.bboxes
+    valid = ~np.isnan(object_bboxes[:, 0])
+    low, high = object_bboxes[valid, :2].min(axis=0), object_bboxes[valid, 2:].max(axis=0)
+    everything = np.arange(len(object_bboxes))
+
+    rng = np.random.default_rng(1)
+    mask = np.zeros(len(object_bboxes), dtype=bool)
+    mask[rng.choice(len(object_bboxes), len(object_bboxes) // 20, replace=False)] = True
+
+    for x, y in (low + (high - low) * rng.random(2) for _ in range(20)):
+        indices, distances = sheet_query.nearest(x, y, k=3)
+        expected = np.sort(sheet_query.distance(everything, x, y))[:3]
+        assert np.allclose(distances, expected)
+
+        indices, distances = sheet_query.nearest(x, y, k=3, mask=mask)
+        assert mask[indices].all()
+        expected = np.sort(sheet_query.distance(np.flatnonzero(mask), x, y))[:3]
+        assert np.allclose(distances, expected)
+
+
+def test_nearest_requires_positive_k(sheet_query):
+    with pytest.raises(ValueError):
+        sheet_query.nearest(0.0, 0.0, k=0)
+    with pytest.raises(ValueError):
+        sheet_query.index.nearest(0.0, 0.0, k=-1)
+
+
+def test_contains(tmp_path):
+    path = str(tmp_path / 'areas.sxf')
+    with SXFWriter(path) as writer:
+        writer.write_object(1, SQUARE, type_=ObjectType.AREA, subitems=[HOLE])
+        writer.write_object(2, [(20.0, 0.0), (30.0, 0.0), (30.0, 10.0), (20.0, 0.0)], type_=ObjectType.AREA)
+        writer.write_object(3, [(0.0, 2.0), (10.0, 2.0)], type_=ObjectType.LINE)
+
+    sxf = SXF(path)
+    sxf.parse()
+    query = _query(sxf.objects)
+
+    assert query.containing(2.0, 2.5).tolist() == [0]
+    # точка в дыре не принадлежит площади
+    assert query.containing(5.0, 5.0).tolist() == []
+    assert query.containing(28.0, 2.0).tolist() == [1]
+    assert query.containing(15.0, 5.0).tolist() == []
+
+    # внутри площади расстояние до неё нулевое
+    indices, distances = query.nearest(2.0, 2.5, k=2)
+    assert indices.tolist() == [0, 2]
+    assert np.allclose(distances, [0.0, 0.5])
@@ -0,0 +1,92 @@
+import math
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from pysxf import SXF
+from pysxf.server import SheetCache, SXFClient, SXFServer, WarmSheet
+from pysxf.sxf.sxf_object import ObjectType
+
+
+@pytest.fixture
+def server(tmp_path):
+    cache = SheetCache(snapshot_dir=str(tmp_path / 'snapshots'))
+    server = SXFServer(str(tmp_path / 'sxf.sock'), cache)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_protocol(server, sheet_path):
+    sxf = SXF(sheet_path)
+    sxf.parse()
+    local = WarmSheet.load(sheet_path)
+    object_bboxes = local.index.bboxes
+    x_min, y_min = np.nanmin(object_bboxes[:, :2], axis=0)
+    x_max, y_max = np.nanmax(object_bboxes[:, 2:], axis=0)
+    x, y = (x_min + x_max) / 2, (y_min + y_max) / 2
+
+    with SXFClient(server.server_address) as client:
+        hits = client.bbox(sheet_path, (x_min, y_min, x_max, y_max))
+        assert sorted(hit.index for hit in hits) == list(range(sxf.records_count))
+        assert all(math.isnan(hit.distance) for hit in hits)
+
+        class_code = sxf.objects[0].class_code
+        hits = client.attribute(sheet_path, class_code)
+        assert [hit.index for hit in hits] == [i for i, obj in enumerate(sxf.objects) if obj.class_code == class_code]
+
+        hits = client.nearest(sheet_path, x, y, 3)
+        assert len(hits) == 3
+        assert [hit.distance for hit in hits] == sorted(hit.distance for hit in hits)
+        hit = hits[0]
+        obj = sxf.objects[hit.index]
+        assert (hit.class_code, hit.id, hit.group_id, hit.type) == (obj.class_code, obj.id, obj.group_id, obj.type)
+
+        # точка внутри какого-либо площадного объекта
+        centers = (object_bboxes[:, :2] + object_bboxes[:, 2:]) / 2
+        area_x, area_y = next(center for center in centers.tolist() if len(local.query.containing(*center)))
+        hits = client.containing(sheet_path, area_x, area_y)
+        assert hits
+        assert [hit.index for hit in hits] == local.query.containing(area_x, area_y).tolist()
+        assert all(hit.type == ObjectType.AREA for hit in hits)
+
+        # ошибка передаётся клиенту, соединение остаётся рабочим
+        with pytest.raises(ValueError):
+            client.bbox(sheet_path + '.missing', (0.0, 0.0, 1.0, 1.0))
+        assert client.nearest(sheet_path, x, y, 1)
+
+
+def test_snapshot_dir(server, sheet_path, tmp_path):
+    with SXFClient(server.server_address) as client:
+        client.bbox(sheet_path, (0.0, 0.0, 1.0, 1.0))
+
+    snapshot_path = server.cache.snapshot_path(sheet_path)
+    assert os.listdir(tmp_path / 'snapshots') == [os.path.basename(snapshot_path)]
+    assert not os.path.exists(sheet_path + '.snap')
+    assert SXF.load_snapshot(sheet_path, snapshot_path) is not None
+
+    # без каталога снимков лист только читается
+    SheetCache().get(sheet_path)
+    assert not os.path.exists(sheet_path + '.snap')
+
+
+def test_socket_path_must_be_socket(tmp_path):
+    path = str(tmp_path / 'sxf.sock')
+    with open(path, 'w') as fp:
+        fp.write('data')
+
+    with pytest.raises(ValueError):
+        SXFServer(path, SheetCache())
+    with open(path) as fp:
+        assert fp.read() == 'data'
+
+
+def test_nearest_error_status(server, sheet_path):
+    with SXFClient(server.server_address) as client:
+        with pytest.raises(ValueError, match='must be positive'):
+            client.nearest(sheet_path, 0.0, 0.0, 0)
+        assert len(client.nearest(sheet_path, 0.0, 0.0, 2)) == 2
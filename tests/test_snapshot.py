@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from pysxf import SXF, SXFWriter
+from pysxf.sxf.columns import SheetColumns
+
+
+def _state(obj) -> dict:
+    return {name: value for name, value in vars(obj).items() if name != 'raw_data'}
+
+
+def test_round_trip(sheet_path):
+    sxf = SXF(sheet_path)
+    sxf.parse()
+    snapshot_path = sxf.save_snapshot()
+    assert snapshot_path == sheet_path + '.snap'
+
+    loaded = SXF.load_snapshot(sheet_path)
+    assert loaded is not None
+    assert len(loaded.objects) == sxf.records_count
+    for obj, restored in zip(sxf.objects, loaded.objects):
+        assert _state(obj) == _state(restored)
+
+
+def test_round_trip_heights_and_graphics(tmp_path):
+    path = str(tmp_path / 'graphics.sxf')
+    with SXFWriter(path) as writer:
+        writer.write_object(1, [(0.0, 0.0), (1.0, 1.0)], subitems=[[(2.0, 2.0)]],
+                            heights=[[1.0, 2.0], [3.0]], graphics=b'\x01\x02', vector=[4.0, 5.0, 6.0])
+        writer.write_object(2, [(0.0, 0.0), (1.0, 1.0)], semantics={1: 'x'})
+
+    sxf = SXF(path)
+    sxf.parse()
+    sxf.save_snapshot()
+
+    obj = SXF.load_snapshot(path).objects[0]
+    assert [part.tolist() for part in obj.heights] == [[1.0, 2.0], [3.0]]
+    assert obj.graphics == b'\x01\x02'
+    assert obj.vector.tolist() == [4.0, 5.0, 6.0]
+
+
+def test_refuses_partial_sheet(sheet_path):
+    sxf = SXF(sheet_path)
+    with pytest.raises(ValueError):
+        sxf.save_snapshot()
+
+    sxf.parse(predicate=lambda obj: obj.class_code % 2 == 0)
+    with pytest.raises(ValueError):
+        sxf.save_snapshot()
+    assert not os.path.exists(sheet_path + '.snap')
+
+    # неполный снимок, записанный в обход проверки, не загружается
+    SheetColumns.from_objects(sxf.objects).save(sheet_path + '.snap', sheet_path)
+    assert SXF.load_snapshot(sheet_path) is None
+
+
+def test_stale_snapshot(sheet_path):
+    sxf = SXF(sheet_path)
+    sxf.parse()
+    sxf.save_snapshot()
+
+    stat = os.stat(sheet_path)
+    os.utime(sheet_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert SXF.load_snapshot(sheet_path) is None
+
+
+@pytest.mark.parametrize('keep', [0, 10, 1000, 100000])
+def test_truncated_snapshot(sheet_path, keep):
+    sxf = SXF(sheet_path)
+    sxf.parse()
+    snapshot_path = sxf.save_snapshot()
+
+    with open(snapshot_path, 'r+b') as fp:
+        fp.truncate(keep)
+    assert SXF.load_snapshot(sheet_path) is None
+
+
+def test_save_replaces_snapshot(sheet_path):
+    sxf = SXF(sheet_path)
+    sxf.parse()
+    snapshot_path = sxf.save_snapshot()
+    # открытый (отображённый) снимок не портится при повторном сохранении
+    loaded = SXF.load_snapshot(sheet_path)
+    sxf.save_snapshot()
+
+    assert len(loaded.objects) == sxf.records_count
+    assert _state(loaded.objects[-1]) == _state(sxf.objects[-1])
+    # временный файл не остаётся рядом со снимком
+    assert sorted(os.listdir(os.path.dirname(snapshot_path))) == ['n-37-141.sxf', 'n-37-141.sxf.snap']
@@ -0,0 +1,84 @@
+import asyncio
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from pysxf import SXF
+from pysxf.strings import StringPool
+
+
+def _semantic_strings(objects) -> list:
+    return [value for obj in objects if obj.has_semantics for value in obj.semantics.values() if isinstance(value, str)]
+
+
+def test_decode_interns():
+    pool = StringPool()
+    first = pool.decode('Калуга'.encode('cp1251'))
+    second = pool.decode(bytes('Калуга'.encode('cp1251')))
+    assert first == 'Калуга' and first is second
+    assert pool.decode('Калуга'.encode('utf-16-le'), 'utf-16-le') is first
+    # нечётная длина UTF-16: последний нулевой байт срезан вместе с терминатором
+    assert pool.decode('A'.encode('utf-16-le')[:-1], 'utf-16-le') == 'A'
+    assert pool.decode_many([b'a', b'b', b'a']) == ['a', 'b', 'a']
+    assert pool.intern(''.join(['Ка', 'луга'])) is first
+    assert len(pool) == 4
+
+
+def test_concurrent_decode():
+    pool = StringPool()
+    raws = [str(i % 500).encode() for i in range(20000)]
+
+    def work():
+        for raw in raws:
+            pool.code(raw)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(pool) == 500
+    assert sorted(pool.values, key=int) == [str(i) for i in range(500)]
+
+
+def test_pickled_pool():
+    pool = StringPool()
+    value = pool.decode(b'river')
+    copy = pickle.loads(pickle.dumps(pool))
+    assert copy.values == pool.values
+    assert copy.decode(b'lake') == 'lake'
+    assert pool.intern(copy.values[0]) is value
+
+
+def test_sheet_strings_are_shared(sheet_path):
+    pool = StringPool()
+    sxf = SXF(sheet_path, strings=pool)
+    sxf.parse()
+
+    values = _semantic_strings(sxf.objects)
+    assert values
+    # равные значения - один объект строки из пула
+    assert len({id(value) for value in values}) == len(set(values))
+    assert all(isinstance(obj.text, str) for obj in sxf.objects if obj.has_text)
+
+
+def test_process_pool_reintern(sheet_path, rsc_path):
+    pool = StringPool()
+
+    async def main():
+        with ProcessPoolExecutor(2) as executor:
+            sxf = await SXF.aopen(sheet_path, rsc_path, executor, pool)
+            await sxf.aparse(executor, batch_size=2000)
+        return sxf
+
+    sxf = asyncio.run(main())
+    interned = {id(value) for value in pool.values}
+
+    values = _semantic_strings(sxf.objects)
+    assert values and all(id(value) in interned for value in values)
+    texts = [obj.text for obj in sxf.objects if obj.has_text]
+    assert texts and all(id(text) in interned for text in texts)
+
+    names = [obj.name for objects in sxf.rsc.objects.values() for obj in objects if isinstance(obj.name, str)]
+    assert names and all(id(name) in interned for name in names)
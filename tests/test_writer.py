@@ -0,0 +1,181 @@
+import math
+
+import pytest
+
+from pysxf import SXF, SXFWriter
+from pysxf.strings import StringPool
+from pysxf.sxf.sxf_object import ObjectType
+
+
+def _line(count, start=0.0):
+    return [(start + i, start + (i % 7)) for i in range(count)]
+
+
+def _read(path, strings=None):
+    sxf = SXF(path, strings=strings)
+    sxf.parse()
+    return sxf
+
+
+def test_big_objects(tmp_path):
+    path = str(tmp_path / 'big.sxf')
+    points = _line(70000)
+    subitems = [_line(66000, 10.0), _line(3, 20.0)]
+    with SXFWriter(path) as writer:
+        writer.write_object(1, points, type_=ObjectType.AREA, subitems=subitems)
+        writer.write_object(2, _line(65535), data_type='<i')
+        writer.write_object(3, _line(10), data_type='<H')
+
+    sxf = _read(path)
+    assert sxf.records_count == 3
+    big, exact, small = sxf.objects
+
+    assert big.points_count == 65535
+    assert big.metrics_points_count == len(points)
+    assert big.points == points
+    assert big.subitems == subitems
+
+    assert exact.metrics_points_count == 65535
+    assert exact.points == [(int(x), int(y)) for x, y in _line(65535)]
+    assert small.points == _line(10)
+
+
+def test_semantic_types(tmp_path):
+    path = str(tmp_path / 'semantics.sxf')
+    semantics = {
+        1: 'Калуга',
+        2: (126, 'Ока'),
+        3: (127, 'Волга'),
+        4: (128, 'озеро'),
+        5: (1, -5),
+        6: (2, 1000),
+        7: (4, -100000),
+        8: (8, 1.5),
+        9: (1, 7, 2),
+        10: (8, 2.5, -1),
+        11: 123456789
+    }
+    with SXFWriter(path) as writer:
+        writer.write_object(1, _line(2), semantics=semantics)
+
+    obj = _read(path, StringPool()).objects[0]
+    assert obj.has_semantics
+    values = obj.semantics
+    assert values[1] == 'Калуга'
+    assert values[2] == 'Ока'
+    assert values[3] == 'Волга'
+    assert values[4] == 'озеро'
+    assert values[5] == -5
+    assert values[6] == 1000
+    assert values[7] == -100000
+    assert values[8] == 1.5
+    assert values[9] == 700
+    assert math.isclose(values[10], 0.25)
+    assert values[11] == 123456789
+
+    # без пула строки остаются байтами в исходной кодировке
+    raw = _read(path).objects[0].semantics
+    assert raw[1] == 'Калуга'.encode('cp1251')
+    assert raw[3] == 'Волга'.encode('utf-16-le')
+
+
+def test_labels(tmp_path):
+    path = str(tmp_path / 'labels.sxf')
+    text_subitems = [
+        {'points': [(5.0, 5.0), (6.0, 5.0)], 'text': 'река'},
+        {'points': [(7.0, 7.0)], 'text': 'Ока'}
+    ]
+    with SXFWriter(path) as writer:
+        writer.write_object(1, [(0.0, 0.0), (1.0, 0.0)], type_=ObjectType.LABEL,
+                            text='Калуга', text_subitems=text_subitems)
+        writer.write_object(2, [(0.0, 0.0)], type_=ObjectType.POINT, text='пункт')
+
+    label, point = _read(path, StringPool()).objects
+    assert label.type == ObjectType.LABEL
+    assert label.text == 'Калуга'
+    assert label.text_subitems == text_subitems
+    assert point.text == 'пункт'
+
+
+def test_rewrite_is_byte_identical(tmp_path):
+    path = str(tmp_path / 'source.sxf')
+    copy_path = str(tmp_path / 'copy.sxf')
+    with SXFWriter(path) as writer:
+        writer.write_object(1, _line(70000), subitems=[_line(5)], semantics={1: 'x', 2: 3})
+        writer.write_object(2, [(0.0, 0.0), (1.0, 1.0)], type_=ObjectType.LABEL,
+                            text_subitems=[{'points': [(2.0, 2.0)], 'text': 'a'}])
+        writer.write_object(3, [(0.0, 0.0), (1.0, 1.0)], heights=[[10.0, 20.0]],
+                            graphics=b'\x01\x02\x03', vector=[1.0, 2.0, 3.0])
+
+    source = _read(path)
+    with SXFWriter.like(source, copy_path) as writer:
+        for obj in source.objects:
+            writer.write_sxf_object(obj)
+
+    with open(path, 'rb') as original, open(copy_path, 'rb') as copy:
+        assert original.read() == copy.read()
+
+
+@pytest.mark.parametrize('strings', [None, StringPool()])
+def test_semantic_formats_round_trip(tmp_path, strings):
+    path = str(tmp_path / 'formats.sxf')
+    copy_path = str(tmp_path / 'copy.sxf')
+    semantics = {
+        1: (127, '日本'),
+        2: (127, b'abc'),
+        3: (126, 'Ока'),
+        4: (2, 15, -1),
+        5: (4, 7, 2),
+        6: (8, 1.5, -2),
+        7: (1, 3, -1)
+    }
+    with SXFWriter(path) as writer:
+        writer.write_object(1, _line(2), semantics=semantics)
+
+    source = _read(path, strings)
+    obj = source.objects[0]
+    assert math.isclose(obj.semantics[4], 1.5)
+    assert obj.semantics[5] == 700
+    assert math.isclose(obj.semantics[6], 0.015)
+    with SXFWriter.like(source, copy_path) as writer:
+        writer.write_sxf_object(obj)
+
+    with open(path, 'rb') as original, open(copy_path, 'rb') as copy:
+        assert original.read() == copy.read()
+
+
+@pytest.mark.parametrize('strings', [None, StringPool()])
+def test_bundled_sheet_is_byte_identical(sheet_path, tmp_path, strings):
+    copy_path = str(tmp_path / 'copy.sxf')
+    source = _read(sheet_path, strings)
+    with SXFWriter.like(source, copy_path) as writer:
+        for obj in source.objects:
+            writer.write_sxf_object(obj)
+
+    with open(sheet_path, 'rb') as original, open(copy_path, 'rb') as copy:
+        assert original.read() == copy.read()
+
+
+def test_heights_and_graphics(tmp_path):
+    path = str(tmp_path / 'graphics.sxf')
+    with SXFWriter(path) as writer:
+        writer.write_object(1, [(0, 0), (10, 10)], subitems=[[(1, 1), (2, 2), (3, 3)]],
+                            heights=[[1, 2], [3, 4, 5]], graphics=b'\xaa\xbb', vector=[1, 2, 3],
+                            data_type='<i')
+
+    obj = _read(path).objects[0]
+    assert obj.is_3d and obj.has_graphics and obj.has_vector
+    assert [part.tolist() for part in obj.heights] == [[1, 2], [3, 4, 5]]
+    assert obj.graphics == b'\xaa\xbb'
+    assert obj.vector.tolist() == [1, 2, 3]
+
+    with SXFWriter(str(tmp_path / 'replaced.sxf')) as writer:
+        with pytest.raises(ValueError):
+            writer.write_sxf_object(obj, points=[(0, 0), (5, 5)])
+        writer.write_sxf_object(obj, points=[(0, 0), (5, 5)], heights=[[1, 3], [3, 4, 5]])
+
+
+def test_heights_must_match_points(tmp_path):
+    with SXFWriter(str(tmp_path / 'invalid.sxf')) as writer:
+        with pytest.raises(ValueError):
+            writer.write_object(1, [(0, 0), (1, 1)], heights=[[1.0]])